@@ -0,0 +1,420 @@
+"""Бот на asyncio (AsyncTeleBot): те же сценарии, что в main.py.
+
+Запросы к Telegram не занимают потоков — их ожидает цикл событий, поэтому один
+процесс держит сотни одновременных чатов. Разбор и генерация уходят в пул
+процессов (workers.ProcessPool) или, при JOB_WORKERS=0, в пул потоков цикла.
+Обновления одного пользователя обрабатываются по порядку, разных — вперемешку.
+Частота отправки ограничивается теми же корзинами токенов, что в outbox.py;
+на ответ 429 отправка повторяется через retry_after.
+
+Запуск (вместо python main.py; вебхук-режим — по-прежнему webhook.py):
+    python aiobot.py
+"""
+import asyncio
+import contextlib
+import functools
+import io
+import os
+import time
+
+from telebot import asyncio_helper
+from telebot.async_telebot import AsyncTeleBot
+from telebot.asyncio_helper import ApiTelegramException
+
+import config
+import metrics
+from downloads import FileTooLarge, download_to_async, file_url
+from generator import plan_discipline, program_names, render_discipline, render_discipline_bytes, zip_files
+from outbox import TokenBucket, document_size
+from parsers import parse_competencies_file, parse_questions_file
+from question_bank import parse_quotas
+from replies import (bank_key, cached, cached_index, competencies_reply, greeting, job_error_text, main_keyboard,
+                     split_long_message, store_parsed, user_indexes)
+from sessions import open_store
+from settings import API_KEY
+from workers import JobError, ProcessPool
+
+# Квоты по разделам разбираются при запуске: ошибка в QUESTION_QUOTAS не доходит до обработчиков
+QUOTAS = parse_quotas(config.QUESTION_QUOTAS)
+
+# Один процесс обслуживает всех пользователей; sqlite — чтобы состояние пережило перезапуск
+sessions = open_store(config.SESSION_STORE, config.SESSION_DB, config.SESSION_MAX_USERS, config.SESSION_TTL)
+
+bot = AsyncTeleBot(API_KEY)
+
+# Разбор и генерация — в отдельных процессах (JOB_WORKERS=0 — в пуле потоков цикла событий)
+jobs = ProcessPool(config.JOB_WORKERS, config.JOB_QUEUE_PER_USER, config.JOB_TIMEOUT) if config.JOB_WORKERS > 0 else None
+if jobs is not None:
+    metrics.gauge("bot_jobs_queued", jobs.queued)
+
+# Корзины токенов для отправки (OUTBOX_SENDERS=0 — без ограничения частоты)
+_global_bucket = TokenBucket(config.OUTBOX_GLOBAL_RATE, 1)
+_chat_buckets = {}
+# Чаты с полной корзиной забываются, когда их набирается столько
+_MAX_CHAT_BUCKETS = 10000
+
+# Очереди пользователей: user_id → [блокировка, сколько обновлений её ждёт или держит]
+_user_locks = {}
+# Обновлений в обработке и в ожидании своей очереди (снимается из потока /metrics — через копию)
+metrics.gauge("bot_updates_queued", lambda: sum(entry[1] for entry in list(_user_locks.values())))
+
+
+# ---------- ПОРЯДОК ОБНОВЛЕНИЙ ----------
+@contextlib.asynccontextmanager
+async def user_lock(user_id):
+    """Обновления одного пользователя — строго по очереди."""
+    entry = _user_locks.setdefault(user_id, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _user_locks[user_id]
+
+
+def ordered(handler):
+    @functools.wraps(handler)
+    async def wrapper(message):
+        async with user_lock(message.from_user.id):
+            await handler(message)
+    return wrapper
+
+
+# ---------- START ----------
+@bot.message_handler(commands=['start'])
+@ordered
+async def start(message):
+    await send_message(
+        message.chat.id,
+        greeting(message.from_user.first_name),
+        parse_mode="Markdown",
+        reply_markup=main_keyboard()
+    )
+
+
+# ---------- ТЕКСТ ----------
+@bot.message_handler(content_types=['text'])
+@ordered
+@metrics.timed("handle_text")
+async def handle_text(message):
+    user_id = message.from_user.id
+    text = message.text.strip().lower()
+
+    user_dir = f"data_{user_id}"
+    comp_file = os.path.join(user_dir, "competencies.docx")
+    quest_file = os.path.join(user_dir, "questions.docx")
+
+    await in_thread(functools.partial(os.makedirs, user_dir, exist_ok=True))
+    data = await in_thread(sessions.get, user_id)
+
+    # ---- ЗАГРУЗКА ----
+    if text == "📘 загрузить компетенции":
+        await send_message(message.chat.id, "📤 Отправьте Word-файл (.docx) с компетенциями.")
+        # запись сессии — это SQLite и ожидание других процессов, поэтому тоже в потоке
+        await in_thread(data.update, {"mode": "competencies"})
+        return
+
+    if text == "🧩 загрузить вопросы":
+        await send_message(message.chat.id, "📤 Отправьте Word-файл (.docx) с вопросами.")
+        await in_thread(data.update, {"mode": "questions"})
+        return
+
+    # ---- УДАЛЕНИЕ ----
+    if text == "🗑 удалить все файлы":
+        if jobs is not None:
+            jobs.cancel_user(user_id)
+        if await in_thread(remove_user_files, user_dir):
+            await send_message(message.chat.id, "✅ Все файлы удалены.", reply_markup=main_keyboard())
+        else:
+            await send_message(message.chat.id, "⚠️ У вас нет загруженных файлов.", reply_markup=main_keyboard())
+        return
+
+    # ---- ГЕНЕРАЦИЯ ----
+    if text == "🧠 сгенерировать файлы":
+        found = data.get("found_disciplines")
+        if not found:
+            await send_message(message.chat.id, "⚠️ Сначала введите часть названия дисциплины, чтобы я нашёл нужные.")
+            return
+        if not await in_thread(os.path.exists, quest_file):
+            await send_message(message.chat.id, "⚠️ Нужно загрузить файл с вопросами (.docx).")
+            return
+
+        await send_message(message.chat.id, "⏳ Генерирую файлы, подождите...")
+
+        questions = await question_bank(message, data, quest_file)
+        if questions is None:
+            return
+        competencies, _ = await in_thread(user_indexes, data)
+        # артефакт читается из хранилища и распаковывается при первом обращении
+        program_info = await in_thread(data.get, "program_info")
+        if not await generate_and_send(message, user_dir, found, competencies, questions, program_info):
+            return
+        await send_message(message.chat.id, "✅ Файлы успешно сгенерированы!", reply_markup=main_keyboard())
+        return
+
+    # ---- ПОИСК ----
+    if not await in_thread(os.path.exists, comp_file):
+        await send_message(message.chat.id, "⚠️ Сначала загрузите файл с компетенциями (.docx)")
+        return
+
+    # Если ещё не извлекали
+    if "disciplines" not in data:
+        parsed = await run_job(message, parse_competencies_file, comp_file, data.get("competencies_digest"),
+                               config.COMPETENCY_PARSER, data.get("competencies_parsed_digest"))
+        if parsed is None:
+            return
+        disciplines, competencies = await in_thread(store_parsed, data, parsed)
+        await send_message(
+            message.chat.id,
+            f"✅ Файл загружен! Найдено {len(disciplines)} дисциплин и {len(competencies)} компетенций.\n\n"
+            "✏️ Теперь напиши часть названия дисциплины, например: *иностр*, *командн*, *информ*.",
+            parse_mode="Markdown"
+        )
+        return
+
+    competencies, index = await in_thread(user_indexes, data)
+
+    found = index.search(text)
+    if not found:
+        # «ук5», «опк 3.1» — ищем по коду компетенции и её индикаторам
+        found = index.by_code(text)
+
+    if not found:
+        await send_message(message.chat.id, "❌ Ничего не найдено. Попробуйте ввести другую часть названия.")
+        return
+
+    # --- вывод совпадений ---
+    await send_long_message(message.chat.id, "📚 Найдено совпадений:\n\n" + "\n\n".join([f"📘 {d}" for d in found]))
+
+    # --- компетенции по найденным дисциплинам ---
+    await send_long_message(
+        message.chat.id,
+        await in_thread(competencies_reply, found, competencies),
+        parse_mode="Markdown",
+        reply_markup=main_keyboard()
+    )
+
+    await in_thread(data.update, {"found_disciplines": found})
+
+
+# ---------- ДОКУМЕНТЫ ----------
+@bot.message_handler(content_types=['document'])
+@ordered
+@metrics.timed("handle_document")
+async def handle_document(message):
+    user_id = message.from_user.id
+    data = await in_thread(sessions.get, user_id)
+    mode = data.get("mode")
+
+    if not mode:
+        await send_message(message.chat.id, "⚠️ Сначала выберите, что загрузить: компетенции или вопросы.")
+        return
+
+    user_dir = f"data_{user_id}"
+    await in_thread(functools.partial(os.makedirs, user_dir, exist_ok=True))
+    file_path = os.path.join(user_dir, f"{mode}.docx")
+
+    # Файл пишется на диск частями, хэш для кэша разбора считается по ходу загрузки
+    max_size = config.MAX_UPLOAD_MB << 20
+    try:
+        if (message.document.file_size or 0) > max_size:
+            raise FileTooLarge(message.document.file_size)
+        file_info = await bot.get_file(message.document.file_id)
+        session = await asyncio_helper.session_manager.get_session()
+        url = file_url(bot.token, file_info.file_path, asyncio_helper.FILE_URL)
+        _, digest = await download_to_async(session, url, file_path, max_size)
+    except FileTooLarge:
+        await send_message(message.chat.id, f"⚠️ Файл слишком большой: можно не больше {config.MAX_UPLOAD_MB} МБ.")
+        return
+    await in_thread(data.update, {f"{mode}_digest": digest})
+
+    # Новый файл компетенций — прежние результаты разбора больше не действительны
+    if mode == "competencies":
+        await in_thread(data.discard, "disciplines", "competencies", "program_info", "found_disciplines")
+
+    await send_message(
+        message.chat.id,
+        f"✅ Файл '{message.document.file_name}' успешно загружен.",
+        reply_markup=main_keyboard()
+    )
+
+    comp_file = os.path.join(user_dir, "competencies.docx")
+    quest_file = os.path.join(user_dir, "questions.docx")
+
+    # ✅ Если загружены оба файла — только один раз парсим
+    if await in_thread(os.path.exists, comp_file) and await in_thread(os.path.exists, quest_file):
+        # Проверяем, не были ли уже распознаны
+        if "disciplines" not in data or "competencies" not in data:
+            await send_message(message.chat.id, "⏳ Обрабатываю файлы, подождите...")
+
+            parsed = await run_job(message, parse_competencies_file, comp_file, data.get("competencies_digest"),
+                                   config.COMPETENCY_PARSER, data.get("competencies_parsed_digest"))
+            if parsed is None:
+                return
+            disciplines, competencies = await in_thread(store_parsed, data, parsed)
+
+            await send_message(
+                message.chat.id,
+                f"✅ Файлы загружены!\nНайдено {len(disciplines)} дисциплин и {len(competencies)} компетенций.\n\n"
+                "✏️ Теперь напиши часть названия дисциплины, например: *иностр*, *командн*, *информ.*",
+                parse_mode="Markdown",
+                reply_markup=main_keyboard()
+            )
+        else:
+            # Если уже парсили — просто напоминаем, что делать дальше
+            await send_message(
+                message.chat.id,
+                "✏️ Теперь напиши часть названия дисциплины, например: *иностр*, *командн*, *информ.*",
+                parse_mode="Markdown",
+                reply_markup=main_keyboard()
+            )
+
+
+# ---------- ТЯЖЁЛЫЕ ЗАДАЧИ ----------
+async def in_thread(fn, *args):
+    """Выполняет fn(*args) в пуле потоков цикла событий."""
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+async def run_job(message, fn, *args):
+    """Выполняет тяжёлую задачу в пуле процессов; при отказе сообщает пользователю и возвращает None."""
+    if jobs is None:
+        return await in_thread(fn, *args)
+    try:
+        return await jobs.arun(message.from_user.id, fn, *args)
+    except JobError as e:
+        await send_message(message.chat.id, job_error_text(e))
+    return None
+
+
+async def question_bank(message, data, quest_file):
+    """Банк вопросов пользователя: разбирается один раз на процесс и загруженный файл; None — при ошибке."""
+    key = bank_key(data)
+    bank = cached(key)
+    if bank is None:
+        bank = await run_job(message, parse_questions_file, quest_file, data.get("questions_digest"))
+        if bank is None:
+            return None
+    return cached_index(key, lambda: bank)
+
+
+async def _in_threads(fn, tasks):
+    async for args in tasks:
+        yield await in_thread(fn, *args)
+
+
+async def _plans(found, competencies, questions, quotas):
+    # подбор вопросов и описаний — тоже в потоке, по одной дисциплине перед её генерацией
+    for discipline in found:
+        yield await in_thread(plan_discipline, discipline, competencies, questions, quotas)
+
+
+async def generate_and_send(message, user_dir, found, competencies, questions, program_info):
+    """Генерирует файлы дисциплин и отправляет каждый, как только он готов (см. main.generate_and_send)."""
+    direction, profile = await in_thread(program_names, user_dir, program_info)
+    plans = _plans(found, competencies, questions, QUOTAS)
+    if config.GEN_OUTPUT == "disk":
+        render, tasks = render_discipline, ((user_dir, plan, direction, profile) async for plan in plans)
+    else:
+        render, tasks = render_discipline_bytes, ((plan, direction, profile) async for plan in plans)
+    if jobs is None:
+        results = _in_threads(render, tasks)
+    else:
+        results = jobs.amap(message.from_user.id, render, tasks, in_flight=config.GEN_IN_FLIGHT)
+    try:
+        if config.GEN_ZIP_FROM and len(found) >= config.GEN_ZIP_FROM:
+            files = [await in_thread(read_generated, result) async for result in results]
+            archive = await in_thread(zip_files, files)
+            await send_document(message.chat.id, io.BytesIO(archive), visible_file_name="Задания.zip")
+        else:
+            async for result in results:
+                name, data = await in_thread(read_generated, result)
+                await send_document(message.chat.id, io.BytesIO(data), visible_file_name=name)
+    except JobError as e:
+        await send_message(message.chat.id, job_error_text(e))
+        return False
+    finally:
+        await results.aclose()
+    return True
+
+
+def remove_user_files(user_dir):
+    """Удаляет файлы пользователя; False — папки нет."""
+    if not os.path.exists(user_dir):
+        return False
+    for f in os.listdir(user_dir):
+        os.remove(os.path.join(user_dir, f))
+    return True
+
+
+def read_generated(result):
+    """(имя, содержимое) сгенерированного файла — из памяти или с диска."""
+    if isinstance(result, tuple):
+        return result
+    with open(result, "rb") as f:
+        return os.path.basename(result), f.read()
+
+
+# ---------- ОТПРАВКА ----------
+async def _pace(chat_id):
+    """Ждёт токена в корзине чата и в общей корзине."""
+    if config.OUTBOX_SENDERS <= 0:
+        return
+    bucket = _chat_buckets.get(chat_id)
+    if bucket is None:
+        if len(_chat_buckets) >= _MAX_CHAT_BUCKETS:
+            now = time.monotonic()
+            for idle in [c for c, b in _chat_buckets.items() if b.full(now)]:
+                del _chat_buckets[idle]
+        bucket = _chat_buckets[chat_id] = TokenBucket(config.OUTBOX_CHAT_RATE, config.OUTBOX_CHAT_BURST)
+    while True:
+        now = time.monotonic()
+        wait = max(bucket.delay(now), _global_bucket.delay(now))
+        if wait <= 0:
+            bucket.take(now)
+            _global_bucket.take(now)
+            return
+        await asyncio.sleep(wait)
+
+
+async def _send(method, chat_id, *args, **kwargs):
+    """Отправка с ограничением частоты; на 429 — повтор через retry_after."""
+    for attempt in range(config.OUTBOX_RETRIES + 1):
+        await _pace(chat_id)
+        try:
+            return await method(chat_id, *args, **kwargs)
+        except ApiTelegramException as e:
+            if e.error_code != 429 or attempt == config.OUTBOX_RETRIES:
+                raise
+            await asyncio.sleep((e.result_json.get("parameters") or {}).get("retry_after", 1))
+            for arg in args:
+                if isinstance(arg, io.IOBase):
+                    arg.seek(0)
+
+
+async def send_message(chat_id, text, **kwargs):
+    return await _send(bot.send_message, chat_id, text, **kwargs)
+
+
+@metrics.timed("upload")
+async def send_document(chat_id, document, **kwargs):
+    result = await _send(bot.send_document, chat_id, document, **kwargs)
+    metrics.inc("bot_uploads_total")
+    metrics.inc("bot_uploaded_bytes_total", document_size(document))
+    return result
+
+
+async def send_long_message(chat_id, text, parse_mode=None, reply_markup=None):
+    """Отправляет длинный текст частями (безопасно для Telegram)."""
+    parts = split_long_message(text)
+    for i, part in enumerate(parts):
+        rm = reply_markup if i == len(parts) - 1 else None
+        await send_message(chat_id, part, parse_mode=parse_mode, reply_markup=rm)
+
+
+if __name__ == "__main__":
+    print("🤖 Бот запущен (asyncio): поиск и генерация по найденным дисциплинам")
+    metrics.serve()
+    asyncio.run(bot.polling(non_stop=True))
@@ -0,0 +1,315 @@
+"""Пакетная генерация без бота: файлы заданий по всем дисциплинам многих учебных планов.
+
+Пара «план + банк вопросов» — папка внутри входной (на любой глубине), где лежат
+competencies.docx и questions.docx, как в папке пользователя бота. Файлы дисциплин
+пишутся в ту же относительную папку внутри выходной.
+
+Пары разбираются, а файлы строятся в пуле процессов (workers.ProcessPool):
+пока одни пары разбираются, файлы уже разобранных строятся. Файл записывается
+атомарно, а ход работы по паре — в .batch.json рядом с её файлами, поэтому
+прерванный запуск можно просто повторить: готовые пары и файлы пропускаются,
+пары с изменившимися исходниками генерируются заново.
+
+Запуск из корня репозитория:
+    python batch.py faculty/ -o generated/ --workers 16
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import config
+import parse_cache
+from generator import build_discipline, discipline_filename, plan_discipline, program_names
+from parsers import parse_competencies_file, parse_questions_file
+from question_bank import parse_quotas
+from search_index import CompetencyIndex
+from workers import ProcessPool
+
+logger = logging.getLogger(__name__)
+
+COMPETENCIES, QUESTIONS = "competencies.docx", "questions.docx"
+STATE_FILE = ".batch.json"
+# Сколько задач держать в пуле сверх числа процессов, чтобы процессы не простаивали
+_SLACK = 4
+
+
+# ---------- В ПРОЦЕССАХ ПУЛА ----------
+def parse_pair(directory, digests, mode):
+    """Разбирает пару: (дисциплины/компетенции/направление, банк вопросов)."""
+    # отчёты парсеров о найденном в пакетном режиме не нужны
+    with contextlib.redirect_stdout(io.StringIO()):
+        parsed = parse_competencies_file(os.path.join(directory, COMPETENCIES), digests[0], mode)
+        bank = parse_questions_file(os.path.join(directory, QUESTIONS), digests[1])
+    return parsed, bank
+
+
+def write_discipline(path, plan, direction, profile):
+    """Строит файл дисциплины и атомарно записывает его: недописанных файлов не бывает."""
+    data = build_discipline(plan, direction, profile)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+    return path
+
+
+# ---------- ПАРЫ ----------
+def find_pairs(source, skip=None):
+    """Папки с обоими файлами (пути относительно source) по алфавиту; skip — не заходить."""
+    skip = skip and os.path.abspath(skip)
+    pairs = []
+    for directory, dirs, files in os.walk(source):
+        dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(directory, d)) != skip)
+        if COMPETENCIES in files and QUESTIONS in files:
+            pairs.append(os.path.relpath(directory, source))
+    return pairs
+
+
+def filenames(disciplines):
+    """Имена файлов дисциплин: одинаковые первые 40 символов названия нумеруются, как в zip_files."""
+    names = []
+    seen = {}
+    for disc in disciplines:
+        filename = discipline_filename(disc)
+        count = seen[filename] = seen.get(filename, 0) + 1
+        if count > 1:
+            stem, ext = os.path.splitext(filename)
+            filename = f"{stem} ({count}){ext}"
+        names.append(filename)
+    return names
+
+
+def load_state(out_dir):
+    try:
+        with open(os.path.join(out_dir, STATE_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_state(out_dir, state):
+    fd, tmp = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(out_dir, STATE_FILE))
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+def remove_outputs(out_dir, state):
+    """Удаляет файлы, запланированные прежним запуском по state: исходники пары изменились."""
+    for name in state.get("names", ()):
+        # только файлы самой папки пары — .batch.json мог быть изменён руками
+        if name == os.path.basename(name) and name not in (STATE_FILE, "", ".", ".."):
+            with contextlib.suppress(OSError):
+                os.unlink(os.path.join(out_dir, name))
+
+
+class _Pair:
+    """Пара в работе: сколько файлов запланировано, готово и с ошибкой."""
+
+    __slots__ = ("name", "out_dir", "digests", "resume", "planned", "names", "done", "failed", "finished")
+
+    def __init__(self, name, out_dir, digests, resume):
+        self.name = name
+        self.out_dir = out_dir
+        self.digests = digests
+        self.resume = resume  # исходники те же, что в прерванном запуске: готовые файлы не трогаем
+        self.planned = None  # None — пара ещё не разобрана
+        self.names = []  # имена файлов дисциплин в out_dir
+        self.done = 0
+        self.failed = 0
+        self.finished = False
+
+
+# ---------- ХОД РАБОТЫ ----------
+class Progress:
+    """Счётчики пакета; сводка — в stream не чаще раза в interval секунд."""
+
+    def __init__(self, pairs, interval=2.0, stream=None):
+        self.pairs = pairs
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.pairs_done = 0
+        self.pairs_failed = 0
+        self.planned = 0
+        self.written = 0
+        self.existing = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._shown = 0.0
+
+    def rate(self):
+        """Записанных файлов в минуту."""
+        elapsed = time.monotonic() - self.started
+        return self.written * 60 / elapsed if elapsed > 0 else 0.0
+
+    def line(self):
+        return (f"пары {self.pairs_done + self.pairs_failed}/{self.pairs}, "
+                f"файлы {self.written + self.existing}/{self.planned}"
+                + (f" (из них уже были {self.existing})" if self.existing else "")
+                + f", {self.rate():.0f} файлов/мин"
+                + (f", ошибок: пар {self.pairs_failed}, файлов {self.failed}"
+                   if self.pairs_failed or self.failed else ""))
+
+    def show(self, force=False):
+        now = time.monotonic()
+        if force or now - self._shown >= self.interval:
+            self._shown = now
+            print(self.line(), file=self.stream, flush=True)
+
+
+def _as_completed(pool, fn, tasks, in_flight):
+    """Выполняет fn(*args) для (ключ, args) из tasks, держа в пуле не больше in_flight задач.
+
+    В отличие от ProcessPool.imap ошибка одной задачи не прерывает остальные:
+    отдаёт (ключ, результат, исключение) по мере готовности.
+    """
+    tasks = iter(tasks)
+    running = {}
+    exhausted = False
+    while True:
+        while not exhausted and len(running) < in_flight:
+            task = next(tasks, None)
+            if task is None:
+                exhausted = True
+            else:
+                running[pool.submit("batch", fn, *task[1])] = task[0]
+        if not running:
+            return
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            key = running.pop(future)
+            try:
+                yield key, future.result(), None
+            except Exception as e:
+                yield key, None, e
+
+
+# ---------- ПАКЕТ ----------
+def run(source, output, pool, mode="text", quotas=None, force=False, interval=2.0):
+    """Генерирует файлы всех дисциплин всех пар из source в output.
+
+    force — генерировать заново и готовые пары. Возвращает Progress с итогами;
+    ошибки пишутся в журнал и не останавливают остальные пары.
+    """
+    names = find_pairs(source, skip=output)
+    progress = Progress(len(names), interval)
+    todo = []
+    for name in names:
+        directory, out_dir = os.path.join(source, name), os.path.join(output, name)
+        digests = [parse_cache.file_digest(os.path.join(directory, f)) for f in (COMPETENCIES, QUESTIONS)]
+        state = load_state(out_dir)
+        same = state is not None and state.get("digests") == digests
+        if same and state.get("done") and not force:
+            progress.pairs_done += 1
+            progress.existing += state.get("files", 0)
+            progress.planned += state.get("files", 0)
+            continue
+        if state is not None and not same:
+            # у дисциплин новой версии могут быть другие имена — старые файлы не должны остаться
+            remove_outputs(out_dir, state)
+        os.makedirs(out_dir, exist_ok=True)
+        if not same or state.get("done"):
+            # имена прежних файлов тех же исходников сохраняются: их удалит запуск с новыми
+            save_state(out_dir, {"digests": digests, "done": False, "names": state.get("names", []) if same else []})
+        todo.append(_Pair(name, out_dir, digests, same and not force))
+
+    def settle(pair):
+        # все файлы пары готовы или не построились — отмечаем пару
+        if pair.finished or pair.planned is None or pair.done + pair.failed < pair.planned:
+            return
+        pair.finished = True
+        if pair.failed:
+            progress.pairs_failed += 1
+            return
+        progress.pairs_done += 1
+        save_state(pair.out_dir, {"digests": pair.digests, "done": True, "files": pair.planned, "names": pair.names})
+
+    def files():
+        # пары разбираются в пуле заранее, пока строятся файлы уже разобранных
+        parses = ((pair, (os.path.join(source, pair.name), pair.digests, mode)) for pair in todo)
+        for pair, result, error in _as_completed(pool, parse_pair, parses, pool.max_workers):
+            if error is not None:
+                logger.error("Пара %s не разобрана: %s", pair.name, error)
+                pair.planned, pair.finished = 0, True
+                progress.pairs_failed += 1
+                continue
+            parsed, bank = result
+            competencies = CompetencyIndex(parsed["competencies"])
+            direction, profile = program_names(pair.out_dir, parsed["program_info"])
+            pair.planned = len(parsed["disciplines"])
+            progress.planned += pair.planned
+            pair.names = filenames(parsed["disciplines"])
+            # имена — до первого файла: если запуск прервут, следующий с новыми исходниками их удалит
+            save_state(pair.out_dir, {"digests": pair.digests, "done": False, "names": pair.names})
+            for disc, filename in zip(parsed["disciplines"], pair.names):
+                path = os.path.join(pair.out_dir, filename)
+                if pair.resume and os.path.exists(path):
+                    pair.done += 1
+                    progress.existing += 1
+                    continue
+                yield pair, (path, plan_discipline(disc, competencies, bank, quotas), direction, profile)
+            settle(pair)
+            progress.show()
+
+    in_flight = pool.max_workers + _SLACK
+    for pair, _, error in _as_completed(pool, write_discipline, files(), in_flight):
+        if error is None:
+            pair.done += 1
+            progress.written += 1
+        else:
+            logger.error("Пара %s: файл не построен: %s", pair.name, error)
+            pair.failed += 1
+            progress.failed += 1
+        settle(pair)
+        progress.show()
+    progress.show(force=True)
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Файлы заданий по всем дисциплинам учебных планов из папки.")
+    parser.add_argument("source", help=f"папка с подпапками, где лежат {COMPETENCIES} и {QUESTIONS}")
+    parser.add_argument("-o", "--output", required=True, help="куда складывать файлы (по подпапкам пар)")
+    parser.add_argument("--workers", type=int, default=config.JOB_WORKERS or os.cpu_count() or 1,
+                        help="процессов (по умолчанию JOB_WORKERS)")
+    parser.add_argument("--mode", default=config.COMPETENCY_PARSER, choices=("auto", "text", "tables"),
+                        help="как разбирать файл компетенций (по умолчанию COMPETENCY_PARSER)")
+    parser.add_argument("--quotas", default=config.QUESTION_QUOTAS,
+                        help="квоты по разделам на 15 вопросов: «ЕВ:4,МВ:4,...» или selection")
+    parser.add_argument("--timeout", type=int, default=config.JOB_TIMEOUT, help="предел на одну задачу, с")
+    parser.add_argument("--force", action="store_true", help="генерировать заново и уже готовые пары")
+    parser.add_argument("--progress", type=float, default=2.0, help="как часто выводить ход работы, с")
+    args = parser.parse_args(argv)
+    try:
+        quotas = parse_quotas(args.quotas)
+    except ValueError as e:
+        parser.error(str(e))
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    pool = ProcessPool(args.workers, max_queued_per_user=None, timeout=args.timeout)
+    try:
+        progress = run(args.source, args.output, pool, args.mode, quotas, args.force, args.progress)
+    finally:
+        pool.shutdown()
+    return 1 if progress.pairs_failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
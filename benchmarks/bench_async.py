@@ -0,0 +1,129 @@
+"""Сотни одновременных чатов: нынешний цикл опроса (main.py, пул потоков)
+против asyncio-рантайма (aiobot.py) — на заглушке Bot API на aiohttp
+с задержкой каждого ответа, как у настоящего сервера.
+
+Каждый чат проходит поиск: /start, загрузка файла компетенций, первый запрос
+(разбор файла), второй запрос (ответ с компетенциями). Файл у всех один —
+разбор берётся из кэша, поэтому время уходит в основном на ожидание сети.
+Ограничение частоты отправки выключено (OUTBOX_SENDERS=0): заглушка 429 не
+отвечает, а сравнивается именно то, сколько запросов рантайм держит сразу.
+
+Каждый рантайм запускается в отдельном процессе.
+Запуск из корня репозитория (нужен settings.py, как для самого бота):
+    python benchmarks/bench_async.py --chats 300 --latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_telegram_aio import AioFakeTelegram  # noqa: E402
+from benchmarks.fixtures import make_competencies_docx  # noqa: E402
+
+RUNTIMES = ("threads", "asyncio")
+# Последний ответ сценария
+DONE = "📖"
+
+
+def scenario(fake, user_id, comp):
+    return [
+        fake.message(user_id, "/start"),
+        fake.message(user_id, "📘 Загрузить компетенции"),
+        fake.message(user_id, document=("competencies.docx", comp)),
+        fake.message(user_id, "информ"),
+        fake.message(user_id, "информ"),
+    ]
+
+
+def start_bot(runtime):
+    """Импортирует рантайм (после настроек окружения и install()) и запускает опрос в потоке."""
+    if runtime == "threads":
+        import main
+        target, kwargs = main.bot.polling, {"none_stop": True, "interval": 0, "timeout": 1}
+    else:
+        import aiobot
+        target, kwargs = asyncio.run, {"main": aiobot.bot.polling(non_stop=True, timeout=1)}
+    threading.Thread(target=target, kwargs=kwargs, daemon=True).start()
+
+
+def run_runtime(args):
+    os.environ.update(BOT_WORKERS=str(args.workers), JOB_WORKERS=str(args.jobs), OUTBOX_SENDERS="0")
+    os.chdir(tempfile.mkdtemp(prefix=f"bench_async_{args.runtime}_"))
+    fake = AioFakeTelegram().start()
+    fake.latency = args.latency
+    fake.install()
+    comp = make_competencies_docx("c.docx", disciplines=args.disciplines, competencies=args.disciplines // 4)
+    with open(comp, "rb") as f:
+        comp = f.read()
+    start_bot(args.runtime)
+
+    # первый пользователь прогревает кэш разбора, затем все остальные разом
+    finished = {}
+    users = [[1], range(2, args.chats + 1)]
+    started = time.perf_counter()
+    peak_threads = 0
+    for batch in users:
+        t0 = time.perf_counter()
+        for user_id in batch:
+            fake.push(*scenario(fake, user_id, comp))
+        deadline = t0 + args.timeout
+        left = set(batch)
+        while left and time.perf_counter() < deadline:
+            peak_threads = max(peak_threads, threading.active_count())
+            with fake._cond:
+                sent = list(fake.sent)
+            for stamp, chat_id, _, text in sent:
+                if chat_id in left and isinstance(text, str) and text.startswith(DONE):
+                    finished[chat_id] = stamp - t0
+                    left.discard(chat_id)
+            time.sleep(0.05)
+        if batch is users[0]:
+            started = time.perf_counter()
+    total = time.perf_counter() - started
+    times = sorted(finished[u] for u in users[1] if u in finished)
+    print(json.dumps({"finished": len(finished), "total": total, "median": statistics.median(times) if times else None,
+                      "p95": times[int(len(times) * 0.95) - 1] if times else None, "requests": fake.requests,
+                      "threads": peak_threads}))
+    sys.stdout.flush()
+    os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.05, help="задержка ответа заглушки, с")
+    parser.add_argument("--workers", type=int, default=8, help="BOT_WORKERS для main.py")
+    parser.add_argument("--jobs", type=int, default=0, help="JOB_WORKERS для обоих рантаймов")
+    parser.add_argument("--disciplines", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--runtime", choices=RUNTIMES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.runtime:
+        return run_runtime(args)
+
+    print(f"Чатов: {args.chats}, задержка заглушки {args.latency * 1000:.0f} мс, "
+          f"потоков main.py: {args.workers}, процессов разбора: {args.jobs}")
+    for runtime in RUNTIMES:
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--runtime", runtime] + sys.argv[1:],
+                             capture_output=True, text=True, cwd=ROOT)
+        lines = [line for line in out.stdout.splitlines() if line.startswith("{")]
+        if not lines:
+            print(f"{runtime:8} ошибка:\n{out.stderr[-2000:]}")
+            continue
+        r = json.loads(lines[-1])
+        print(f"{runtime:8} завершили {r['finished']:4}/{args.chats}, всё {r['total']:6.2f} с, "
+              f"на чат медиана {r['median']:6.2f} с, p95 {r['p95']:6.2f} с, "
+              f"запросов {r['requests']:5}, потоков до {r['threads']}")
+
+
+if __name__ == "__main__":
+    main()
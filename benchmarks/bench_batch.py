@@ -0,0 +1,115 @@
+"""Пакетная генерация (batch.py): файлов в минуту против разбора и генерации
+пар по очереди в одном процессе (extract_* + generate_files_per_discipline)
+и повторный запуск — прерванный, уже законченный и после правки исходников пары.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_batch.py --pairs 8 --disciplines 100 --workers 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch  # noqa: E402
+from benchmarks.fixtures import make_competencies_docx, make_questions_docx  # noqa: E402
+from generator import generate_files_per_discipline  # noqa: E402
+from ingest import load_document  # noqa: E402
+from parsers import extract_competencies, extract_disciplines, extract_program_info, extract_questions  # noqa: E402
+from workers import ProcessPool  # noqa: E402
+
+
+def make_faculty(root, pairs, disciplines):
+    for n in range(pairs):
+        directory = os.path.join(root, f"plan_{n:03d}")
+        os.makedirs(directory)
+        make_competencies_docx(os.path.join(directory, batch.COMPETENCIES), disciplines=disciplines,
+                               competencies=max(disciplines // 4, 1), seed=n)
+        make_questions_docx(os.path.join(directory, batch.QUESTIONS), per_section=30, seed=n)
+
+
+def sequential(source, output):
+    """Как раньше вручную: пара за парой в одном процессе."""
+    count = 0
+    for name in batch.find_pairs(source):
+        out_dir = os.path.join(output, name)
+        os.makedirs(out_dir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            doc = load_document(os.path.join(source, name, batch.COMPETENCIES))
+            questions, _ = extract_questions(os.path.join(source, name, batch.QUESTIONS))
+            count += len(generate_files_per_discipline(out_dir, extract_disciplines(doc), extract_competencies(doc),
+                                                       questions, extract_program_info(doc)))
+    return count
+
+
+def docx_count(root):
+    return sum(name.endswith(".docx") for _, _, files in os.walk(root) for name in files)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pairs", type=int, default=8)
+    parser.add_argument("--disciplines", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_batch_")
+    source = os.path.join(workdir, "faculty")
+    make_faculty(source, args.pairs, args.disciplines)
+    quiet = io.StringIO()
+
+    t0 = time.perf_counter()
+    count = sequential(source, os.path.join(workdir, "sequential"))
+    elapsed = time.perf_counter() - t0
+    print(f"по очереди, 1 процесс: {count} файлов за {elapsed:.1f} с — {count * 60 / elapsed:.0f} файлов/мин")
+
+    output = os.path.join(workdir, "batch")
+    pool = ProcessPool(args.workers, max_queued_per_user=None)
+    try:
+        with contextlib.redirect_stderr(quiet):
+            t0 = time.perf_counter()
+            progress = batch.run(source, output, pool)
+            elapsed = time.perf_counter() - t0
+        assert progress.written == count == docx_count(output), (progress.line(), count)
+        print(f"batch.py, {args.workers} процесс(ов): {progress.written} файлов за {elapsed:.1f} с "
+              f"— {progress.written * 60 / elapsed:.0f} файлов/мин")
+
+        # прерванный запуск: часть файлов одной пары не успела записаться
+        victim = os.path.join(output, batch.find_pairs(source)[0])
+        state = batch.load_state(victim)
+        batch.save_state(victim, {"digests": state["digests"], "done": False})
+        lost = sorted(name for name in os.listdir(victim) if name.endswith(".docx"))[::2]
+        for name in lost:
+            os.remove(os.path.join(victim, name))
+        with contextlib.redirect_stderr(quiet):
+            progress = batch.run(source, output, pool)
+        assert progress.written == len(lost) and docx_count(output) == count, progress.line()
+        print(f"после прерывания: дописано {progress.written} файлов, остальные {progress.existing} пропущены")
+
+        with contextlib.redirect_stderr(quiet):
+            t0 = time.perf_counter()
+            progress = batch.run(source, output, pool)
+            elapsed = time.perf_counter() - t0
+        assert progress.written == 0 and progress.pairs_done == args.pairs, progress.line()
+        print(f"повторный запуск готового: {elapsed:.2f} с, новых файлов нет")
+
+        # исходники пары изменились: файлы прежней версии удаляются, а не остаются рядом с новыми
+        make_competencies_docx(os.path.join(source, batch.find_pairs(source)[0], batch.COMPETENCIES),
+                               disciplines=max(args.disciplines // 2, 1), competencies=max(args.disciplines // 8, 1),
+                               seed=args.pairs + 1)
+        with contextlib.redirect_stderr(quiet):
+            progress = batch.run(source, output, pool)
+        assert progress.written == max(args.disciplines // 2, 1) == docx_count(victim), progress.line()
+        print(f"изменённая пара: {progress.written} новых файлов, прежних не осталось")
+    finally:
+        pool.shutdown()
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
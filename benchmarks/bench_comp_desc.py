@@ -0,0 +1,64 @@
+"""find_comp_desc: перебор всех компетенций против CompetencyIndex.
+
+Запуск из корня репозитория: python benchmarks/bench_comp_desc.py [компетенций]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import legacy  # noqa: E402
+from parsers import find_comp_desc  # noqa: E402
+from search_index import CompetencyIndex  # noqa: E402
+
+
+def competency_keys(count, rng):
+    """Иерархические ключи УК5 / УК5.3 / УК5.3.1 вперемешку, как в реальных файлах."""
+    keys = []
+    while len(keys) < count:
+        code = f"{rng.choice(('УК', 'ОПК', 'ПК'))}{rng.randint(1, 40)}"
+        for _ in range(rng.randint(0, 2)):
+            code += f".{rng.randint(1, 9)}"
+        keys.append(code)
+    return keys
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(0)
+    competencies = {k: f"{k} — описание" for k in competency_keys(size, rng)}
+    # запросы: существующие, более/менее подробные, чужие префиксы и совсем мимо
+    queries = competency_keys(3000, rng) + ["УК", "ПК0", "Б1", "", "ОПК999.1", "41.7"]
+
+    t0 = time.perf_counter()
+    index = CompetencyIndex(competencies)
+    print(f"Компетенций: {len(competencies)}, построение индекса: {time.perf_counter() - t0:.3f} с")
+
+    t0 = time.perf_counter()
+    actual = [find_comp_desc(q, index) for q in queries]
+    t_index = time.perf_counter() - t0
+
+    # перебор и обычный словарь (просмотр без индекса) — лучшее из 5 прогонов вперемешку
+    t_scan = t_dict = float("inf")
+    for _ in range(5):
+        t0 = time.perf_counter()
+        expected = [legacy.find_comp_desc(q, competencies) for q in queries]
+        t_scan = min(t_scan, time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        by_dict = [find_comp_desc(q, competencies) for q in queries]
+        t_dict = min(t_dict, time.perf_counter() - t0)
+
+    assert actual == expected, "индекс отвечает не так, как перебор"
+    assert by_dict == expected, "запросы по словарю отвечают не так, как перебор"
+    n = len(queries)
+    print(f"перебор: {t_scan / n * 1e6:9.1f} мкс/запрос")
+    print(f"индекс:  {t_index / n * 1e6:9.1f} мкс/запрос  (x{t_scan / t_index:.0f})")
+    print(f"словарь: {t_dict / n * 1e6:9.1f} мкс/запрос  (x{t_scan / t_dict:.1f})")
+    # 10% — запас на шум соседей по машине
+    assert t_dict <= t_scan * 1.1, "просмотр словаря медленнее прежнего перебора"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Сверка extract_competencies с исходной версией и микро-бенчмарк границ описаний.
+
+Запуск из корня репозитория: python benchmarks/bench_competencies.py [дисциплин]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import legacy  # noqa: E402
+from benchmarks.fixtures import make_competencies_docx  # noqa: E402
+from ingest import ParsedDocument, load_document  # noqa: E402
+from parsers import extract_competencies  # noqa: E402
+
+# Фрагменты, которые чаще всего ломают границы: маркеры, коды, пустые строки, знаки препинания
+_NOISE = [
+    "\n", "\n\n", " ", ".", ". ", "?", ")", "(", "№ ", "\n№ ", "\nБ1", "Б3ГИА", "ФГОС", "ПС ", "ПС1",
+    "Код и наименование", "Дисциплины", "Директор", "Связь со стандартами", "УК1", "ОПК 2.1",
+    "ПК-", "УК-3", "📘", "⚠️", "\t", "  ",
+]
+
+# Расхождения, найденные прежде: маркер на конце уже обрезанного запасного описания
+GOLDEN_CASES = [
+    "УК3xxxxxx(№ ДисциплиныКод и наименование",
+    "ПК1! .3.1(ПСКод и наименование",
+    "УК2-.:—;;ПСКод и наименование",
+]
+
+
+def golden_corpus(tmp, files=5, mutations=40):
+    yield from GOLDEN_CASES
+    rng = random.Random(1)
+    for seed in range(files):
+        path = make_competencies_docx(os.path.join(tmp, f"c{seed}.docx"), disciplines=300, competencies=120, seed=seed)
+        text = load_document(path).text
+        yield text
+        for _ in range(mutations):
+            chars = list(text)
+            for _ in range(rng.randint(5, 60)):
+                chars.insert(rng.randrange(len(chars) + 1), rng.choice(_NOISE))
+            yield "".join(chars)
+
+
+def _quiet(fn, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args)
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as tmp:
+        checked = 0
+        for text in golden_corpus(tmp):
+            expected = legacy.extract_competencies(text)
+            actual = _quiet(extract_competencies, ParsedDocument(text))
+            assert actual == expected, "расхождение с исходной версией"
+            checked += 1
+        print(f"Эталон: {checked} текстов совпали")
+
+        path = make_competencies_docx(os.path.join(tmp, "big.docx"), disciplines=size, competencies=size)
+        text = load_document(path).text
+        for name, fn in (("исходная", legacy.extract_competencies),
+                         ("линейная", lambda t: extract_competencies(ParsedDocument(t)))):
+            t0 = time.perf_counter()
+            result = _quiet(fn, text)
+            print(f"{name}: {time.perf_counter() - t0:.3f} с, компетенций: {len(result)}")
+
+
+if __name__ == "__main__":
+    main()
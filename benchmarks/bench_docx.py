@@ -0,0 +1,59 @@
+"""Построение файлов дисциплин: новый Document и шрифт на каждом фрагменте
+(как было) против заготовки со стилями и пакетного добавления вопросов.
+
+Запуск из корня репозитория: python benchmarks/bench_docx.py [файлов]
+"""
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import legacy  # noqa: E402
+from benchmarks.fixtures import make_competencies_docx, make_questions_docx  # noqa: E402
+from generator import build_discipline, plan_discipline, program_names  # noqa: E402
+from parsers import parse_competencies_file, parse_questions_file  # noqa: E402
+from search_index import CompetencyIndex  # noqa: E402
+
+
+def legacy_bytes(plan, direction, profile):
+    buffer = io.BytesIO()
+    legacy.build_discipline(plan, direction, profile).save(buffer)
+    return buffer.getvalue()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    workdir = tempfile.mkdtemp(prefix="bench_docx_")
+    comp = make_competencies_docx(os.path.join(workdir, "competencies.docx"), disciplines=count, competencies=150)
+    quest = make_questions_docx(os.path.join(workdir, "questions.docx"), per_section=50)
+    parsed = parse_competencies_file(comp)
+    questions = parse_questions_file(quest)
+    competencies = CompetencyIndex(parsed["competencies"])
+    direction, profile = program_names(workdir, parsed["program_info"])
+
+    random.seed(0)
+    plans = [plan_discipline(d, competencies, questions) for d in parsed["disciplines"][:count]]
+    print(f"Файлов: {len(plans)}, вопросов в файле: в среднем "
+          f"{sum(len(s or ()) for _, blocks in plans for _, _, s in blocks) / len(plans):.0f}")
+
+    build_discipline(plans[0], direction, profile)  # заготовка создаётся один раз на поток
+    results = {}
+    for name, build in (("как было", legacy_bytes), ("заготовка", build_discipline)):
+        t0 = time.perf_counter()
+        sizes = [len(build(plan, direction, profile)) for plan in plans]
+        elapsed = time.perf_counter() - t0
+        results[name] = elapsed
+        print(f"{name:10} {elapsed:6.2f} с, {elapsed / len(plans) * 1000:6.2f} мс/файл, "
+              f"средний размер {sum(sizes) / len(sizes) / 1024:.1f} КБ")
+    print(f"Ускорение: x{results['как было'] / results['заготовка']:.1f}")
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Загрузка присланного файла: bot.download_file (весь файл в памяти) против
+потоковой загрузки на диск с хэшем по ходу (downloads.download_to).
+
+Запуск из корня репозитория: python benchmarks/bench_download.py [МБ] [параллельных загрузок]
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telebot import apihelper  # noqa: E402
+
+from benchmarks.fake_telegram import FakeTelegram  # noqa: E402
+from downloads import download_to  # noqa: E402
+
+TOKEN = "123456:TEST"
+
+
+def buffered(file_id, dest):
+    downloaded = apihelper.download_file(TOKEN, file_id)
+    with open(dest, "wb") as f:
+        f.write(downloaded)
+    return hashlib.sha256(downloaded).hexdigest()
+
+
+def streamed(file_id, dest):
+    return download_to(TOKEN, file_id, dest)[1]
+
+
+def measure(fn, file_ids, workdir):
+    results = {}
+
+    def run(i, file_id):
+        results[i] = fn(file_id, os.path.join(workdir, f"{fn.__name__}_{i}.docx"))
+
+    threads = [threading.Thread(target=run, args=(i, f)) for i, f in enumerate(file_ids)]
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, results
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    parallel = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    workdir = tempfile.mkdtemp(prefix="bench_download_")
+
+    fake = FakeTelegram().start()
+    fake.install()
+    payload = os.urandom(size_mb << 20)
+    file_ids = []
+    for i in range(parallel):
+        file_id = f"big{i}"
+        fake.files[file_id] = payload
+        file_ids.append(file_id)
+    expected = hashlib.sha256(payload).hexdigest()
+
+    print(f"Файл {size_mb} МБ, параллельных загрузок: {parallel}")
+    for fn in (buffered, streamed):
+        elapsed, peak, results = measure(fn, file_ids, workdir)
+        assert all(h == expected for h in results.values()), "хэш не совпал"
+        print(f"{fn.__name__:9} {elapsed:6.2f} с, пик памяти {peak / 2**20:7.1f} МБ")
+    fake.stop()
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Извлечение вопросов: прежние регулярные выражения с возвратами против
+построчного разбора.
+
+Сначала сверка: на банке вопросов из fixtures и на случайных коротких текстах
+из «неудобных» символов оба варианта обязаны дать одно и то же. Затем
+злонамеренные разделы, на которых прежние шаблоны работают квадратично,
+кубически или экспоненциально: новый разбор должен уложиться в бюджет на
+большом тексте, прежний запускается в отдельном процессе на маленьком тексте
+и прерывается по тайм-ауту.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_extractors.py --size 1000000 --budget 2 --fuzz 20000
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parsers  # noqa: E402
+from benchmarks import legacy  # noqa: E402
+from benchmarks.fixtures import make_questions_docx  # noqa: E402
+from ingest import load_document  # noqa: E402
+
+EXTRACTORS = {
+    "ЕВ": (parsers._find_ev, legacy.find_ev),
+    "ЧВ": (parsers._find_chv, legacy.find_chv),
+    "Одно пропущенное слово": (parsers._find_one_gap, legacy.find_one_gap),
+    "Два пропущенных слова": (parsers._find_two_gap, legacy.find_two_gap),
+    "Вложенные вопросы": (parsers._find_nested, legacy.find_nested),
+}
+
+# Из чего собираются случайные тексты для сверки
+ALPHABETS = {
+    "ЕВ": ["а", "?", " ", "\n", "\n", "\xa0", "б?"],
+    "ЧВ": ["а", "(Введите", ")", "=", " ", "\n", "\n", "\xa0"],
+    "Одно пропущенное слово": ["а", "(Введите", ")", " ", "\n"],
+    "Два пропущенных слова": ["[[1]]", "[[2]]", "1", "2", "=", "1=", "2=", "3=", "[[", " ", "\n", "\n", "\xa0", "а"],
+    "Вложенные вопросы": ["1", "23", "٣", " ", "\n", "\n", "\xa0", "а"],
+}
+
+# Раздел длиной около n символов, на котором прежний шаблон перебирает варианты
+ADVERSARIAL = [
+    ("ЕВ", "длинная строка без «?»", lambda n: "а" * n),
+    ("ЕВ", "строка из «?» без вариантов", lambda n: "?" * n + "\n"),
+    ("ЧВ", "«(Введите» без скобки", lambda n: "(Введите" * (n // 8)),
+    ("Одно пропущенное слово", "«(Введите» без скобки", lambda n: "(Введите" * (n // 8)),
+    ("Два пропущенных слова", "[[1]] без [[2]]", lambda n: "[[1]]" * (n // 5)),
+    ("Два пропущенных слова", "«1 =» без «2 =»", lambda n: "а [[1]] б [[2]]\n1=а" + "\n а" * (n // 3)),
+    ("Вложенные вопросы", "строки из пробелов", lambda n: "а" + "\n \xa0" * (n // 3) + "а"),
+]
+
+
+def check_fixture():
+    workdir = tempfile.mkdtemp(prefix="bench_extractors_")
+    path = make_questions_docx(os.path.join(workdir, "questions.docx"), per_section=300)
+    sections = parsers.split_sections(load_document(path).text)
+    for name, (new, old) in EXTRACTORS.items():
+        found = new(sections[name])
+        assert found == old(sections[name]), f"{name}: результаты на банке вопросов не совпали"
+        assert found, f"{name}: ничего не найдено"
+    os.remove(path)
+    os.rmdir(workdir)
+    print("Банк вопросов из fixtures: совпадает")
+
+
+def check_fuzz(count, seed=0):
+    rng = random.Random(seed)
+    for name, (new, old) in EXTRACTORS.items():
+        alphabet = ALPHABETS[name]
+        for _ in range(count):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            assert new(text) == old(text), f"{name}: расхождение на {text!r}"
+    print(f"Случайные тексты: по {count} на извлекатель, совпадает")
+
+
+def _run_legacy(name, text):
+    EXTRACTORS[name][1](text)
+
+
+def timed_legacy(name, text, timeout):
+    """Время прежнего извлекателя в отдельном процессе или None, если не уложился в timeout."""
+    process = multiprocessing.Process(target=_run_legacy, args=(name, text))
+    t0 = time.perf_counter()
+    process.start()
+    process.join(timeout)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        return None
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000, help="длина злонамеренного раздела для нового разбора")
+    parser.add_argument("--budget", type=float, default=2.0, help="сколько секунд можно потратить на такой раздел")
+    parser.add_argument("--legacy-size", type=int, default=5000)
+    parser.add_argument("--legacy-timeout", type=float, default=10.0)
+    parser.add_argument("--fuzz", type=int, default=20000)
+    args = parser.parse_args()
+
+    check_fixture()
+    check_fuzz(args.fuzz)
+
+    print(f"\nЗлонамеренные разделы: новый разбор на {args.size} символах, "
+          f"прежний на {args.legacy_size} (тайм-аут {args.legacy_timeout:.0f} с)")
+    worst = 0.0
+    for name, case, make in ADVERSARIAL:
+        text = make(args.size)
+        t0 = time.perf_counter()
+        EXTRACTORS[name][0](text)
+        elapsed = time.perf_counter() - t0
+        worst = max(worst, elapsed)
+        old = timed_legacy(name, make(args.legacy_size), args.legacy_timeout)
+        old = f"{old * 1000:8.0f} мс" if old is not None else f"> {args.legacy_timeout:.0f} с   "
+        print(f"{name:24} {case:30} новый {elapsed * 1000:7.1f} мс   прежний {old}")
+        assert elapsed < args.budget, f"{name}, {case}: {elapsed:.2f} с — больше бюджета {args.budget} с"
+    print(f"Худший случай: {worst * 1000:.0f} мс при бюджете {args.budget * 1000:.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
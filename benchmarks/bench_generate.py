@@ -0,0 +1,95 @@
+"""Генерация файлов по найденным дисциплинам: всё подряд, потом отправка —
+против конвейера, где файлы строятся в пуле процессов и отправляются по готовности.
+
+Отправка имитируется паузой (--send-ms), как загрузка файла в Telegram.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_generate.py --disciplines 40 --jobs 4 --send-ms 150
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_competencies_docx, make_questions_docx, temp_workdir  # noqa: E402
+from generator import (generate_files_per_discipline, plan_discipline, program_names, render_discipline,  # noqa: E402
+                       render_discipline_bytes)
+from parsers import parse_competencies_file, parse_questions_file  # noqa: E402
+from search_index import CompetencyIndex  # noqa: E402
+from workers import JobError, ProcessPool  # noqa: E402
+
+
+def send(result, send_ms):
+    if not isinstance(result, tuple):
+        with open(result, "rb") as f:
+            f.read()
+    time.sleep(send_ms / 1000)
+
+
+def sequential(user_dir, found, competencies, questions, program_info, send_ms):
+    t0 = time.perf_counter()
+    first = None
+    for file_path in generate_files_per_discipline(user_dir, found, competencies, questions, program_info):
+        send(file_path, send_ms)
+        first = first or time.perf_counter() - t0
+    return first, time.perf_counter() - t0
+
+
+def pipelined(pool, in_flight, user_dir, found, competencies, questions, program_info, send_ms, in_memory):
+    t0 = time.perf_counter()
+    first = None
+    direction, profile = program_names(user_dir, program_info)
+    plans = (plan_discipline(d, competencies, questions) for d in found)
+    if in_memory:
+        render, tasks = render_discipline_bytes, ((plan, direction, profile) for plan in plans)
+    else:
+        render, tasks = render_discipline, ((user_dir, plan, direction, profile) for plan in plans)
+    for result in pool.imap(1, render, tasks, in_flight=in_flight):
+        send(result, send_ms)
+        first = first or time.perf_counter() - t0
+    return first, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--disciplines", type=int, default=40, help="сколько дисциплин нашёл поиск")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--in-flight", type=int, default=0)
+    parser.add_argument("--send-ms", type=float, default=150)
+    parser.add_argument("--keep", action="store_true", help="не удалять рабочую папку")
+    args = parser.parse_args()
+
+    with temp_workdir("bench_generate_", args.keep) as workdir:
+        comp = make_competencies_docx(os.path.join(workdir, "competencies.docx"), disciplines=400, competencies=100)
+        quest = make_questions_docx(os.path.join(workdir, "questions.docx"), per_section=50)
+        parsed = parse_competencies_file(comp)
+        questions = parse_questions_file(quest)
+        found = parsed["disciplines"][:args.disciplines]
+        competencies = CompetencyIndex(parsed["competencies"])
+        program_info = parsed["program_info"]
+
+        print(f"Дисциплин: {len(found)}, процессов: {args.jobs}, отправка: {args.send_ms:.0f} мс")
+        first, total = sequential(workdir, found, competencies, questions, program_info, args.send_ms)
+        print(f"подряд:            первый файл {first:6.2f} с, все {total:6.2f} с")
+
+        pool = ProcessPool(args.jobs)
+        pool.run(1, len, ())  # запуск процессов не входит в замер
+        try:
+            pool.run(1, len, (lambda: None,))  # аргумент не сериализуется
+        except JobError:
+            pass
+        else:
+            raise AssertionError("задача с несериализуемым аргументом выполнилась")
+        assert pool.run(1, len, (1, 2)) == 2, "пул не пережил несериализуемую задачу"
+        for in_memory in (False, True):
+            first, total = pipelined(pool, args.in_flight or max(args.jobs, 2), workdir, found, competencies,
+                                     questions, program_info, args.send_ms, in_memory)
+            label = "конвейер, память:" if in_memory else "конвейер, диск:  "
+            print(f"{label} первый файл {first:6.2f} с, все {total:6.2f} с")
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Повторный разбор изменённого файла компетенций: сверка с разбором целиком
+на случайных правках и время после правки одного абзаца.
+
+Сверка: цепочка случайных правок (замена, вставка, удаление строк, правка
+символов внутри строки) текста и блоков таблиц; после каждой результат и
+состояние повторного разбора должны совпасть с разбором с нуля, а таблицы —
+ещё и с исходным однопроходным разбором (benchmarks/legacy.py).
+
+Запуск из корня репозитория: python benchmarks/bench_incremental.py [дисциплин] [правок]
+"""
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import legacy  # noqa: E402
+from benchmarks.fixtures import make_competencies_docx  # noqa: E402
+from ingest import DOCUMENT_PART, ParsedDocument, iter_blocks, load_document  # noqa: E402
+from parsers import (  # noqa: E402
+    _revise_tables, _revise_text, _tables_revision, _text_revision,
+    extract_competencies, extract_disciplines, extract_program_info,
+)
+
+# Строки и символы, на которых ломаются границы совпадений
+TRICKY_LINES = [
+    "", " ", "\t", "Б1.О.01 Физика (УК-1", ")", "(ОПК-2)", "УК-1.1", "ОПК 2. Способен", "ПК-3.2.1 Умеет",
+    "Дисциплины", "Код и наименование компетенции", "№ п/п", "Заведующий кафедрой", "Б2 Практика (ПК-1)",
+    "Связь со стандартами", "по направлению 09.03.01 Информатика, профиль - Сети", "УК", "Способен. Умеет.",
+    "Знает ОПК", "1.2 Умеет", "3", ".4",
+]
+# Из них собираются короткие строки, в которых совпадения часто переходят через перевод строки
+TOKENS = ["Б1", "О01", "Физика", "(", ")", "УК", "ПК", "ОПК", "1", ".2", "3", "Способен", "Умеет.", "Дисциплины",
+          "№", " ", "\t", ",", "-"]
+TRICKY_CHARS = list(")(УКОП12.,- \t\rБ№\n") + ["ПК", "УК2 ", "\n\n", "Дисциплины"]
+
+
+def edit_chars(rng, line):
+    if not isinstance(line, str):
+        if not line:
+            return line
+        k = rng.randrange(len(line))
+        return line[:k] + (edit_chars(rng, line[k]),) + line[k + 1:]
+    j = rng.randrange(len(line) + 1)
+    return line[:j] + rng.choice(TRICKY_CHARS) + line[j + rng.choice((0, 0, 1)):]
+
+
+def token_line(rng):
+    return "".join(rng.choice(TOKENS) + rng.choice(("", " ")) for _ in range(rng.randrange(4)))
+
+
+def edit_lines(rng, lines, pool):
+    lines = list(lines)
+    for _ in range(rng.choice((1, 1, 1, 2, 3))):
+        i = rng.randrange(len(lines) + 1)
+        op = rng.randrange(5)
+        if op == 0 and i < len(lines):
+            lines[i] = rng.choice(pool)
+        elif op == 1:
+            lines.insert(i, rng.choice(pool))
+        elif op == 2 and i < len(lines):
+            del lines[i:i + rng.choice((1, 1, 2, 5))]
+        elif op == 3 and i < len(lines):
+            lines[i] = edit_chars(rng, lines[i])
+        elif i < len(lines):
+            lines.insert(i, lines[i])
+    return lines or ["Б1"]
+
+
+def full_text_parse(doc):
+    return {
+        "disciplines": extract_disciplines(doc),
+        "competencies": extract_competencies(doc),
+        "program_info": list(extract_program_info(doc)),
+    }
+
+
+def same(a, b):
+    return a == b and list(a["competencies"]) == list(b["competencies"])
+
+
+def check_text(seed, rounds):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory(prefix="bench_incremental_") as workdir:
+        path = make_competencies_docx(os.path.join(workdir, "c.docx"), disciplines=60, competencies=25, seed=seed)
+        lines = load_document(path).paragraphs()
+    if seed % 2:
+        lines = [token_line(rng) for _ in range(60)]
+    pool = lines + TRICKY_LINES + [token_line(rng) for _ in range(40)]
+    state = None
+    for _ in range(rounds):
+        lines = edit_lines(rng, lines, pool)
+        doc = ParsedDocument("\n".join(lines).strip())
+        lines = doc.paragraphs()
+        parsed, state = _text_revision(doc, state)
+        expected, expected_state = _text_revision(doc)
+        assert same(parsed, full_text_parse(doc)), "повторный разбор текста разошёлся с полным"
+        state = json.loads(json.dumps(state))  # как из кэша
+        assert state == json.loads(json.dumps(expected_state)), "состояние разбора текста разошлось с полным"
+
+
+def random_row(rng, discipline):
+    codes = ["УК-1", "УК-2.1", "ОПК-3", "ПК-1.2", "ПК 4"]
+    kind = rng.randrange(6)
+    if kind == 0:
+        return ("", "", *rng.sample(codes, 3))  # шапка с кодами
+    if kind == 1:
+        name = f"Б1.О.{discipline:02d}" + rng.choice((" Физика", " Химия (УК-1, ОПК-3)", ""))
+        return (str(discipline), name, rng.choice(("Информатика", "УК-1; ПК-1.2", "")), rng.choice(("+", "")),
+                rng.choice(("+", "", "ОПК-3")))
+    if kind == 2:
+        return ("", "", rng.choice(codes), rng.choice(("+", "")), "")  # продолжение объединённой ячейки
+    if kind == 3:
+        return (rng.choice(codes), rng.choice(("Способен решать задачи", "", "УК-2.1 Умеет; УК-2.2 Знает")))
+    if kind == 4:
+        return (rng.choice(codes) + " Способен работать в команде", "описание")
+    return (str(discipline), "Б1", rng.choice(codes), "")
+
+
+def random_block(rng, n):
+    if rng.random() < 0.15:
+        return rng.choice(TRICKY_LINES + ["Таблица 2", "УК-5 Способен воспринимать"])
+    return random_row(rng, n)
+
+
+def check_tables(seed, rounds):
+    rng = random.Random(seed)
+    blocks = [random_block(rng, n) for n in range(80)]
+    state = None
+    for _ in range(rounds):
+        pool = [random_block(rng, n) for n in range(10)]
+        blocks = edit_lines(rng, blocks, pool)
+        parsed, state = _tables_revision(blocks, state)
+        expected, expected_state = _tables_revision(blocks)
+        assert same(parsed, legacy.competency_tables(blocks)), "повторный разбор таблиц разошёлся с исходным"
+        state = json.loads(json.dumps(state))
+        assert same(parsed, expected) and state == json.loads(json.dumps(expected_state)), \
+            "состояние разбора таблиц разошлось с полным"
+
+
+def edit_docx(path, target):
+    """Копия файла, где в одном абзаце середины документа изменено одно слово."""
+    blocks = [b for b in iter_blocks(path) if isinstance(b, str) and b.startswith("Б")]
+    text = blocks[len(blocks) // 2]
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = src.read(item)
+            if item.filename == DOCUMENT_PART:
+                xml = data.decode()
+                assert escape(text) in xml
+                data = xml.replace(escape(text), escape(text.replace(" ", " новой ", 1)), 1).encode()
+            dst.writestr(item, data)
+    return target
+
+
+def timed(fn, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        best, result = None, None
+        for _ in range(3):
+            t0 = time.perf_counter()
+            result = fn(*args)
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    with contextlib.redirect_stdout(io.StringIO()):
+        for seed in range(4):
+            check_text(seed, rounds)
+            check_tables(seed, rounds)
+    print(f"сверка: {4 * rounds} правок текста и {4 * rounds} правок таблиц — как при разборе целиком")
+
+    workdir = tempfile.mkdtemp(prefix="bench_incremental_")
+    path = make_competencies_docx(os.path.join(workdir, "text.docx"), disciplines=size, competencies=size // 5)
+    edited = edit_docx(path, os.path.join(workdir, "text2.docx"))
+    (_, state), full = timed(_revise_text, path)
+    (parsed, _), again = timed(_revise_text, edited, state)
+    _, reading = timed(load_document, edited)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert same(parsed, full_text_parse(load_document(edited)))
+    print(f"текст, {size} дисциплин: целиком {full * 1000:7.1f} мс, после правки абзаца {again * 1000:7.1f} мс "
+          f"(из них чтение файла {reading * 1000:.1f} мс)")
+
+    path = make_competencies_docx(os.path.join(workdir, "tables.docx"), disciplines=size,
+                                  competencies=size // 5, tables=True)
+    (_, state), full = timed(_revise_tables, path)
+    blocks = list(iter_blocks(path))
+    name = blocks[len(blocks) // 2]
+    blocks[len(blocks) // 2] = (name[0], name[1] + " новой", *name[2:])
+    (parsed, _), again = timed(_tables_revision, blocks, state)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert same(parsed, legacy.competency_tables(blocks))
+    print(f"таблицы, {size} дисциплин: целиком {full * 1000:7.1f} мс, после правки строки {again * 1000:7.1f} мс "
+          f"(без чтения файла)")
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Сравнение: три отдельных чтения .docx против одного общего ParsedDocument.
+
+Запуск из корня репозитория: python benchmarks/bench_ingest.py [дисциплин]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_competencies_docx  # noqa: E402
+from parsers import (  # noqa: E402
+    _parse_competencies, extract_competencies, extract_disciplines, extract_program_info,
+)
+
+
+def _best(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_competencies_docx(os.path.join(tmp, "competencies.docx"), disciplines=size, competencies=size // 5)
+        print(f"Файл: {os.path.getsize(path) / 1024:.0f} КБ, дисциплин: {size}")
+
+        def separate():
+            return {
+                "disciplines": extract_disciplines(path),
+                "competencies": extract_competencies(path),
+                "program_info": list(extract_program_info(path)),
+            }
+
+        t_old, old = _best(separate)
+        t_new, new = _best(lambda: _parse_competencies(path))
+        assert old == new, "результаты разбора не совпадают"
+        print(f"3 чтения docx2txt: {t_old:.3f} с")
+        print(f"1 чтение:          {t_new:.3f} с  (x{t_old / t_new:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Цена метрик: вызов функции под metrics.timed при выключенных и включённых
+метриках, и разбор файла компетенций целиком — с метриками и без.
+
+Запуск из корня репозитория: python benchmarks/bench_metrics.py [вызовов]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics  # noqa: E402
+from benchmarks.fixtures import make_competencies_docx  # noqa: E402
+from parsers import _parse_competencies  # noqa: E402
+
+
+def noop():
+    return None
+
+
+def per_call(fn, calls):
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - t0) / calls
+
+
+def decorated(enabled, fn):
+    metrics.ENABLED = enabled
+    return metrics.timed("bench")(fn)
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    base = per_call(noop, calls)
+    off = per_call(decorated(False, noop), calls)
+    on = per_call(decorated(True, noop), calls)
+    print(f"вызов без обёртки:     {base * 1e9:7.0f} нс")
+    print(f"метрики выключены:     {off * 1e9:7.0f} нс")
+    print(f"метрики включены:      {on * 1e9:7.0f} нс (+{(on - base) * 1e9:.0f} нс на замер)")
+
+    path = make_competencies_docx(os.path.join(tempfile.mkdtemp(prefix="bench_metrics_"), "c.docx"),
+                                  disciplines=5000, competencies=500)
+    parse = decorated(True, _parse_competencies)
+    for label, fn in (("разбор без метрик:   ", _parse_competencies), ("разбор под timed:    ", parse)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            best = min(per_call(lambda: fn(path), 1) for _ in range(5))
+        print(f"{label} {best * 1000:7.1f} мс")
+    print(f"записей в гистограммах: {metrics.render().count('_count')}")
+
+
+if __name__ == "__main__":
+    main()
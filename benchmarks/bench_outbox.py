@@ -0,0 +1,126 @@
+"""Отправка ответов: прямые вызовы bot.send_message из обработчиков против
+очереди outbox.Outbox — на заглушке Telegram, которая отвечает 429 при
+превышении частоты (как настоящий Bot API).
+
+Каждый чат получает серию ответов, как после поиска: несколько коротких
+сообщений и длинный текст частями. Обработчики выполняются в пуле потоков,
+как в dispatcher.py. Прямые вызовы теряют всё, что осталось после первого 429
+(исключение обрывает обработчик); очередь доставляет всё по порядку.
+В конце — проверка, что файлов одного чата в очереди не больше предела.
+
+Запуск из корня репозитория: python benchmarks/bench_outbox.py --chats 50
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import telebot  # noqa: E402
+from telebot.apihelper import ApiTelegramException  # noqa: E402
+
+from benchmarks.fake_telegram import FakeTelegram  # noqa: E402
+from outbox import Outbox  # noqa: E402
+
+
+def replies(chat_id, count):
+    """Ответы одному чату: короткие сообщения и части длинного текста."""
+    return [f"{chat_id}:{i}:" + ("x" * 3000 if i % 3 == 2 else "ok") for i in range(count)]
+
+
+def handle(send, chat_id, texts, enqueued):
+    """Обработчик: отправляет ответы по очереди; возвращает, сколько времени занял."""
+    t0 = time.perf_counter()
+    try:
+        for text in texts:
+            enqueued[text] = time.perf_counter()
+            send(chat_id, text)
+    except ApiTelegramException:
+        pass
+    return time.perf_counter() - t0
+
+
+def delivered(fake, chats):
+    """Доставленные ответы по чатам (склеенные очередью сообщения разбиваются обратно)."""
+    result = {chat_id: [] for chat_id in chats}
+    stamps = {}
+    for stamp, chat_id, _, text in fake.sent:
+        for part in text.split("\n\n"):
+            result[chat_id].append(part)
+            stamps[part] = stamp
+    return result, stamps
+
+
+def run(mode, args):
+    fake = FakeTelegram().start().limit(args.limit, args.chat_limit)
+    fake.fail_next = args.inject
+    fake.install()
+    bot = telebot.TeleBot("1:bench", threaded=False)
+    outbox = Outbox(bot, args.senders) if mode == "outbox" else None
+    send = outbox.send_message if outbox else bot.send_message
+    chats = range(1, args.chats + 1)
+    expected = {chat_id: replies(chat_id, args.messages) for chat_id in chats}
+    enqueued = {}
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.workers) as pool:
+        handler_times = list(pool.map(lambda c: handle(send, c, expected[c], enqueued), chats))
+    handlers_done = time.perf_counter() - t0
+    if outbox:
+        outbox.close()
+    total = time.perf_counter() - t0
+    fake.stop()
+
+    got, stamps = delivered(fake, chats)
+    for chat_id in chats:
+        assert got[chat_id] == expected[chat_id][:len(got[chat_id])], f"чат {chat_id}: нарушен порядок"
+    count = sum(len(v) for v in got.values())
+    latencies = sorted(stamps[text] - enqueued[text] for text in stamps)
+    print(f"{mode:7} доставлено {count:5}/{args.chats * args.messages}, запросов {len(fake.sent):5}, "
+          f"429: {fake.rejected + args.inject - fake.fail_next:4}, обработчики {handlers_done:6.2f} с "
+          f"(медиана {statistics.median(handler_times) * 1000:7.1f} мс), всё {total:6.2f} с, "
+          f"задержка доставки p50 {latencies[len(latencies) // 2]:5.2f} с, p95 {latencies[len(latencies) * 95 // 100]:5.2f} с")
+    return count
+
+
+def check_documents(args, limit=2, count=8):
+    """Файлы одному чату: send_document ждёт, пока в очереди чата больше limit файлов."""
+    fake = FakeTelegram().start().limit(args.limit, args.chat_limit)
+    fake.install()
+    outbox = Outbox(telebot.TeleBot("1:bench", threaded=False), args.senders, chat_documents=limit)
+    waiting = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        outbox.send_document(1, io.BytesIO(b"x" * 1000), visible_file_name=f"{i}.docx")
+        waiting.append(time.perf_counter() - t0)
+        assert outbox._chats[1].documents <= limit, "в очереди чата больше файлов, чем позволено"
+    outbox.close()
+    fake.stop()
+    assert len(fake.sent_to(1)) == count, "очередь потеряла файлы"
+    print(f"файлы: {count} в один чат при пределе {limit}, send_document ждал до {max(waiting):.2f} с")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=6, help="ответов каждому чату")
+    parser.add_argument("--workers", type=int, default=8, help="потоков обработчиков")
+    parser.add_argument("--senders", type=int, default=4, help="потоков отправки в Outbox")
+    parser.add_argument("--limit", type=int, default=30, help="предел заглушки: сообщений в секунду всего")
+    parser.add_argument("--chat-limit", type=int, default=3, help="и в один чат")
+    parser.add_argument("--inject", type=int, default=0, help="ответить 429 на столько первых отправок")
+    args = parser.parse_args()
+
+    print(f"Чатов: {args.chats}, ответов каждому: {args.messages}, "
+          f"предел заглушки {args.limit}/с всего и {args.chat_limit}/с на чат")
+    run("direct", args)
+    assert run("outbox", args) == args.chats * args.messages, "очередь потеряла сообщения"
+    check_documents(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Разбиение банка вопросов на разделы: построчная конкатенация (как было)
+против одного прохода по заголовкам со срезами строки.
+
+Запуск из корня репозитория: python benchmarks/bench_questions.py [вопросов]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import patterns  # noqa: E402
+from benchmarks import legacy  # noqa: E402
+from benchmarks.fixtures import make_questions_docx  # noqa: E402
+from ingest import load_document  # noqa: E402
+from parsers import extract_question_sections, split_sections  # noqa: E402
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    per_section = -(-total // len(legacy.QUESTION_SECTIONS))
+    workdir = tempfile.mkdtemp(prefix="bench_questions_")
+    path, elapsed = timed(make_questions_docx, os.path.join(workdir, "questions.docx"), per_section)
+    print(f"Вопросов: {per_section * len(legacy.QUESTION_SECTIONS)}, "
+          f"файл {os.path.getsize(path) / 2**20:.1f} МБ построен за {elapsed:.1f} с")
+
+    document = load_document(path)
+    text = patterns.MULTI_NEWLINES.sub("\n\n", patterns.SPACES.sub(" ", document.text))
+    print(f"Текст: {len(text) / 2**20:.1f} МБ")
+
+    old, old_time = timed(legacy.split_sections, text)
+    new, new_time = timed(split_sections, text)
+    assert old == new, "разделы не совпали"
+    print(f"разделы, как было: {old_time * 1000:8.1f} мс")
+    print(f"разделы, срезы:    {new_time * 1000:8.1f} мс  (x{old_time / new_time:.0f})")
+
+    sections, elapsed = timed(extract_question_sections, document)
+    print(f"весь разбор:       {elapsed * 1000:8.1f} мс, "
+          f"найдено {sum(len(q) for q in sections.values())} вопросов")
+    os.remove(path)
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Чтение большого учебного плана: docx2txt.process (всё дерево XML в памяти)
+против потокового разбора word/document.xml (ingest.read_text, ingest.iter_blocks).
+
+Запуск из корня репозитория: python benchmarks/bench_reader.py [дисциплин]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import docx2txt  # noqa: E402
+
+from benchmarks.fixtures import make_competencies_docx  # noqa: E402
+from ingest import iter_blocks, read_text  # noqa: E402
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def first_blocks(path, count):
+    """Первые count абзацев — сколько стоит остановиться, не дочитав файл."""
+    blocks = []
+    for block in iter_blocks(path):
+        blocks.append(block)
+        if len(blocks) == count:
+            break
+    return blocks
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    workdir = tempfile.mkdtemp(prefix="bench_reader_")
+    path = make_competencies_docx(os.path.join(workdir, "competencies.docx"), disciplines=size,
+                                  competencies=size // 5)
+    with zipfile.ZipFile(path) as archive:
+        xml_size = archive.getinfo("word/document.xml").file_size
+    print(f"Файл: {os.path.getsize(path) / 2**20:.1f} МБ, document.xml {xml_size / 2**20:.1f} МБ, дисциплин: {size}")
+
+    old, old_time, old_peak = measure(docx2txt.process, path)
+    new, new_time, new_peak = measure(read_text, path)
+    assert old == new, "текст не совпал с docx2txt"
+    print(f"docx2txt.process    {old_time:6.2f} с, пик памяти {old_peak / 2**20:7.1f} МБ")
+    print(f"read_text           {new_time:6.2f} с, пик памяти {new_peak / 2**20:7.1f} МБ")
+
+    blocks, elapsed, peak = measure(lambda: sum(1 for _ in iter_blocks(path)))
+    print(f"iter_blocks целиком {elapsed:6.2f} с, пик памяти {peak / 2**20:7.1f} МБ, блоков: {blocks}")
+    blocks, elapsed, peak = measure(first_blocks, path, 10)
+    print(f"первые 10 блоков    {elapsed * 1000:6.1f} мс, пик памяти {peak / 2**20:7.1f} МБ")
+    os.remove(path)
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Поиск дисциплин: линейный перебор с .lower() против DisciplineIndex.
+
+Запуск из корня репозитория: python benchmarks/bench_search.py [дисциплин]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import discipline_names  # noqa: E402
+from search_index import DisciplineIndex  # noqa: E402
+
+QUERIES = ["иностр", "командн", "информ", "баз", "сет", "язык", "ан", "управление данные", "qwerty", "ук"]
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    disciplines = discipline_names(size)
+    rng = random.Random(0)
+    queries = [rng.choice(QUERIES) for _ in range(2000)]
+
+    t0 = time.perf_counter()
+    index = DisciplineIndex(disciplines)
+    print(f"Дисциплин: {size}, построение индекса: {time.perf_counter() - t0:.3f} с")
+
+    t0 = time.perf_counter()
+    expected = [[d for d in disciplines if q in d.lower()] for q in queries]
+    t_scan = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    actual = [index.search(q) for q in queries]
+    t_index = time.perf_counter() - t0
+
+    assert actual == expected, "индекс нашёл не то же, что перебор"
+    n = len(queries)
+    print(f"перебор: {t_scan / n * 1e6:9.1f} мкс/запрос")
+    print(f"индекс:  {t_index / n * 1e6:9.1f} мкс/запрос  (x{t_scan / t_index:.1f})")
+
+
+if __name__ == "__main__":
+    main()
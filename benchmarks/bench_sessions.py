@@ -0,0 +1,91 @@
+"""Хранилища сессий: память под тысячами пользователей и время типичных операций.
+
+Каждый пользователь загружает файл компетенций (дисциплины и описания
+сохраняются в сессию), затем несколько раз ищет дисциплину (читаются мелкие
+поля, результаты разбора — только при промахе кэша индексов).
+
+Запуск из корня репозитория: python benchmarks/bench_sessions.py [пользователей] [дисциплин] [--keep]
+(--keep — не удалять рабочую папку)
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import discipline_names, temp_workdir  # noqa: E402
+from sessions import open_store  # noqa: E402
+
+
+def parsed_for(user_id, disciplines):
+    names = discipline_names(disciplines, seed=user_id)
+    rng = random.Random(user_id)
+    competencies = {f"УК{i}.{j}": "Способен " + " ".join(rng.choice(names).split()[1:4]) * 3
+                    for i in range(1, disciplines // 20 + 1) for j in range(1, 4)}
+    return {"disciplines": names, "competencies": competencies, "program_info": ["09.03.01", "2024"]}
+
+
+def run(store, users, parsed):
+    t0 = time.perf_counter()
+    for user_id in range(users):
+        data = store.get(user_id)
+        data["mode"] = "competencies"
+        data["competencies_digest"] = f"{user_id:064x}"
+        data.update(parsed[user_id % len(parsed)])
+    t_write = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for user_id in range(users):
+        for _ in range(5):
+            data = store.get(user_id)
+            "disciplines" in data and data.get("mode")
+            data["found_disciplines"] = ["x"]
+    t_read = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for user_id in range(0, users, 10):
+        data = store.get(user_id)
+        if "disciplines" in data:
+            data["disciplines"], data["competencies"]
+    t_load = time.perf_counter() - t0
+    return t_write / users, t_read / (users * 5), t_load / len(range(0, users, 10))
+
+
+def main():
+    keep = "--keep" in sys.argv
+    argv = [arg for arg in sys.argv[1:] if arg != "--keep"]
+    users = int(argv[0]) if argv else 5000
+    disciplines = int(argv[1]) if len(argv) > 1 else 400
+    parsed = [parsed_for(i, disciplines) for i in range(20)]
+    with temp_workdir("bench_sessions_", keep) as workdir:
+        print(f"Пользователей: {users}, дисциплин в файле: {disciplines}")
+
+        # как раньше: всё в словаре процесса
+        tracemalloc.start()
+        user_data = {}
+        for user_id in range(users):
+            # у каждого пользователя свои строки, как после разбора его собственного файла
+            user_data[user_id] = {"mode": "competencies", **json.loads(json.dumps(parsed[user_id % len(parsed)]))}
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del user_data
+        print(f"{'dict (как было)':18} память {peak / 2**20:8.1f} МБ")
+
+        for kind, max_users in (("memory", users), ("memory", 1000), ("sqlite", 0), ("shelve", 0)):
+            store = open_store(kind, os.path.join(workdir, f"sessions_{kind}"), max_users=max_users)
+            tracemalloc.start()
+            write, read, load = run(store, users, parsed)
+            if hasattr(store, "close"):
+                store.close()  # shelve дописывает файлы при закрытии — до удаления папки
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            label = f"{kind} ({max_users})" if kind == "memory" else kind
+            print(f"{label:18} память {peak / 2**20:8.1f} МБ, запись разбора {write * 1e3:6.2f} мс, "
+                  f"поле {read * 1e6:7.1f} мкс, чтение разбора {load * 1e3:6.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Файл компетенций: разбор текста (границы по стоп-маркерам) против разбора
+строк таблиц Word. Содержимое одно и то же: в одном файле матрица набрана
+абзацами, в другом — таблицами. Третий файл — матрица в таблице, описания
+абзацами: режим auto должен найти в нём те же описания, что и разбор текста.
+
+Запуск из корня репозитория: python benchmarks/bench_tables.py [дисциплин]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_competencies_docx  # noqa: E402
+from parsers import _parse_competencies, _parse_competency_tables, _revise_auto  # noqa: E402
+
+
+def timed(fn, path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        result = fn(path)
+        return result, time.perf_counter() - t0
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workdir = tempfile.mkdtemp(prefix="bench_tables_")
+    text_path = make_competencies_docx(os.path.join(workdir, "text.docx"), disciplines=size, competencies=size // 5)
+    table_path = make_competencies_docx(os.path.join(workdir, "tables.docx"), disciplines=size,
+                                        competencies=size // 5, tables=True)
+    mixed_path = make_competencies_docx(os.path.join(workdir, "mixed.docx"), disciplines=size,
+                                        competencies=size // 5, tables="matrix")
+
+    by_text, text_time = timed(_parse_competencies, text_path)
+    by_tables, tables_time = timed(_parse_competency_tables, table_path)
+    flattened, _ = timed(_parse_competencies, table_path)
+    assert by_tables["disciplines"] == by_text["disciplines"], "дисциплины не совпали"
+    assert by_tables["competencies"].keys() == by_text["competencies"].keys(), "коды компетенций не совпали"
+    assert by_tables["program_info"] == by_text["program_info"]
+    (mixed, _), _ = timed(_revise_auto, mixed_path)
+    assert mixed["disciplines"] == by_text["disciplines"], "auto: дисциплины не совпали"
+    assert mixed["competencies"] == by_text["competencies"], "auto: описания из абзацев не найдены"
+
+    print(f"Дисциплин: {len(by_tables['disciplines'])}, компетенций: {len(by_tables['competencies'])}")
+    print(f"текст, абзацы:     {text_time:6.2f} с")
+    print(f"таблицы:           {tables_time:6.2f} с  (x{text_time / tables_time:.1f})")
+    print(f"текст по таблицам: найдено дисциплин {len(flattened['disciplines'])}")
+    longer = sum(len(by_tables["competencies"][k]) > len(v) for k, v in by_text["competencies"].items())
+    print(f"описаний целиком из ячейки, а не до первой точки: {longer}")
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Вебхук под нагрузкой: синтетические обновления отправляются POST-запросами
+в WSGI-приложение, ответы бота собирает заглушка Telegram API.
+
+Запуск из корня репозитория (нужен settings.py, как для самого бота):
+    python benchmarks/bench_webhook.py --users 20 --gunicorn 4   # 4 процесса gunicorn
+    python benchmarks/bench_webhook.py --users 20 --gunicorn 0   # wsgiref в этом процессе
+
+Обновления одного пользователя идут по очереди (следующее — после ответа на
+предыдущее), разных пользователей — параллельно.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_telegram import FakeTelegram  # noqa: E402
+from benchmarks.fixtures import make_competencies_docx, make_questions_docx, temp_workdir  # noqa: E402
+from benchmarks.load_test import EXPECTED_ORDER, in_order, scenario  # noqa: E402
+
+GUNICORN_CONF = """\
+from telebot import apihelper
+apihelper.API_URL = {api!r}
+apihelper.FILE_URL = {file!r}
+bind = {bind!r}
+workers = {workers}
+threads = 4
+timeout = 600
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(fake, port, workers):
+    with open("gunicorn_conf.py", "w") as f:
+        f.write(GUNICORN_CONF.format(api=fake.url + "/bot{0}/{1}", file=fake.url + "/file/bot{0}/{1}",
+                                     bind=f"127.0.0.1:{port}", workers=workers))
+    # как в webhook.py: процессы gunicorn делят JOB_WORKERS между собой
+    env = dict(os.environ, PYTHONPATH=ROOT, WEB_CONCURRENCY=str(workers))
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "webhook:app"], env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise SystemExit("gunicorn не запустился")
+
+
+def start_wsgiref(fake, port):
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+    from socketserver import ThreadingMixIn
+
+    class Server(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    fake.install()
+    import webhook  # импорт после install()
+    server = make_server("127.0.0.1", port, webhook.app, server_class=Server, handler_class=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def post_updates(port, path, updates, acks):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    for update in updates:
+        body = json.dumps(update).encode()
+        started = time.perf_counter()
+        conn.request("POST", path, body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        acks.append((time.perf_counter() - started, response.status))
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--gunicorn", type=int, default=4, help="процессов gunicorn; 0 — wsgiref в этом процессе")
+    parser.add_argument("--disciplines", type=int, default=400)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--keep", action="store_true", help="не удалять рабочую папку")
+    args = parser.parse_args()
+
+    with temp_workdir("bench_webhook_", args.keep) as workdir:
+        os.chdir(workdir)
+        os.environ["SESSION_DB"] = os.path.join(workdir, "sessions.sqlite3")
+        path = os.environ.setdefault("WEBHOOK_PATH", "/telegram")
+
+        fake = FakeTelegram().start()
+        port = free_port()
+        server = start_gunicorn(fake, port, args.gunicorn) if args.gunicorn > 0 else start_wsgiref(fake, port)
+
+        files = {}
+        for user_id in range(1, args.users + 1):
+            comp = make_competencies_docx(f"c{user_id}.docx", disciplines=args.disciplines,
+                                          competencies=args.disciplines // 4, seed=user_id)
+            quest = make_questions_docx(f"q{user_id}.docx", per_section=30, seed=user_id)
+            files[user_id] = (open(comp, "rb").read(), open(quest, "rb").read())
+
+        acks = []
+        started = time.perf_counter()
+        posters = [threading.Thread(target=post_updates, args=(port, path, scenario(fake, user_id, *data), acks))
+                   for user_id, data in files.items()]
+        for t in posters:
+            t.start()
+        for t in posters:
+            t.join()
+        posted = time.perf_counter() - started
+
+        finished = {}
+        deadline = started + args.timeout
+        while len(finished) < args.users and time.perf_counter() < deadline:
+            for user_id in files:
+                if user_id not in finished:
+                    done = [t for t, _, _, text in fake.sent_to(user_id)
+                            if isinstance(text, str) and text.startswith(EXPECTED_ORDER[-1])]
+                    if done:
+                        finished[user_id] = done[0] - started
+            time.sleep(0.05)
+
+        if args.gunicorn > 0:
+            server.terminate()
+            server.wait()
+        else:
+            server.shutdown()
+        fake.stop()
+
+        ack_times = sorted(t for t, _ in acks)
+        failed = sum(status != 200 for _, status in acks)
+        ordered = sum(in_order([s[3] for s in fake.sent_to(u)]) for u in finished)
+        print(f"Пользователей: {args.users}, процессов gunicorn: {args.gunicorn}, обновлений: {len(acks)} "
+              f"за {posted:.2f} с, ошибок: {failed}")
+        print(f"Ответ вебхука: медиана {statistics.median(ack_times) * 1000:.1f} мс, "
+              f"p95 {ack_times[int(len(ack_times) * 0.95) - 1] * 1000:.1f} мс, максимум {ack_times[-1] * 1000:.1f} мс")
+        latencies = sorted(finished.values())
+        print(f"Завершили сценарий: {len(finished)}, порядок соблюдён: {ordered}")
+        if latencies:
+            print(f"Сценарий до конца: медиана {statistics.median(latencies):.2f} с, максимум {latencies[-1]:.2f} с")
+    os._exit(0 if len(finished) == args.users and ordered == len(finished) and not failed else 1)
+
+
+if __name__ == "__main__":
+    main()
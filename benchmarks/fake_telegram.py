@@ -0,0 +1,214 @@
+"""Локальная заглушка Telegram Bot API для нагрузочных тестов.
+
+Отдаёт getUpdates из очереди синтетических обновлений, хранит «загруженные»
+файлы и записывает всё, что бот отправил, с отметками времени. Может отвечать
+429, как настоящий Telegram при превышении частоты отправки (limit).
+"""
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from telebot import apihelper
+
+
+class FakeTelegram:
+    def __init__(self, host="127.0.0.1", port=0):
+        self._cond = threading.Condition()
+        self._updates = []
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self.files = {}
+        self.sent = []  # (время, chat_id, метод, текст или имя файла)
+        self.fail_next = 0  # сколько ближайших отправок ответить 429
+        self.retry_after = 1
+        self.requests = 0
+        self.rejected = 0
+        self._global_limit = None
+        self._chat_limit = None
+        self._recent = deque()  # время отправок за последнюю секунду, всего и по чатам
+        self._recent_by_chat = defaultdict(deque)
+        self.latency = 0.0  # задержка каждого ответа, с — как путь до настоящего сервера
+        self.host = host
+        self.port = port
+        self.url = None
+        self.server = None
+        self._thread = None
+
+    # ---------- ЗАПУСК ----------
+    def start(self):
+        self.server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://{self.host}:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def install(self):
+        """Направляет telebot (синхронный) на эту заглушку."""
+        apihelper.API_URL = self.url + "/bot{0}/{1}"
+        apihelper.FILE_URL = self.url + "/file/bot{0}/{1}"
+
+    def limit(self, per_second=30, per_chat=1):
+        """Отвечать 429, если за последнюю секунду отправок больше per_second всего или per_chat в чат."""
+        self._global_limit = per_second
+        self._chat_limit = per_chat
+        return self
+
+    def _over_limit(self, chat_id):
+        now = time.monotonic()
+        recent = self._recent_by_chat[chat_id]
+        for window in (self._recent, recent):
+            while window and window[0] <= now - 1:
+                window.popleft()
+        if len(self._recent) >= self._global_limit or len(recent) >= self._chat_limit:
+            return True
+        self._recent.append(now)
+        recent.append(now)
+        return False
+
+    # ---------- СИНТЕТИЧЕСКИЕ ОБНОВЛЕНИЯ ----------
+    def message(self, user_id, text=None, document=None):
+        """Обновление с текстом или документом (document — (имя, байты))."""
+        msg = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+        }
+        if text is not None:
+            msg["text"] = text
+            if text.startswith("/"):
+                msg["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        if document is not None:
+            name, data = document
+            file_id = f"f{len(self.files)}"
+            self.files[file_id] = data
+            msg["document"] = {"file_id": file_id, "file_unique_id": file_id, "file_name": name,
+                               "file_size": len(data)}
+        return {"update_id": next(self._update_ids), "message": msg}
+
+    def push(self, *updates):
+        with self._cond:
+            self._updates.extend(updates)
+            self._cond.notify_all()
+
+    def _take_updates(self, offset, timeout):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                ready = [u for u in self._updates if u["update_id"] >= offset]
+                self._updates = ready
+                left = deadline - time.monotonic()
+                if ready or left <= 0:
+                    return ready[:100]
+                self._cond.wait(left)
+
+    def sent_to(self, chat_id):
+        return [s for s in self.sent if s[1] == chat_id]
+
+    # ---------- HTTP ----------
+    def _record(self, chat_id, method, payload):
+        with self._cond:
+            self.sent.append((time.perf_counter(), chat_id, method, payload))
+
+    def _reply_message(self, chat_id, **extra):
+        result = {"message_id": next(self._message_ids), "date": int(time.time()),
+                  "chat": {"id": chat_id, "type": "private"}}
+        result.update(extra)
+        return result
+
+    def _too_many(self):
+        return 429, {"ok": False, "error_code": 429,
+                     "description": "Too Many Requests: retry after %d" % self.retry_after,
+                     "parameters": {"retry_after": self.retry_after}}
+
+    def _api(self, method, params):
+        with self._cond:
+            self.requests += 1
+            if self.fail_next and method in ("sendMessage", "sendDocument"):
+                self.fail_next -= 1
+                return self._too_many()
+            if self._global_limit and method in ("sendMessage", "sendDocument") and \
+                    self._over_limit(int(params["chat_id"])):
+                self.rejected += 1
+                return self._too_many()
+        if method == "getMe":
+            return 200, {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "bot", "username": "bot"}}
+        if method == "getUpdates":
+            offset = int(params.get("offset", 0))
+            timeout = min(float(params.get("timeout", 0)), 1.0)
+            return 200, {"ok": True, "result": self._take_updates(offset, timeout)}
+        if method == "getFile":
+            file_id = params["file_id"]
+            return 200, {"ok": True, "result": {"file_id": file_id, "file_unique_id": file_id,
+                                                "file_size": len(self.files[file_id]), "file_path": file_id}}
+        if method in ("sendMessage", "sendDocument"):
+            chat_id = int(params["chat_id"])
+            payload = params.get("text", params.get("document", "document"))
+            self._record(chat_id, method, payload)
+            return 200, {"ok": True, "result": self._reply_message(chat_id, text=params.get("text", ""))}
+        return 200, {"ok": True, "result": True}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type="application/json"):
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _serve(self):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                url = urlsplit(self.path)
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                ctype = self.headers.get("Content-Type", "")
+                if body and ctype.startswith("application/x-www-form-urlencoded"):
+                    params.update({k: v[-1] for k, v in parse_qs(body.decode()).items()})
+                elif body and ctype.startswith("application/json"):
+                    params.update(json.loads(body))
+                elif body and ctype.startswith("multipart/form-data"):
+                    params.setdefault("document", _multipart_filename(body))
+
+                parts = url.path.strip("/").split("/")
+                if parts[0] == "file":
+                    data = fake.files.get(parts[-1])
+                    if data is None:
+                        return self._send(404, {"ok": False})
+                    return self._send(200, data, "application/octet-stream")
+                status, result = fake._api(parts[-1], params)
+                self._send(status, result)
+
+            do_GET = _serve
+            do_POST = _serve
+
+        return Handler
+
+
+def _multipart_filename(body):
+    marker = b'filename="'
+    pos = body.find(marker)
+    if pos == -1:
+        return "document"
+    end = body.find(b'"', pos + len(marker))
+    return body[pos + len(marker):end].decode("utf-8", "replace")
@@ -0,0 +1,90 @@
+"""Та же заглушка Telegram Bot API, что в fake_telegram.py, но на aiohttp.
+
+Один цикл событий в отдельном потоке держит сколько угодно одновременных
+запросов, поэтому сервер сам не ограничивает число параллельных клиентов —
+сравниваются только рантаймы бота. install() направляет на заглушку и
+синхронный telebot, и AsyncTeleBot.
+"""
+import asyncio
+import json
+import threading
+from urllib.parse import parse_qs
+
+from aiohttp import web
+from telebot import asyncio_helper
+
+from benchmarks.fake_telegram import FakeTelegram
+
+
+class AioFakeTelegram(FakeTelegram):
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__(host, port)
+        self._loop = None
+        self._runner = None
+
+    # ---------- ЗАПУСК ----------
+    def start(self):
+        started = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        async def serve():
+            # синхронный telebot передаёт параметры в строке запроса — она бывает длиннее 8 КБ
+            app = web.Application(client_max_size=64 << 20, handler_args={"max_line_size": 1 << 20})
+            app.router.add_route("*", "/file/{token}/{path}", self._file)
+            app.router.add_route("*", "/{token}/{method}", self._method)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, self.host, self.port)
+            await site.start()
+            self.url = f"http://{self.host}:{self._runner.addresses[0][1]}"
+            started.set()
+
+        self._thread = threading.Thread(target=self._run_loop, args=(serve,), daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def _run_loop(self, serve):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(serve())
+        self._loop.run_forever()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def install(self):
+        """Направляет на эту заглушку синхронный telebot и AsyncTeleBot."""
+        super().install()
+        asyncio_helper.API_URL = self.url + "/bot{0}/{1}"
+        asyncio_helper.FILE_URL = self.url + "/file/bot{0}/{1}"
+
+    # ---------- HTTP ----------
+    async def _file(self, request):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        data = self.files.get(request.match_info["path"])
+        if data is None:
+            return web.json_response({"ok": False}, status=404)
+        return web.Response(body=data, content_type="application/octet-stream")
+
+    async def _method(self, request):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        params = dict(request.query)
+        if request.content_type == "application/json":
+            params.update(await request.json())
+        elif request.content_type == "multipart/form-data":
+            for key, value in (await request.post()).items():
+                params[key] = value.filename if isinstance(value, web.FileField) else value
+        elif request.can_read_body:
+            # AsyncTeleBot шлёт форму и в GET-запросах (getFile), а post() читает только POST
+            params.update({k: v[-1] for k, v in parse_qs(await request.text()).items()})
+        method = request.match_info["method"]
+        if method == "getUpdates":
+            # длинный опрос ждёт на условии — не в цикле событий
+            status, result = await asyncio.get_running_loop().run_in_executor(None, self._api, method, params)
+        else:
+            status, result = self._api(method, params)
+        return web.Response(status=status, text=json.dumps(result), content_type="application/json")
@@ -0,0 +1,154 @@
+"""Генератор синтетических .docx и рабочие папки для бенчмарков."""
+import contextlib
+import os
+import random
+import tempfile
+
+from docx import Document
+from docx.oxml import OxmlElement
+
+from docx_template import add_paragraphs
+
+_WORDS = (
+    "анализ информация система проектирование управление данные сеть модель "
+    "разработка методы программирование языки стандарты безопасность команда "
+    "исследование технологии оценка решение задачи вычисления архитектура"
+).split()
+
+_NAMES = (
+    "Иностранный язык", "Командная работа", "Информатика", "Физика", "Математический анализ",
+    "Базы данных", "Операционные системы", "Компьютерные сети", "Философия", "Экономика",
+)
+
+
+@contextlib.contextmanager
+def temp_workdir(prefix, keep=False):
+    """Рабочая папка прогона: удаляется после него, с keep — остаётся, и её путь печатается.
+
+    Если прогон перешёл в папку (os.chdir), на выходе возвращается в прежний каталог.
+    """
+    cwd = os.getcwd()
+    with contextlib.ExitStack() as stack:
+        if keep:
+            path = tempfile.mkdtemp(prefix=prefix)
+            stack.callback(print, f"Рабочая папка: {path}")
+        else:
+            path = stack.enter_context(tempfile.TemporaryDirectory(prefix=prefix, ignore_cleanup_errors=True))
+        stack.callback(os.chdir, cwd)
+        yield path
+
+
+def _sentence(rng, words=12):
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _code(rng):
+    prefix = rng.choice(("УК", "ОПК", "ПК"))
+    return f"{prefix}{rng.randint(1, 12)}.{rng.randint(1, 5)}"
+
+
+def _discipline(rng, i):
+    codes = " ".join(_code(rng) for _ in range(rng.randint(1, 3)))
+    name = f"{rng.choice(_NAMES)} {rng.choice(_WORDS)}"
+    return f"Б{rng.randint(1, 2)}О{i % 100:02d} {name} ({codes})"
+
+
+def discipline_names(count, seed=0):
+    """Строки дисциплин в том виде, в каком их возвращает extract_disciplines."""
+    rng = random.Random(seed)
+    return [_discipline(rng, i) for i in range(count)]
+
+
+def _add_table(doc, rows):
+    """Таблица из строк текстов ячеек (XML собирается напрямую — python-docx на тысячах строк медленный)."""
+    table = doc.add_table(rows=0, cols=len(rows[0]))
+    for cells in rows:
+        tr = OxmlElement("w:tr")
+        for text in cells:
+            tc, p = OxmlElement("w:tc"), OxmlElement("w:p")
+            if text:
+                r = OxmlElement("w:r")
+                r.text = text
+                p.append(r)
+            tc.append(p)
+            tr.append(tc)
+        table._tbl.append(tr)
+
+
+def make_competencies_docx(path, disciplines=1000, competencies=300, seed=0, tables=False):
+    """Файл компетенций: шапка с направлением, матрица дисциплин и описания компетенций.
+
+    tables=True — то же содержимое, но матрица и описания лежат в таблицах Word
+    (№ | дисциплина | коды и код | описание); tables="matrix" — в таблице только
+    матрица, а описания, как в тексте, абзацами после неё.
+    """
+    rng = random.Random(seed)
+    doc = Document()
+    doc.add_paragraph(
+        "Матрица компетенций по направлению 09.03.01 Информатика и вычислительная техника, "
+        "профиль - ЭВМ, комплексы, системы и сети"
+    )
+    doc.add_paragraph("Год набора 2024")
+    if tables:
+        rows = [("№", "Код и наименование дисциплины", "Код и наименование компетенции")]
+        for i in range(disciplines):
+            name, _, codes = _discipline(rng, i)[:-1].rpartition(" (")
+            rows.append((str(i + 1), name, codes))
+        _add_table(doc, rows)
+        doc.add_paragraph("Код и наименование компетенции")
+        if tables == "matrix":
+            for _ in range(competencies):
+                doc.add_paragraph(f"{_code(rng)} {_sentence(rng)} {_sentence(rng, 6)}")
+        else:
+            _add_table(doc, [(_code(rng), f"{_sentence(rng)} {_sentence(rng, 6)}") for _ in range(competencies)])
+    else:
+        doc.add_paragraph("№ Код и наименование дисциплины Код и наименование компетенции")
+        for i in range(disciplines):
+            doc.add_paragraph(_discipline(rng, i))
+        doc.add_paragraph("Код и наименование компетенции")
+        for _ in range(competencies):
+            doc.add_paragraph(f"{_code(rng)} {_sentence(rng)} {_sentence(rng, 6)}")
+    doc.add_paragraph("Заведующий кафедрой")
+    doc.save(path)
+    return path
+
+
+def make_questions_docx(path, per_section=50, seed=0):
+    """Банк вопросов со всеми семью разделами в формате, который понимает extract_questions."""
+    rng = random.Random(seed)
+    doc = Document()
+    lines = []
+    add = lines.append  # абзацы добавляются пачкой в конце — на 50 тысячах вопросов это заметно быстрее
+    add("Фонд оценочных средств")
+    for section in ("ЕВ", "МВ"):
+        add(section)
+        for i in range(per_section):
+            add(f"{_sentence(rng, 8)[:-1]} ({section} {i})?")
+            for j in range(4):
+                add(f"{'+' if j == 0 else '-'} {_sentence(rng, 3)}")
+    add("ЧВ")
+    for i in range(per_section):
+        add(f"{_sentence(rng, 8)[:-1]} №{i} (Введите число)")
+        add(f"= {rng.randint(1, 999)}")
+    add("Соответствие")
+    for i in range(per_section):
+        add(f"Установите соответствие №{i}: {_sentence(rng, 5)}")
+        for j in range(3):
+            add(f"{j + 1}) {rng.choice(_WORDS)} — {chr(ord('А') + j)}) {rng.choice(_WORDS)}")
+    add("Одно пропущенное слово")
+    for i in range(per_section):
+        add(f"{_sentence(rng, 8)[:-1]} №{i} (Введите слово)")
+    add("Два пропущенных слова")
+    for i in range(per_section):
+        add(f"{rng.choice(_WORDS).capitalize()} [[1]] {rng.choice(_WORDS)} [[2]] №{i}.")
+        add(f"1 = {rng.choice(_WORDS)}")
+        add(f"1 = {rng.choice(_WORDS)}")
+        add(f"2 = {rng.choice(_WORDS)}")
+    add("Вложенные вопросы")
+    for i in range(per_section):
+        add(str(i + 1))
+        add(_sentence(rng, 14))
+    add_paragraphs(doc, lines)
+    doc.save(path)
+    return path
@@ -0,0 +1,411 @@
+"""Исходные (до оптимизации) версии парсеров — эталон для сверки результатов в бенчмарках."""
+import re
+
+from docx import Document
+from docx.oxml.ns import qn
+from docx.shared import Pt
+
+import parsers
+import patterns
+from ingest import ParsedDocument
+
+
+def extract_competencies(full_text):
+    # Сохраняем переводы строк, но убираем лишние пробелы/табуляции
+    cleaned = full_text.replace('\r', '')
+    cleaned = re.sub(r"[ \t]+", " ", cleaned).strip()
+
+    # Находим все коды: УК, ОПК, ПК с одной или несколькими точками в номере (напр. 5.3 или 5.3.1 и т.д.)
+    code_re = re.compile(r"((?:УК|ОПК|ПК)\s*\d+(?:\.\d+)*)")
+    matches = list(code_re.finditer(cleaned))
+
+    # Шаблоны, указывающие на границы блоков, которые не являются описанием компетенции
+    stop_patterns = [
+        r"\n\s*Б\d",      # следующая дисциплина начинается с Б1...
+        r"\n\s*№\s",      # табличная нумерация/заголовок
+        r"Код и наименование", r"\bДисциплины\b", r"\bФГОС\b",
+        r"\bПС\b", r"\bБ3ГИА\b", r"\bДиректор\b", r"\bЗаведующий\b",
+        r"\bПреподаватель\b", r"\bСвязь со стандартами\b"
+    ]
+
+    # подстроки для усечения описания
+    stop_subs = [
+        '\nБ', '\n№', '№ ', 'Код и наименование', 'Дисциплины', 'ФГОС', 'ПС ', 'Б3ГИА',
+        'Директор', 'Заведующий', 'Преподаватель', 'Связь со стандартами', 'ПК-', 'УК-', 'ОПК-'
+    ]
+
+    competencies = {}
+    for i, m in enumerate(matches):
+        # Нормализуем найденный код: убираем завершающие точки/запятые/скобки
+        code_text_raw = m.group(1)
+        code_text = re.sub(r"[\.,;:\)\]]+$", "", code_text_raw).strip()
+
+        start = m.end()
+        next_code_start = matches[i + 1].start() if i + 1 < len(matches) else len(cleaned)
+        end = next_code_start
+
+        # Ищем ближайший маркер-стоп среди стоп-шаблонов
+        for pat in stop_patterns:
+            mm = re.search(pat, cleaned[start:next_code_start])
+            if mm:
+                candidate = start + mm.start()
+                if candidate < end:
+                    end = candidate
+
+        # Также остановка на двойном переводе строки (новый блок)
+        mm = re.search(r"\n\s*\n", cleaned[start:next_code_start])
+        if mm:
+            candidate = start + mm.start()
+            if candidate < end:
+                end = candidate
+
+        # Попробуем остановиться на первом конце предложения в пределах разумного (200 символов)
+        snippet = cleaned[start:end]
+        sent = re.search(r"([\.\!?])\s+", snippet)
+        if sent and sent.start() < 200:
+            end = start + sent.end()
+
+        desc_raw = cleaned[start:end].strip()
+
+        # Нормализация: убираем ведущие разделители и вкрапления кодов
+        desc_raw = re.sub(r"^[\s:;\-–—]+", "", desc_raw)
+        desc_raw = re.sub(code_re, "", desc_raw).strip()
+
+        # Усечём по первым стоп-подстрокам, чтобы убрать вкрапления таблиц/заголовков
+        earliest = None
+        for s in stop_subs:
+            idx = desc_raw.find(s)
+            if idx != -1:
+                if earliest is None or idx < earliest:
+                    earliest = idx
+        if earliest is not None:
+            desc_raw = desc_raw[:earliest].strip()
+
+        # Разбиваем по строкам и убираем строки, которые выглядят как заголовки/номера
+        lines = [ln.strip() for ln in desc_raw.splitlines() if ln.strip()]
+        clean_lines = []
+        for ln in lines:
+            if re.match(r"^(?:Б\d|№\s|Код и наименование|Дисциплины|ФГОС|ПС\b|Б3ГИА|Директор|Заведующий|Преподаватель|Связь со стандартами|ПК-|УК-|ОПК-)", ln):
+                break
+            clean_lines.append(ln)
+        desc_raw = ' '.join(clean_lines).strip()
+
+        # Дополнительная усечка по часто встречающимся артефактам (закрывающая скобка + следующий блок, эмодзи и т.п.)
+        artifact_patterns = [r"\)\s*Б\d", r"\)\s*Б", r"\)\s*№", r"📘", r"📗", r"⚠️", r"№\s*Код", r"ФГОС", r"ПС\s*\d", r"Б3ГИА"]
+        earliest_art = None
+        for ap in artifact_patterns:
+            a = re.search(ap, desc_raw)
+            if a:
+                if earliest_art is None or a.start() < earliest_art:
+                    earliest_art = a.start()
+        if earliest_art is not None:
+            desc_raw = desc_raw[:earliest_art].strip()
+
+        # Убираем завершающие служебные символы и одиночные скобки
+        desc_raw = re.sub(r"[\-–—\)\(\[\]:;\.,]+$", "", desc_raw).strip()
+
+        # Фолбек: если описание слишком короткое, возьмём чуть более длинный фрагмент до ближайшего логичного конца
+        if len(re.sub(r"\s+", "", desc_raw)) < 8:
+            extra_end = min(len(cleaned), start + 400)
+            candidate_block = cleaned[start:extra_end]
+            # обрезаем candidate_block по стоп-паттернам
+            for pat in stop_patterns:
+                mm = re.search(pat, candidate_block)
+                if mm:
+                    candidate_block = candidate_block[:mm.start()]
+            candidate_block = re.sub(code_re, "", candidate_block).strip()
+            # также уберём стоп-подстроки
+            earliest2 = None
+            for s in stop_subs:
+                idx = candidate_block.find(s)
+                if idx != -1:
+                    if earliest2 is None or idx < earliest2:
+                        earliest2 = idx
+            if earliest2 is not None:
+                candidate_block = candidate_block[:earliest2].strip()
+            # и усечём артефакты в candidate_block
+            earliest_art2 = None
+            for ap in artifact_patterns:
+                a = re.search(ap, candidate_block)
+                if a:
+                    if earliest_art2 is None or a.start() < earliest_art2:
+                        earliest_art2 = a.start()
+            if earliest_art2 is not None:
+                candidate_block = candidate_block[:earliest_art2].strip()
+            if len(re.sub(r"\s+", "", candidate_block)) >= 8:
+                desc_raw = candidate_block
+
+        # Отбрасываем явно мусорные описания (нет букв)
+        if not re.search(r"[А-Яа-яA-Za-z]", desc_raw):
+            continue
+
+        # Обрезаем лишнюю длину
+        if len(desc_raw) > 400:
+            desc_raw = desc_raw[:400].rsplit('.', 1)[0] + "..."
+
+        # Нормализуем ключ (убираем пробелы между префиксом и цифрами)
+        key = code_text.replace(" ", "")
+
+        competencies[key] = f"{code_text} — {desc_raw}"
+
+    return competencies
+
+
+def find_comp_desc(key, competencies):
+    """Ищет описание компетенции по ключу.
+    Стратегия: точное совпадение -> поиск ключей, начинающихся с key -> поиск по цифровой части -> None
+    """
+    if key in competencies:
+        return competencies[key]
+
+    # Попытка найти более подробные ключи, начинающиеся с данного (например, УК5.3 -> УК5.3.1)
+    candidates = [ (k,v) for k,v in competencies.items() if k.startswith(key) or key.startswith(k) ]
+    if candidates:
+        # выбираем наиболее специфичный (самый длинный ключ)
+        best = max(candidates, key=lambda kv: len(kv[0]))
+        return best[1]
+
+    # Попытка сопоставления по цифровой части: сравниваем только цифры (например, 53 с 531)
+    digits = re.sub(r"\D", "", key)
+    if digits:
+        for k,v in competencies.items():
+            if digits and digits in re.sub(r"\D", "", k):
+                return v
+
+    return None
+
+
+def competency_tables(blocks):
+    """Разбор строк таблиц одним проходом (абзацы и строки — как из ingest.iter_blocks).
+
+    Дисциплина — строка таблицы, ячейка которой начинается с кода «Б...»; её компетенции —
+    коды УК/ОПК/ПК из ячеек правее или отметки в столбцах, в шапке которых стоят коды.
+    Следующие строки, где ячейка дисциплины пуста (объединена), добавляют ей коды.
+    Описание компетенции — текст ячейки после кода или, если его нет, следующая ячейка.
+    """
+    disciplines, competencies, texts = [], {}, []
+    current = None  # [столбец кода дисциплины, название, коды] — дисциплина, которой ещё могут добавиться коды
+    header = {}  # столбец → код компетенции из шапки таблицы
+
+    def finish():
+        if current and current[2]:
+            disciplines.append(f"{current[1]} ({' '.join(current[2])})")
+
+    for block in blocks:
+        if isinstance(block, str):
+            texts.append(block)
+            finish()
+            current, header = None, {}
+            continue
+        texts.append("\n\n".join(block))
+        cells = [" ".join(cell.split()) for cell in block]
+        column = next((j for j, cell in enumerate(cells) if patterns.DISCIPLINE_CODE.match(cell)), None)
+
+        if column is None and current and current[0] < len(cells) and not cells[current[0]]:
+            start = current[0] + 1
+        elif column is not None:
+            finish()
+            name, start = cells[column], column + 1
+            if " " not in name and start < len(cells) and not patterns.COMPETENCY_CODE.match(cells[start]):
+                name, start = f"{name} {cells[start]}", start + 1  # код и название в соседних ячейках
+            current = [column, name, []]
+            head, bracket, tail = name.rpartition("(")
+            if bracket and patterns.COMPETENCY_CODE.search(tail):
+                # коды в скобках прямо в названии, как в текстовом виде матрицы
+                current[1] = head.strip()
+                current[2].extend(patterns.COMPETENCY_CODE.findall(tail))
+        else:
+            finish()
+            current = None
+            codes = {j: cell for j, cell in enumerate(cells) if patterns.COMPETENCY_CODE.fullmatch(cell)}
+            if len(codes) > 1:
+                header = codes
+                continue
+            start = 0
+
+        for j in range(start, len(cells)):
+            if current:
+                codes = patterns.COMPETENCY_CODE.findall(cells[j])
+                if not codes and cells[j] and j in header:
+                    codes = [header[j]]
+                current[2].extend(codes)
+            if patterns.COMPETENCY_CODE.search(cells[j]):
+                parsers._table_descriptions(cells, j, competencies, use_next=current is None)
+    finish()
+
+    return {
+        "disciplines": disciplines,
+        "competencies": competencies,
+        "program_info": list(parsers.extract_program_info(ParsedDocument("\n\n".join(texts)))),
+    }
+
+
+def build_discipline(plan, direction, profile):
+    """Построение файла дисциплины до заготовки: новый Document и шрифт на каждом фрагменте таблицы."""
+    disc, blocks = plan
+    doc = Document()
+    question_counter = 1
+
+    # --- Устанавливаем стиль документа (Times New Roman, 14 pt) ---
+    style = doc.styles['Normal']
+    font = style.font
+    font.name = 'Times New Roman'
+    font.size = Pt(14)
+    style.element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+
+    # --- Название дисциплины ---
+    discipline_match = patterns.DISCIPLINE_NAME.search(disc)
+    discipline_name = discipline_match.group(1).strip() if discipline_match else "Неизвестная дисциплина"
+
+    # --- Коды компетенций (в порядке из названия дисциплины) ---
+    comp_codes = [uk for uk, _, _ in blocks]
+    if comp_codes:
+        base = patterns.COMPETENCY_BASE.match(comp_codes[0])
+        short_comp_code = base.group(1).strip() if base else comp_codes[0]
+    else:
+        short_comp_code = "Компетенция не указана"
+
+    # --- Шапка документа ---
+    doc.add_paragraph(f"Задания для компьютерного тестирования по компетенции {short_comp_code}")
+    doc.add_paragraph(f"по дисциплине {discipline_name}")
+    doc.add_paragraph(f"Направление {direction}")
+    doc.add_paragraph(f"Профиль {profile}")
+    doc.add_paragraph()
+
+    # --- Таблица с индикаторами ---
+    if comp_codes:
+        table = doc.add_table(rows=len(comp_codes) + 1, cols=3)
+        table.style = 'Table Grid'
+
+        # Заголовки
+        hdr_cells = table.rows[0].cells
+        hdr_cells[0].text = "Код компетенции"
+        hdr_cells[1].text = "Код индикатора"
+        hdr_cells[2].text = "Номера вопросов"
+
+        for i, full_code in enumerate(comp_codes, start=1):
+            row = table.rows[i].cells
+            base_code = patterns.COMPETENCY_BASE.match(full_code).group(1)
+            row[0].text = base_code if i == 1 else ""
+            row[1].text = full_code.replace(" ", "")
+            row[2].text = f"{(i - 1) * 15 + 1}–{i * 15}"
+
+        # Применяем шрифт Times New Roman 14 ко всем ячейкам
+        for row in table.rows:
+            for cell in row.cells:
+                for p in cell.paragraphs:
+                    for r in p.runs:
+                        r.font.name = 'Times New Roman'
+                        r._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+                        r.font.size = Pt(14)
+    else:
+        table = doc.add_table(rows=3, cols=3)
+        table.style = 'Table Grid'
+        hdr_cells = table.rows[0].cells
+        hdr_cells[0].text = "Код компетенции"
+        hdr_cells[1].text = "Код индикатора"
+        hdr_cells[2].text = "Номера вопросов"
+        table.rows[1].cells[0].text = short_comp_code
+        table.rows[1].cells[1].text = f"{short_comp_code}.1"
+        table.rows[1].cells[2].text = "1–15"
+        table.rows[2].cells[1].text = f"{short_comp_code}.2"
+        table.rows[2].cells[2].text = "16–30"
+
+    doc.add_paragraph("\n")
+
+    # --- Основная часть: компетенции и вопросы ---
+    for uk, desc, selected in blocks:
+        if desc:
+            p = doc.add_paragraph()
+            run = p.add_run(f"{uk} — {desc}")
+            run.bold = True
+            p.alignment = 1
+
+            doc.add_paragraph()
+
+            for q in selected:
+                doc.add_paragraph(f"{question_counter}. {q}")
+                question_counter += 1
+
+            doc.add_paragraph("\n")
+
+        else:
+            p = doc.add_paragraph()
+            p.add_run(f"⚠️ {uk} — описание не найдено.")
+            p.alignment = 1
+
+    return doc
+
+
+QUESTION_SECTIONS = (
+    "ЕВ", "МВ", "ЧВ", "Соответствие",
+    "Одно пропущенное слово", "Два пропущенных слова", "Вложенные вопросы"
+)
+
+
+def split_sections(text):
+    """Разбиение банка вопросов на разделы построчной конкатенацией (квадратично по размеру раздела)."""
+    categorized, current = {}, None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped in QUESTION_SECTIONS:
+            current = stripped
+            categorized[current] = ""
+        elif current:
+            categorized[current] += line + "\n"
+    return categorized
+
+
+# Извлечение вопросов регулярными выражениями с возвратами (до построчного разбора)
+_QUESTION_WITH_OPTIONS = re.compile(r"([^\n]+?\?)\s*\n((?:[^\n]*\n){2,8})", re.DOTALL)
+_NUMERIC_ANSWER = re.compile(r"([^\n]+?\(Введите[^\n]+?\))\s*\n\s*=\s*([^\n]+)", re.DOTALL)
+_ONE_GAP = re.compile(r"([^\n]+?\(Введите[^\n]+?\))")
+_TWO_GAP_SPLIT = re.compile(r'(?=\n?.*?\[\[1\]\].*?\[\[2\]\])')
+_TWO_GAP_TEMPLATE = re.compile(r'([^\n]*\[\[1\]\].+?\[\[2\]\][^\n]*)')
+_TWO_GAP_OPTIONS = re.compile(
+    r'(1\s*=\s*[^\n]+(?:\n\s*(?!\d=)[^\n]+)*\n\s*2\s*=\s*[^\n]+(?:\n\s*(?!\[\[)[^\n]+)*)',
+    re.DOTALL
+)
+_NESTED_BLOCK = re.compile(r"(?:\s*\d+\s*\n)?(.+?(?=\n\s*\d+\s*\n|$))", re.DOTALL)
+
+
+def _normalize_options(options):
+    opts = [o.strip() for o in options.splitlines() if o.strip()]
+    return "\n".join(opts[:4])
+
+
+def find_ev(text):
+    matches = _QUESTION_WITH_OPTIONS.findall(text)
+    return [(q.strip(), _normalize_options(o)) for q, o in matches]
+
+
+def find_chv(text):
+    return _NUMERIC_ANSWER.findall(text)
+
+
+def find_one_gap(text):
+    return _ONE_GAP.findall(text)
+
+
+def find_two_gap(text):
+    blocks = _TWO_GAP_SPLIT.split(text)
+    results = []
+    for block in blocks:
+        block = block.strip()
+        if not block or '[[1]]' not in block:
+            continue
+        main_part_match = _TWO_GAP_TEMPLATE.search(block)
+        if not main_part_match:
+            continue
+        main_part = main_part_match.group(1).strip()
+        opt_match = _TWO_GAP_OPTIONS.search(block)
+        options = ""
+        if opt_match:
+            options = "\n" + re.sub(r"\n{2,}", '\n', opt_match.group(1)).strip()
+        results.append(f"{main_part}\n{options}".strip())
+    return results
+
+
+def find_nested(text):
+    blocks = _NESTED_BLOCK.findall(text)
+    return [re.sub(r"\n{2,}", '\n', b).strip() for b in blocks if b.strip()]
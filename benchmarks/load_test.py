@@ -0,0 +1,109 @@
+"""Нагрузочный тест: N пользователей одновременно проходят весь сценарий бота
+против локальной заглушки Telegram API.
+
+Запуск из корня репозитория (нужен settings.py, как для самого бота):
+    python benchmarks/load_test.py --users 20 --workers 8
+    python benchmarks/load_test.py --users 20 --workers 0   # встроенный пул telebot
+    python benchmarks/load_test.py --users 20 --jobs 0      # без пула процессов
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_telegram import FakeTelegram  # noqa: E402
+from benchmarks.fixtures import make_competencies_docx, make_questions_docx, temp_workdir  # noqa: E402
+
+# Ключевые ответы, которые каждый пользователь должен получить именно в этом порядке
+EXPECTED_ORDER = ["👋", "📤", "✅ Файл 'competencies.docx'", "📤", "✅ Файл 'questions.docx'",
+                  "📚 Найдено совпадений", "⏳ Генерирую", "✅ Файлы успешно"]
+
+
+def scenario(fake, user_id, comp, quest):
+    return [
+        fake.message(user_id, "/start"),
+        fake.message(user_id, "📘 Загрузить компетенции"),
+        fake.message(user_id, document=("competencies.docx", comp)),
+        fake.message(user_id, "🧩 Загрузить вопросы"),
+        fake.message(user_id, document=("questions.docx", quest)),
+        fake.message(user_id, "информ"),
+        fake.message(user_id, "🧠 Сгенерировать файлы"),
+    ]
+
+
+def in_order(texts):
+    pos = 0
+    # очередь отправки склеивает подряд идущие короткие ответы через пустую строку
+    parts = (part for text in texts if isinstance(text, str) for part in text.split("\n\n"))
+    for part in parts:
+        if pos < len(EXPECTED_ORDER) and part.startswith(EXPECTED_ORDER[pos]):
+            pos += 1
+    return pos == len(EXPECTED_ORDER)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--disciplines", type=int, default=400)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--keep", action="store_true", help="не удалять рабочую папку")
+    args = parser.parse_args()
+
+    os.environ["BOT_WORKERS"] = str(args.workers)
+    os.environ["JOB_WORKERS"] = str(args.jobs)
+    with temp_workdir("load_test_", args.keep) as workdir:
+        os.chdir(workdir)
+
+        fake = FakeTelegram().start()
+        fake.install()
+        import main as bot_main  # импорт после install() и настроек из окружения
+
+        # у каждого пользователя свой файл — кэш разбора не помогает
+        files = {}
+        for user_id in range(1, args.users + 1):
+            comp = make_competencies_docx(f"c{user_id}.docx", disciplines=args.disciplines,
+                                          competencies=args.disciplines // 4, seed=user_id)
+            quest = make_questions_docx(f"q{user_id}.docx", per_section=30, seed=user_id)
+            files[user_id] = (open(comp, "rb").read(), open(quest, "rb").read())
+
+        poller = threading.Thread(target=bot_main.bot.polling,
+                                  kwargs={"none_stop": True, "interval": 0, "timeout": 1}, daemon=True)
+        poller.start()
+
+        started = time.perf_counter()
+        for user_id, (comp, quest) in files.items():
+            fake.push(*scenario(fake, user_id, comp, quest))
+
+        finished = {}
+        deadline = started + args.timeout
+        while len(finished) < args.users and time.perf_counter() < deadline:
+            for user_id in files:
+                if user_id not in finished:
+                    done = [t for t, _, _, text in fake.sent_to(user_id)
+                            if isinstance(text, str) and EXPECTED_ORDER[-1] in text]
+                    if done:
+                        finished[user_id] = done[0] - started
+            time.sleep(0.05)
+        bot_main.bot.stop_polling()
+        fake.stop()
+
+        ordered = sum(in_order([s[3] for s in fake.sent_to(u)]) for u in finished)
+        latencies = sorted(finished.values())
+        print(f"Пользователей: {args.users}, потоков: {args.workers}, процессов: {args.jobs}, "
+              f"завершили: {len(finished)}, порядок соблюдён: {ordered}")
+        if latencies:
+            p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+            print(f"Сценарий до конца: медиана {statistics.median(latencies):.2f} с, p95 {p95:.2f} с, "
+                  f"максимум {latencies[-1]:.2f} с")
+    os._exit(0 if len(finished) == args.users and ordered == len(finished) else 1)
+
+
+if __name__ == "__main__":
+    main()
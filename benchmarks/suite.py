@@ -0,0 +1,213 @@
+"""Набор бенчмарков горячих путей на синтетических файлах разного размера.
+
+Для каждого размера генерируются файл компетенций (N дисциплин Б1…
+с кодами УК/ОПК/ПК, N/4 описаний компетенций) и банк вопросов (N вопросов
+во всех семи разделах). Файлы с одинаковыми размером и seed одинаковы
+и переиспользуются из --fixtures. Этапы:
+- load_competencies, load_questions — чтение .docx (ingest.load_document);
+- extract_disciplines, extract_competencies, extract_questions — по уже считанному тексту;
+- find_comp_desc — описания всех кодов из найденных дисциплин по индексу компетенций;
+- send_long_message — ответ с компетенциями всех дисциплин, разбитый на части
+  (replies.competencies_reply + split_long_message, без сети);
+- generate_files_per_discipline — на первых --generate дисциплинах.
+
+Время — медиана из --repeat прогонов; пиковая память (tracemalloc) —
+в отдельном прогоне, чтобы трассировка не искажала время. Результаты
+пишутся в JSON (--output); --compare сравнивает лучшее время с прошлым
+файлом (минимум меньше медианы зависит от соседей по машине) и завершается
+с кодом 1, если этап стал медленнее, чем в --threshold раз.
+
+Запуск из корня репозитория:
+    python benchmarks/suite.py --sizes 100,1000,10000,50000 --output bench.json
+    python benchmarks/suite.py --sizes 100,1000 --compare bench.json
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import patterns  # noqa: E402
+from benchmarks.fixtures import make_competencies_docx, make_questions_docx  # noqa: E402
+from generator import generate_files_per_discipline  # noqa: E402
+from ingest import load_document  # noqa: E402
+from parsers import (extract_competencies, extract_disciplines, extract_program_info,  # noqa: E402
+                     extract_question_sections, extract_questions, find_comp_desc)
+from question_bank import QUESTION_SECTIONS, QuestionBank  # noqa: E402
+from replies import competencies_reply, split_long_message  # noqa: E402
+from search_index import CompetencyIndex  # noqa: E402
+
+STAGES = (
+    "load_competencies", "load_questions", "extract_disciplines", "extract_competencies",
+    "extract_questions", "find_comp_desc", "send_long_message", "generate_files_per_discipline",
+)
+FORMAT = 1  # версия формата файла результатов
+
+
+# ---------- ФАЙЛЫ ----------
+def fixtures(directory, size, seed):
+    """Пути к файлам компетенций и вопросов размера size; создаются, если их ещё нет."""
+    os.makedirs(directory, exist_ok=True)
+    comp = os.path.join(directory, f"competencies_{size}_{seed}.docx")
+    quest = os.path.join(directory, f"questions_{size}_{seed}.docx")
+    if not os.path.exists(comp):
+        make_competencies_docx(comp + ".tmp", disciplines=size, competencies=max(size // 4, 1), seed=seed)
+        os.replace(comp + ".tmp", comp)
+    if not os.path.exists(quest):
+        make_questions_docx(quest + ".tmp", per_section=max(size // len(QUESTION_SECTIONS), 1), seed=seed)
+        os.replace(quest + ".tmp", quest)
+    return comp, quest
+
+
+# ---------- ЭТАПЫ ----------
+class Context:
+    """Входные данные этапов: всё, что этап не измеряет, готовится заранее."""
+
+    def __init__(self, comp, quest, generate, workdir):
+        self.comp_path, self.quest_path = comp, quest
+        self.comp = load_document(comp)
+        self.quest = load_document(quest)
+        self.disciplines = extract_disciplines(self.comp)
+        self.competencies = extract_competencies(self.comp)
+        self.index = CompetencyIndex(self.competencies)
+        self.codes = [c.replace(" ", "") for d in self.disciplines for c in patterns.COMPETENCY_CODE.findall(d)]
+        self.bank = QuestionBank(extract_question_sections(self.quest))
+        self.program_info = list(extract_program_info(self.comp))
+        self.generate = self.disciplines[:generate]
+        self.workdir = workdir
+
+
+def _generate(ctx):
+    out = tempfile.mkdtemp(dir=ctx.workdir)
+    return generate_files_per_discipline(out, ctx.generate, ctx.index, ctx.bank, ctx.program_info)
+
+
+# этап → (функция от Context, сколько элементов она обработала)
+STAGE_FUNCS = {
+    "load_competencies": (lambda ctx: load_document(ctx.comp_path), lambda ctx: len(ctx.comp.paragraph_offsets)),
+    "load_questions": (lambda ctx: load_document(ctx.quest_path), lambda ctx: len(ctx.quest.paragraph_offsets)),
+    "extract_disciplines": (lambda ctx: extract_disciplines(ctx.comp), lambda ctx: len(ctx.disciplines)),
+    "extract_competencies": (lambda ctx: extract_competencies(ctx.comp), lambda ctx: len(ctx.competencies)),
+    "extract_questions": (lambda ctx: extract_questions(ctx.quest), lambda ctx: len(ctx.bank)),
+    "find_comp_desc": (lambda ctx: [find_comp_desc(c, ctx.index) for c in ctx.codes], lambda ctx: len(ctx.codes)),
+    "send_long_message": (lambda ctx: split_long_message(competencies_reply(ctx.disciplines, ctx.index)),
+                          lambda ctx: len(ctx.disciplines)),
+    "generate_files_per_discipline": (_generate, lambda ctx: len(ctx.generate)),
+}
+
+
+def measure(fn, ctx, repeat):
+    """(медиана, минимум времени в секундах, пик памяти в байтах)."""
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):  # парсеры печатают ход разбора
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn(ctx)
+            times.append(time.perf_counter() - t0)
+        tracemalloc.start()
+        try:
+            fn(ctx)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return statistics.median(times), min(times), peak
+
+
+# ---------- РЕЗУЛЬТАТЫ ----------
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def metadata(args):
+    return {
+        "format": FORMAT,
+        "revision": _git_revision(),
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "generate": args.generate,
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """Печатает отношение лучших времён к прошлому файлу; возвращает список замедлившихся этапов."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    before = {(r["stage"], r["size"]): r for r in baseline["results"]}
+    print(f"\nСравнение с {baseline_path} (ревизия {baseline['meta'].get('revision')}):")
+    slower = []
+    for r in results:
+        old = before.get((r["stage"], r["size"]))
+        if old is None:
+            continue
+        ratio = r["min_s"] / old["min_s"] if old["min_s"] else float("inf")
+        mark = ""
+        if ratio > threshold:
+            mark = "  ← медленнее"
+            slower.append(r)
+        print(f"{r['stage']:30} {r['size']:6}  {old['min_s']:9.4f} → {r['min_s']:9.4f} с  x{ratio:5.2f}{mark}")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,1000,10000", help="размеры через запятую (от 100 до 50000)")
+    parser.add_argument("--stages", default=",".join(STAGES), help="этапы через запятую")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--generate", type=int, default=50, help="сколько дисциплин генерировать")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", default=os.path.join(tempfile.gettempdir(), "kubgtu_bench_fixtures"))
+    parser.add_argument("--output", help="файл JSON с результатами")
+    parser.add_argument("--compare", help="прошлый файл JSON для сравнения")
+    parser.add_argument("--threshold", type=float, default=1.5, help="допустимое замедление, раз")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+    stages = args.stages.split(",")
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"неизвестные этапы: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix="bench_suite_")
+    results = []
+    for size in sizes:
+        t0 = time.perf_counter()
+        comp, quest = fixtures(args.fixtures, size, args.seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ctx = Context(comp, quest, args.generate, workdir)
+        print(f"Размер {size}: {len(ctx.disciplines)} дисциплин, {len(ctx.competencies)} компетенций, "
+              f"{len(ctx.bank)} вопросов (подготовка {time.perf_counter() - t0:.1f} с)")
+        for stage in stages:
+            fn, items = STAGE_FUNCS[stage]
+            median, best, peak = measure(fn, ctx, args.repeat)
+            results.append({"stage": stage, "size": size, "items": items(ctx), "median_s": median,
+                            "min_s": best, "peak_bytes": peak})
+            print(f"  {stage:30} {median:9.4f} с (мин. {best:.4f}), пик памяти {peak / 2 ** 20:8.1f} МБ")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": metadata(args), "results": results}, f, ensure_ascii=False, indent=1)
+        print(f"Результаты: {args.output}")
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Настройки производительности из переменных окружения (токен бота — в settings.py)."""
+import os
+
+
+def _int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+# Потоков для обработки обновлений; 0 — встроенный пул telebot без порядка по пользователям
+BOT_WORKERS = _int("BOT_WORKERS", 8)
+
+# Процессов веб-сервера в режиме вебхука (gunicorn берёт число рабочих процессов из этой же
+# переменной); у каждого свой пул процессов задач
+WEB_CONCURRENCY = max(_int("WEB_CONCURRENCY", 1), 1)
+# Процессов для разбора и генерации на всю машину — делятся поровну между процессами
+# веб-сервера; 0 — выполнять прямо в потоке обработчика
+JOB_WORKERS = _int("JOB_WORKERS", os.cpu_count() or 2)
+if JOB_WORKERS > 0:
+    JOB_WORKERS = max(JOB_WORKERS // WEB_CONCURRENCY, 1)
+# Предел времени на одну задачу, с
+JOB_TIMEOUT = _int("JOB_TIMEOUT", 600)
+# Сколько задач одного пользователя может стоять в очереди и выполняться одновременно
+JOB_QUEUE_PER_USER = _int("JOB_QUEUE_PER_USER", 2)
+# Как разбирать файл компетенций: text — по тексту документа, как всегда разбирал бот;
+# tables — по строкам таблиц Word, auto — по таблицам, а если дисциплин в них нет — по тексту,
+# описания, которых нет в таблицах, — тоже из текста. Описания из ячеек целиком отличаются
+# от текстовых, поэтому tables и auto включаются явно
+COMPETENCY_PARSER = os.environ.get("COMPETENCY_PARSER", "text")
+# Квоты по разделам для каждых 15 вопросов: «ЕВ:4,МВ:4,...», selection — таблица из database.py;
+# пусто — равномерно из всего банка
+QUESTION_QUOTAS = os.environ.get("QUESTION_QUOTAS", "")
+# Куда строить файлы дисциплин: memory — в память и сразу в Telegram, disk — в папку пользователя
+GEN_OUTPUT = os.environ.get("GEN_OUTPUT", "memory")
+# С какого числа файлов отправлять их одним ZIP-архивом; 0 — всегда по одному
+GEN_ZIP_FROM = _int("GEN_ZIP_FROM", 0)
+# Сколько файлов дисциплин одного запроса генерируется одновременно (остальные ждут отправки готовых)
+GEN_IN_FLIGHT = _int("GEN_IN_FLIGHT", max(JOB_WORKERS, 2))
+
+# Потоков отправки сообщений; 0 — отправлять прямо из обработчика, без очереди
+OUTBOX_SENDERS = _int("OUTBOX_SENDERS", 4)
+# Ограничения Telegram (около 30 сообщений в секунду на всех, 1 в секунду на чат с короткими
+# всплесками): сообщений в секунду на всех, в секунду на чат и подряд в один чат
+OUTBOX_GLOBAL_RATE = _int("OUTBOX_GLOBAL_RATE", 25)
+OUTBOX_CHAT_RATE = _int("OUTBOX_CHAT_RATE", 1)
+OUTBOX_CHAT_BURST = _int("OUTBOX_CHAT_BURST", 3)
+# Сколько раз повторять сообщение после ответа 429
+OUTBOX_RETRIES = _int("OUTBOX_RETRIES", 5)
+# Сколько файлов и МБ может ждать отправки в одном чате; дальше генерация ждёт, пока они уйдут
+OUTBOX_CHAT_DOCUMENTS = _int("OUTBOX_CHAT_DOCUMENTS", 4)
+OUTBOX_CHAT_MB = _int("OUTBOX_CHAT_MB", 50)
+
+# Предел размера загружаемого .docx, МБ (Bot API отдаёт ботам файлы до 20 МБ)
+MAX_UPLOAD_MB = _int("MAX_UPLOAD_MB", 20)
+# Предел размера кэша разбора (.parse_cache), МБ: сверх него удаляются давно не читанные записи;
+# 0 — без предела
+PARSE_CACHE_MAX_MB = _int("PARSE_CACHE_MAX_MB", 500)
+
+# Хранилище состояния пользователей: sqlite (общее для процессов gunicorn), shelve или memory
+SESSION_STORE = os.environ.get("SESSION_STORE", "sqlite")
+# Файл хранилища для sqlite и shelve
+SESSION_DB = os.environ.get("SESSION_DB", "sessions.sqlite3")
+# Для memory: сколько пользователей держать и через сколько секунд без обращений забывать
+SESSION_MAX_USERS = _int("SESSION_MAX_USERS", 10000)
+SESSION_TTL = _int("SESSION_TTL", 86400)
+
+# Метрики в формате Prometheus: порт для /metrics (0 — метрики выключены) и адрес;
+# под gunicorn процессы занимают порты METRICS_PORT … METRICS_PORT + WEB_CONCURRENCY - 1
+METRICS_PORT = _int("METRICS_PORT", 0)
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+
+# Вебхук: публичный адрес сервера, путь и секрет из заголовка X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.environ.get("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET", "")
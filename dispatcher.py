@@ -0,0 +1,92 @@
+"""Параллельная обработка обновлений Telegram с сохранением порядка для каждого пользователя."""
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import telebot
+
+logger = logging.getLogger(__name__)
+
+
+class KeyedExecutor:
+    """Пул потоков, в котором задачи с одинаковым ключом выполняются строго по очереди.
+
+    Задачи разных ключей идут параллельно; следующая задача ключа отправляется
+    в пул только после завершения предыдущей, поэтому один пользователь
+    не занимает поток, пока ждёт своей очереди.
+    """
+
+    def __init__(self, max_workers, thread_name_prefix="updates"):
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self._queues = {}
+
+    def submit(self, key, fn, *args):
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is not None:
+                queue.append((fn, args))
+                return
+            self._queues[key] = deque()
+        self._pool.submit(self._run, key, fn, args)
+
+    def _run(self, key, fn, args):
+        try:
+            fn(*args)
+        except Exception:
+            logger.exception("Ошибка при обработке задачи для %r", key)
+        with self._lock:
+            queue = self._queues[key]
+            if not queue:
+                del self._queues[key]
+                return
+            fn, args = queue.popleft()
+        self._pool.submit(self._run, key, fn, args)
+
+    def pending(self):
+        """Сколько задач ждёт своей очереди (без выполняющихся)."""
+        with self._lock:
+            return sum(len(q) for q in self._queues.values())
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+def update_key(update):
+    """Ключ очереди: пользователь, от которого пришло обновление (или сам update_id)."""
+    for field in ("message", "edited_message", "callback_query", "inline_query"):
+        event = getattr(update, field, None)
+        if event is not None and getattr(event, "from_user", None) is not None:
+            return event.from_user.id
+    return update.update_id
+
+
+class OrderedTeleBot(telebot.TeleBot):
+    """TeleBot, который раздаёт обновления пулу потоков, сохраняя порядок внутри пользователя.
+
+    Поток опроса (или вебхука) только разбирает ответ Telegram и ставит задачи
+    в очередь — парсинг и генерация файлов идут в рабочих потоках.
+    """
+
+    def __init__(self, token, workers=8, user_lock=None, **kwargs):
+        kwargs["threaded"] = False
+        super().__init__(token, **kwargs)
+        self.executor = KeyedExecutor(workers)
+        # блокировка пользователя между процессами (несколько процессов gunicorn)
+        self.user_lock = user_lock
+
+    def process_new_updates(self, updates):
+        # offset для следующего getUpdates должен сдвинуться сразу, а не после обработки
+        for update in updates:
+            if update.update_id > self.last_update_id:
+                self.last_update_id = update.update_id
+        for update in updates:
+            key = update_key(update)
+            self.executor.submit(key, self._process, key, update)
+
+    def _process(self, key, update):
+        if self.user_lock is None:
+            return super().process_new_updates([update])
+        with self.user_lock(key):
+            super().process_new_updates([update])
@@ -0,0 +1,67 @@
+"""Заготовка .docx, из которой быстро получаются однотипные документы.
+
+Стили задаются один раз при создании заготовки. Для каждого нового файла
+очищается только тело документа, а при сохранении заново сериализуется один
+word/document.xml: остальные части пакета (стили, нумерация, свойства)
+уже лежат в готовом ZIP и копируются как есть.
+"""
+import io
+import zipfile
+
+from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+DOCUMENT_PART = "word/document.xml"
+
+
+class DocumentTemplate:
+    """Один переиспользуемый документ python-docx; не для одновременной работы из нескольких потоков."""
+
+    def __init__(self, setup=None):
+        self.document = Document()
+        if setup is not None:
+            setup(self.document)
+        self._body = self.document.element.body
+
+        buffer = io.BytesIO()
+        self.document.save(buffer)
+        base = io.BytesIO()
+        with zipfile.ZipFile(buffer) as src, zipfile.ZipFile(base, "w", zipfile.ZIP_DEFLATED) as dst:
+            for info in src.infolist():
+                if info.filename != DOCUMENT_PART:
+                    dst.writestr(info, src.read(info))
+        self._base = base.getvalue()
+
+    def new(self):
+        """Пустой документ со стилями заготовки (тот же объект, что и в прошлый раз)."""
+        for child in list(self._body):
+            if child.tag != qn("w:sectPr"):
+                self._body.remove(child)
+        return self.document
+
+    def to_bytes(self):
+        """Содержимое .docx для текущего состояния документа."""
+        buffer = io.BytesIO(self._base)
+        with zipfile.ZipFile(buffer, "a", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(DOCUMENT_PART, self.document.part.blob)
+        return buffer.getvalue()
+
+
+def add_paragraphs(document, texts):
+    """Добавляет абзацы с обычным текстом в конец документа — как add_paragraph, но пачкой.
+
+    Пустая строка даёт пустой абзац; \\n и \\t становятся переносом строки и табуляцией.
+    """
+    body = document.element.body
+    sect_pr = body.sectPr
+    for text in texts:
+        p = OxmlElement("w:p")
+        if text:
+            r = OxmlElement("w:r")
+            r.text = text
+            p.append(r)
+        if sect_pr is not None:
+            sect_pr.addprevious(p)
+        else:
+            body.append(p)
@@ -0,0 +1,147 @@
+"""Потоковая загрузка файлов пользователя с серверов Telegram прямо на диск.
+
+Файл пишется частями во временный файл в папке назначения и переименовывается
+на место одной операцией, поэтому недокачанный файл никогда не попадает под
+разбор. Хэш считается по ходу загрузки — ключ для кэша разбора готов без
+повторного чтения файла. download_to_async — то же для asyncio (aiohttp).
+"""
+import asyncio
+import contextlib
+import hashlib
+import io
+import os
+import tempfile
+
+import requests
+from telebot import apihelper
+
+CHUNK_SIZE = 1 << 16
+# Сколько байт download_to_async накапливает перед записью на диск в потоке
+WRITE_BATCH = 1 << 20
+
+
+class FileTooLarge(Exception):
+    """Файл больше допустимого размера."""
+
+
+def file_url(token, file_path, template=None):
+    template = template or apihelper.FILE_URL
+    if template is None:
+        return f"https://api.telegram.org/file/bot{token}/{file_path}"
+    return template.format(token, file_path)
+
+
+def _open_part(dest):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest) or ".", prefix=".", suffix=".part")
+    return os.fdopen(fd, "wb"), tmp_path
+
+
+def _close_part(f, tmp_path, dest, ok):
+    """Закрывает временный файл и переименовывает его в dest, если ok, иначе удаляет."""
+    try:
+        f.close()
+        if ok:
+            os.replace(tmp_path, dest)
+            return
+    except BaseException:
+        _remove_part(tmp_path)
+        raise
+    _remove_part(tmp_path)
+
+
+def _remove_part(tmp_path):
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(tmp_path)
+
+
+@contextlib.contextmanager
+def _part_file(dest):
+    """Временный файл рядом с dest; переименовывается в dest, только если блок завершился без ошибок."""
+    f, tmp_path = _open_part(dest)
+    try:
+        yield f
+    except BaseException:
+        _close_part(f, tmp_path, dest, False)
+        raise
+    _close_part(f, tmp_path, dest, True)
+
+
+@contextlib.asynccontextmanager
+async def _apart_file(dest):
+    """То же для asyncio: создание, переименование и удаление файла — в пуле потоков цикла событий."""
+    loop = asyncio.get_running_loop()
+    f, tmp_path = await loop.run_in_executor(None, _open_part, dest)
+    try:
+        yield f
+    except BaseException:
+        await loop.run_in_executor(None, _close_part, f, tmp_path, dest, False)
+        raise
+    await loop.run_in_executor(None, _close_part, f, tmp_path, dest, True)
+
+
+class _Receiver:
+    """Считает размер и хэш принятых частей, следит за max_size."""
+
+    def __init__(self, f, max_size):
+        self.f = f
+        self.max_size = max_size
+        self.size = 0
+        self.digest = hashlib.sha256()
+
+    def check_length(self, length):
+        if self.max_size and length and int(length) > self.max_size:
+            raise FileTooLarge(f"{length} байт")
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.max_size and self.size > self.max_size:
+            raise FileTooLarge(f"больше {self.max_size} байт")
+        self.digest.update(chunk)
+        self.f.write(chunk)
+
+    def result(self):
+        return self.size, self.digest.hexdigest()
+
+
+def download_to(token, file_path, dest, max_size=None):
+    """Скачивает файл Telegram в dest; возвращает (размер, sha256 в hex).
+
+    Если размер превышает max_size, загрузка прерывается (FileTooLarge),
+    а dest остаётся прежним.
+    """
+    with _part_file(dest) as f, requests.get(
+        file_url(token, file_path), stream=True, proxies=apihelper.proxy,
+        timeout=(apihelper.CONNECT_TIMEOUT, apihelper.READ_TIMEOUT),
+    ) as response:
+        if response.status_code != 200:
+            raise apihelper.ApiHTTPException("Download file", response)
+        receiver = _Receiver(f, max_size)
+        receiver.check_length(response.headers.get("Content-Length"))
+        for chunk in response.iter_content(CHUNK_SIZE):
+            receiver.write(chunk)
+    return receiver.result()
+
+
+async def download_to_async(session, url, dest, max_size=None):
+    """То же для asyncio: session — aiohttp.ClientSession, url — из file_url.
+
+    Части копятся в памяти и пишутся на диск в пуле потоков по WRITE_BATCH байт:
+    запись не занимает цикл событий, а переходов в поток — единицы на мегабайт.
+    """
+    loop = asyncio.get_running_loop()
+    async with _apart_file(dest) as f:
+        async with session.get(url) as response:
+            if response.status != 200:
+                raise apihelper.ApiException(f"HTTP {response.status}", "Download file", response)
+            pending = io.BytesIO()
+            receiver = _Receiver(pending, max_size)
+            receiver.check_length(response.headers.get("Content-Length"))
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                receiver.write(chunk)
+                if pending.tell() >= WRITE_BATCH:
+                    await loop.run_in_executor(None, f.write, pending.getvalue())
+                    pending.seek(0)
+                    pending.truncate()
+            if pending.tell():
+                await loop.run_in_executor(None, f.write, pending.getvalue())
+    return receiver.result()
@@ -0,0 +1,199 @@
+"""Генерация Word-файлов с заданиями по найденным дисциплинам."""
+import io
+import os
+import threading
+import zipfile
+
+from docx.oxml.ns import qn
+from docx.shared import Pt
+
+import metrics
+import patterns
+from docx_template import DocumentTemplate, add_paragraphs
+from parsers import competency_index, extract_program_info, find_comp_desc
+from question_bank import QuestionBank
+
+
+def program_names(user_dir, program_info=None):
+    """Направление и профиль для шапки документов."""
+    # program_info уже извлечён при разборе файла — повторно .docx не читаем
+    if program_info is None:
+        comp_file = os.path.join(user_dir, "competencies.docx")
+        program_info = extract_program_info(comp_file)
+    direction, profile = program_info
+
+    # --- Удаляем возможные вкрапления "Год набора ..." ---
+    direction = patterns.ENROLLMENT_YEAR.sub("", direction).strip()
+    profile = patterns.ENROLLMENT_YEAR.sub("", profile).strip()
+
+    if not direction:
+        direction = "Направление не указано"
+    if not profile:
+        profile = "Профиль не указан"
+    return direction, profile
+
+
+def plan_discipline(disc, competencies, questions, quotas=None):
+    """Описания компетенций дисциплины и выбранные к ним вопросы.
+
+    questions — QuestionBank (или список вопросов); quotas — квоты по разделам
+    для каждых 15 вопросов. Результат — простые структуры: по нему
+    render_discipline строит файл в процессе-воркере, не получая всех
+    компетенций и всего банка вопросов.
+    """
+    if not isinstance(questions, QuestionBank):
+        questions = QuestionBank.from_list(questions)
+    blocks = []
+    for uk in patterns.COMPETENCY_CODE.findall(disc):
+        uk_key = uk.replace(" ", "")
+        desc = find_comp_desc(uk_key, competencies)
+        if not desc:
+            blocks.append((uk, None, None))
+            continue
+        # desc уже в формате 'УК 1.1 — описание'
+        if desc.startswith(uk):
+            desc = patterns.DASH_PREFIX.sub("", desc[len(uk):], count=1)
+        desc = desc.strip()
+        desc = desc.lstrip("—").strip()
+        blocks.append((uk, desc, questions.sample(15, quotas)))
+    return disc, blocks
+
+
+def _style_document(doc):
+    # --- Стиль документа (Times New Roman, 14 pt) — один раз на уровне стиля Normal,
+    # его наследуют и абзацы, и ячейки таблиц ---
+    style = doc.styles['Normal']
+    font = style.font
+    font.name = 'Times New Roman'
+    font.size = Pt(14)
+    style.element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+
+
+_templates = threading.local()
+
+
+def _template():
+    """Заготовка документа со стилями; своя в каждом потоке."""
+    template = getattr(_templates, "value", None)
+    if template is None:
+        template = _templates.value = DocumentTemplate(_style_document)
+    return template
+
+
+@metrics.timed("render_docx")
+def build_discipline(plan, direction, profile):
+    """Содержимое .docx одной дисциплины по plan_discipline."""
+    disc, blocks = plan
+    template = _template()
+    doc = template.new()
+    question_counter = 1
+
+    # --- Название дисциплины ---
+    discipline_match = patterns.DISCIPLINE_NAME.search(disc)
+    discipline_name = discipline_match.group(1).strip() if discipline_match else "Неизвестная дисциплина"
+
+    # --- Коды компетенций (в порядке из названия дисциплины) ---
+    comp_codes = [uk for uk, _, _ in blocks]
+    if comp_codes:
+        base = patterns.COMPETENCY_BASE.match(comp_codes[0])
+        short_comp_code = base.group(1).strip() if base else comp_codes[0]
+    else:
+        short_comp_code = "Компетенция не указана"
+
+    # --- Шапка документа ---
+    add_paragraphs(doc, [
+        f"Задания для компьютерного тестирования по компетенции {short_comp_code}",
+        f"по дисциплине {discipline_name}",
+        f"Направление {direction}",
+        f"Профиль {profile}",
+        "",
+    ])
+
+    # --- Таблица с индикаторами ---
+    if comp_codes:
+        rows = [("Код компетенции", "Код индикатора", "Номера вопросов")]
+        for i, full_code in enumerate(comp_codes, start=1):
+            base_code = patterns.COMPETENCY_BASE.match(full_code).group(1)
+            rows.append((base_code if i == 1 else "", full_code.replace(" ", ""), f"{(i - 1) * 15 + 1}–{i * 15}"))
+    else:
+        rows = [
+            ("Код компетенции", "Код индикатора", "Номера вопросов"),
+            (short_comp_code, f"{short_comp_code}.1", "1–15"),
+            ("", f"{short_comp_code}.2", "16–30"),
+        ]
+    table = doc.add_table(rows=len(rows), cols=3)
+    table.style = 'Table Grid'
+    for row, values in zip(table.rows, rows):
+        for cell, value in zip(row.cells, values):
+            if value:
+                cell.text = value
+
+    add_paragraphs(doc, ["\n"])
+
+    # --- Основная часть: компетенции и вопросы ---
+    for uk, desc, selected in blocks:
+        if desc:
+            p = doc.add_paragraph()
+            run = p.add_run(f"{uk} — {desc}")
+            run.bold = True
+            p.alignment = 1
+
+            lines = [""]
+            for q in selected:
+                lines.append(f"{question_counter}. {q}")
+                question_counter += 1
+            lines.append("\n")
+            add_paragraphs(doc, lines)
+
+        else:
+            p = doc.add_paragraph()
+            p.add_run(f"⚠️ {uk} — описание не найдено.")
+            p.alignment = 1
+
+    metrics.inc("bot_documents_generated_total")
+    return template.to_bytes()
+
+
+def discipline_filename(disc):
+    return patterns.UNSAFE_FILENAME_CHAR.sub("_", disc[:40]) + ".docx"
+
+
+def render_discipline(user_dir, plan, direction, profile):
+    """Строит и сохраняет файл одной дисциплины; возвращает путь к файлу."""
+    file_path = os.path.join(user_dir, discipline_filename(plan[0]))
+    with open(file_path, "wb") as f:
+        f.write(build_discipline(plan, direction, profile))
+    return file_path
+
+
+def render_discipline_bytes(plan, direction, profile):
+    """Строит файл одной дисциплины в памяти; возвращает (имя файла, содержимое)."""
+    return discipline_filename(plan[0]), build_discipline(plan, direction, profile)
+
+
+def zip_files(files):
+    """Собирает (имя, содержимое) в один ZIP-архив; одинаковые имена получают номер."""
+    buffer = io.BytesIO()
+    seen = {}
+    # .docx уже сжат — повторное сжатие почти ничего не даёт
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for name, data in files:
+            count = seen[name] = seen.get(name, 0) + 1
+            if count > 1:
+                stem, ext = os.path.splitext(name)
+                name = f"{stem} ({count}){ext}"
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+@metrics.timed("generate_files_per_discipline")
+def generate_files_per_discipline(user_dir, disciplines, competencies, questions, program_info=None):
+    # индексы строим один раз на все дисциплины (в процесс-воркер приходят обычные dict и list)
+    competencies = competency_index(competencies)
+    if not isinstance(questions, QuestionBank):
+        questions = QuestionBank.from_list(questions)
+    direction, profile = program_names(user_dir, program_info)
+    return [
+        render_discipline(user_dir, plan_discipline(disc, competencies, questions), direction, profile)
+        for disc in disciplines
+    ]
@@ -0,0 +1,9 @@
+"""Настройки gunicorn для webhook.py; gunicorn читает этот файл из текущего каталога сам."""
+import config
+
+
+def post_fork(server, worker):
+    # Один порт на всех не поделить: каждый процесс занимает первый свободный
+    # из METRICS_PORT … METRICS_PORT + WEB_CONCURRENCY - 1, замена упавшего — его порт
+    import metrics
+    metrics.serve(ports=config.WEB_CONCURRENCY)
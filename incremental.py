@@ -0,0 +1,106 @@
+"""Повторный разбор слегка изменённого файла: только вокруг изменившихся абзацев.
+
+Абзацы прежней и новой версии сравниваются по хэшам; совпадающие начало и конец
+документа не разбираются заново. Совпадения регулярного выражения (Matches)
+пересчитываются от точки разреза перед изменением — позиции, дальше которой
+не заглядывает ни одна попытка совпадения, начатая раньше, — и до первого
+совпадения после изменения, которое в точности повторяет прежнее: с него
+поиск идёт так же, как в прежней версии. Результат совпадает с полным разбором.
+"""
+import bisect
+import hashlib
+
+
+def line_hashes(lines):
+    """Хэши абзацев (устойчивые между процессами, в отличие от hash())."""
+    return [hashlib.blake2b(line.encode(), digest_size=8).hexdigest() for line in lines]
+
+
+def changed_range(old, new):
+    """(p, old_end, new_end): old[p:old_end] заменено на new[p:new_end], остальное совпадает."""
+    n = min(len(old), len(new))
+    p = 0
+    while p < n and old[p] == new[p]:
+        p += 1
+    s = 0
+    while s < n - p and old[-1 - s] == new[-1 - s]:
+        s += 1
+    return p, len(old) - s, len(new) - s
+
+
+def last_before(regex, text, pos):
+    """Начало последнего совпадения regex (одиночный символ) левее pos; -1 — такого нет."""
+    step = 64
+    while pos > 0:
+        lo = max(0, pos - step)
+        found = None
+        for found in regex.finditer(text, lo, pos):
+            pass
+        if found is not None:
+            return found.start()
+        pos, step = lo, step * 2
+    return -1
+
+
+class Matches:
+    """Начала и концы всех совпадений регулярного выражения по тексту, по порядку (как finditer)."""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, starts=(), ends=()):
+        self.starts = list(starts)
+        self.ends = list(ends)
+
+    @classmethod
+    def scan(cls, regex, text):
+        matches = cls()
+        for m in regex.finditer(text):
+            matches.starts.append(m.start())
+            matches.ends.append(m.end())
+        return matches
+
+    def __len__(self):
+        return len(self.starts)
+
+    def to_json(self):
+        return [self.starts, self.ends]
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(*data)
+
+    def rescan(self, regex, text, lo, hi, delta, cut):
+        """Совпадения в новом тексте, где прежний кусок [lo, hi - delta) заменён на text[lo:hi].
+
+        cut(text, lo) — позиция, левее которой ни одна попытка совпадения не заглядывает
+        в text[lo:]. Возвращает (новые совпадения, first, old_end, count, dirty_lo, dirty_hi):
+        прежние совпадения [first, old_end) заменены найденными заново [first, first + count),
+        всё вне [dirty_lo, dirty_hi) такое же, как в прежней версии (правее — со сдвигом delta).
+        """
+        starts, ends = self.starts, self.ends
+        start = max(0, min(cut(text, lo), lo))
+        # прежнее совпадение, накрывающее точку разреза, ищется заново целиком
+        i = bisect.bisect_right(starts, start) - 1
+        if i >= 0 and ends[i] > start:
+            start = starts[i]
+        i = bisect.bisect_left(starts, start)
+
+        new_starts, new_ends = [], []
+        k, stop = len(starts), len(text)
+        for m in regex.finditer(text, start):
+            s, e = m.span()
+            if s > hi:
+                # то же совпадение, что прежде: дальше поиск идёт так же, как в прежней версии
+                j = bisect.bisect_left(starts, s - delta)
+                if j < len(starts) and starts[j] == s - delta and ends[j] == e - delta:
+                    k, stop = j, s
+                    break
+            new_starts.append(s)
+            new_ends.append(e)
+
+        result = Matches(starts[:i], ends[:i])
+        result.starts += new_starts
+        result.ends += new_ends
+        result.starts += [s + delta for s in starts[k:]]
+        result.ends += [e + delta for e in ends[k:]]
+        return result, i, k, len(new_starts), start, max(stop, hi + 1)
@@ -0,0 +1,171 @@
+"""Чтение .docx: текст документа и его абзацы/строки таблиц.
+
+word/document.xml разбирается потоково (iterparse) прямо из архива: дерево
+целиком не строится, разобранные элементы сразу очищаются.
+"""
+import bisect
+import io
+import os
+import re
+import zipfile
+from xml.etree import ElementTree
+
+import metrics
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_P, _T, _TAB, _PPR = _W + "p", _W + "t", _W + "tab", _W + "pPr"
+_BREAKS = (_W + "br", _W + "cr")
+_TR, _TC = _W + "tr", _W + "tc"
+
+DOCUMENT_PART = "word/document.xml"
+# Колонтитулы, как их ищет docx2txt
+_HEADER_PART = re.compile(r"word/header[0-9]*.xml")
+_FOOTER_PART = re.compile(r"word/footer[0-9]*.xml")
+
+
+class ParsedDocument:
+    """Текст .docx, считанный один раз, и смещения его абзацев."""
+
+    def __init__(self, text, path=None):
+        self.path = path
+        self.text = text
+        self._offsets = None
+
+    def __len__(self):
+        return len(self.text)
+
+    @property
+    def paragraph_offsets(self):
+        """Смещения начала каждой строки (абзаца) в self.text."""
+        if self._offsets is None:
+            offsets = [0]
+            find = self.text.find
+            pos = find("\n")
+            while pos != -1:
+                offsets.append(pos + 1)
+                pos = find("\n", pos + 1)
+            self._offsets = offsets
+        return self._offsets
+
+    def paragraph_at(self, offset):
+        """Номер абзаца, в который попадает смещение."""
+        return bisect.bisect_right(self.paragraph_offsets, offset) - 1
+
+    def paragraphs(self):
+        return self.text.split("\n")
+
+
+def _iterparse(stream):
+    """События iterparse; разобранный элемент сразу очищается, а элементы верхнего уровня удаляются из тела."""
+    depth = 0
+    body = None
+    for event, elem in ElementTree.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 2:
+                body = elem
+            yield event, elem
+            continue
+        yield event, elem
+        elem.clear()
+        depth -= 1
+        if depth == 2:
+            body.clear()
+
+
+def _part_text(stream, write):
+    """Текст части документа в том виде, в каком его склеивает docx2txt.
+
+    Перед каждым абзацем — пустая строка, <w:tab/> — табуляция, <w:br/> и <w:cr/> — перевод строки.
+    """
+    for event, elem in _iterparse(stream):
+        tag = elem.tag
+        if event == "start":
+            if tag == _P:
+                write("\n\n")
+        elif tag == _T:
+            if elem.text:
+                write(elem.text)
+        elif tag == _TAB:
+            write("\t")
+        elif tag in _BREAKS:
+            write("\n")
+
+
+def read_text(file_path):
+    """Текст .docx (колонтитулы, документ, нижние колонтитулы) — тот же, что у docx2txt.process."""
+    buffer = io.StringIO()
+    with zipfile.ZipFile(file_path) as archive:
+        names = archive.namelist()
+        parts = [name for name in names if _HEADER_PART.match(name)]
+        parts.append(DOCUMENT_PART)
+        parts += [name for name in names if _FOOTER_PART.match(name)]
+        for name in parts:
+            with archive.open(name) as stream:
+                _part_text(stream, buffer.write)
+    return buffer.getvalue().strip()
+
+
+def iter_blocks(file_path):
+    """Абзацы и строки таблиц word/document.xml по порядку, по мере чтения файла.
+
+    Абзац — строка текста, строка таблицы — кортеж текстов ячеек (абзацы ячейки
+    через \\n). Строки вложенной таблицы попадают в ячейку внешней как абзацы.
+    Перебор можно прервать в любой момент — остаток файла не читается.
+    """
+    paragraphs = []  # тексты открытых абзацев (абзац может быть вложен в надпись другого абзаца)
+    cells = []  # абзацы открытых ячеек
+    rows = []  # ячейки открытых строк таблиц
+    in_properties = 0
+    with zipfile.ZipFile(file_path) as archive, archive.open(DOCUMENT_PART) as stream:
+        for event, elem in _iterparse(stream):
+            tag = elem.tag
+            if event == "start":
+                if tag == _P:
+                    paragraphs.append([])
+                elif tag == _TC:
+                    cells.append([])
+                elif tag == _TR:
+                    rows.append([])
+                elif tag == _PPR:
+                    in_properties += 1
+                continue
+
+            if tag == _T:
+                if elem.text:
+                    paragraphs[-1].append(elem.text)
+            elif tag == _TAB:
+                if not in_properties:  # <w:tab/> в свойствах абзаца — позиция табуляции, а не символ
+                    paragraphs[-1].append("\t")
+            elif tag in _BREAKS:
+                paragraphs[-1].append("\n")
+            elif tag == _PPR:
+                in_properties -= 1
+            elif tag == _P:
+                text = "".join(paragraphs.pop())
+                if cells:
+                    cells[-1].append(text)
+                else:
+                    yield text
+            elif tag == _TC:
+                text = "\n".join(cells.pop())
+                rows[-1].append(text)
+            elif tag == _TR:
+                row = tuple(rows.pop())
+                if cells:
+                    cells[-1].extend(row)
+                else:
+                    yield row
+
+
+@metrics.timed("read_docx")
+def load_document(file_path):
+    """Распаковывает .docx ровно один раз и возвращает ParsedDocument."""
+    return ParsedDocument(read_text(file_path), path=os.fspath(file_path))
+
+
+def as_document(source):
+    """Принимает путь к файлу или уже считанный ParsedDocument."""
+    if isinstance(source, ParsedDocument):
+        return source
+    return load_document(source)
@@ -0,0 +1,224 @@
+"""Метрики горячих путей: гистограммы задержек по этапам, счётчики и глубины очередей.
+
+METRICS_PORT=0 (по умолчанию) — метрики выключены: timed() возвращает функцию
+как есть, inc() и observe() сразу выходят. Иначе serve() отдаёт /metrics
+в текстовом формате Prometheus на METRICS_HOST:METRICS_PORT.
+
+Метрики процессов-обработчиков (workers.ProcessPool) уходят в родительский
+процесс вместе с результатом задачи (drain/merge), поэтому разбор и генерация
+видны и при JOB_WORKERS > 0. Под gunicorn у каждого процесса свои метрики и свой
+порт: процесс занимает первый свободный из METRICS_PORT … METRICS_PORT + WEB_CONCURRENCY - 1
+(см. gunicorn.conf.py), Prometheus опрашивает их все.
+"""
+import asyncio
+import bisect
+import errno
+import functools
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+
+logger = logging.getLogger(__name__)
+
+ENABLED = config.METRICS_PORT > 0
+
+# Границы корзин гистограмм, с: от быстрого поиска до генерации десятков файлов
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+HELP = {
+    "bot_stage_seconds": ("histogram", "Время этапа обработки, с"),
+    "bot_job_seconds": ("histogram", "Время задачи в пуле процессов от постановки до результата, с"),
+    "bot_parses_total": ("counter", "Разборов файлов (промахов кэша разбора)"),
+    "bot_parse_cache_hits_total": ("counter", "Попаданий в кэш разбора"),
+    "bot_parse_cache_pruned_total": ("counter", "Удалённых из кэша разбора файлов"),
+    "bot_documents_generated_total": ("counter", "Сгенерированных файлов дисциплин"),
+    "bot_uploads_total": ("counter", "Отправленных в Telegram файлов"),
+    "bot_uploaded_bytes_total": ("counter", "Отправленных в Telegram байт"),
+    "bot_updates_queued": ("gauge", "Обновлений в очереди обработки"),
+    "bot_outbox_queued": ("gauge", "Сообщений в очереди отправки"),
+    "bot_jobs_queued": ("gauge", "Задач в очереди пула процессов"),
+}
+
+_lock = threading.Lock()
+_counters = {}  # (имя, метки) → значение
+_histograms = {}  # (имя, метки) → [счётчики по корзинам..., +Inf, сумма]
+_gauges = {}  # имя → функция без аргументов
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+# ---------- ЗАПИСЬ ----------
+def inc(name, value=1, **labels):
+    """Увеличивает счётчик."""
+    if not ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, seconds, **labels):
+    """Записывает значение в гистограмму."""
+    if ENABLED:
+        _observe((name, _labels(labels)), seconds)
+
+
+def _observe(key, seconds):
+    i = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        hist[i] += 1
+        hist[-1] += seconds
+
+
+def gauge(name, fn):
+    """Значение fn() снимается при каждом запросе /metrics."""
+    if ENABLED:
+        _gauges[name] = fn
+
+
+def timed(stage):
+    """Декоратор: время вызова — в bot_stage_seconds{stage=...}; при выключенных метриках — без обёртки."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        key = ("bot_stage_seconds", (("stage", stage),))
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    _observe(key, time.perf_counter() - t0)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _observe(key, time.perf_counter() - t0)
+        return wrapper
+    return decorate
+
+
+# ---------- МЕЖДУ ПРОЦЕССАМИ ----------
+def drain():
+    """Забирает накопленные метрики (в процессе-обработчике — для отправки родителю); None — нечего отдавать."""
+    if not ENABLED:
+        return None
+    with _lock:
+        if not _counters and not _histograms:
+            return None
+        snapshot = (dict(_counters), dict(_histograms))
+        _counters.clear()
+        _histograms.clear()
+    return snapshot
+
+
+def merge(snapshot):
+    """Добавляет метрики, полученные из drain() другого процесса."""
+    if not snapshot or not ENABLED:
+        return
+    counters, histograms = snapshot
+    with _lock:
+        for key, value in counters.items():
+            _counters[key] = _counters.get(key, 0) + value
+        for key, values in histograms.items():
+            hist = _histograms.get(key)
+            if hist is None:
+                _histograms[key] = list(values)
+            else:
+                for i, value in enumerate(values):
+                    hist[i] += value
+
+
+# ---------- ЭКСПОРТ ----------
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def render():
+    """Все метрики в текстовом формате Prometheus."""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, list(values)) for key, values in _histograms.items())
+    gauges = []
+    for name, fn in sorted(_gauges.items()):
+        try:
+            gauges.append(((name, ()), fn()))
+        except Exception:
+            logger.exception("Метрика %s не снимается", name)
+
+    lines = []
+    described = set()
+
+    def describe(name):
+        if name not in described:
+            described.add(name)
+            kind, text = HELP.get(name, ("untyped", name))
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in counters + gauges:
+        describe(name)
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), values in histograms:
+        describe(name)
+        total = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), values):
+            total += count
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {total}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {values[-1]}")
+        lines.append(f"{name}_count{_format_labels(labels)} {total}")
+    return "\n".join(lines) + "\n"
+
+
+def serve(port=None, host=None, ports=1):
+    """Запускает HTTP-сервер /metrics в фоновом потоке; None — если метрики выключены.
+
+    ports — сколько портов подряд, начиная с port, можно попробовать: занятые пропускаются.
+    """
+    if not ENABLED:
+        return None
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    port = port or config.METRICS_PORT
+    for n in range(ports):
+        try:
+            server = ThreadingHTTPServer((host or config.METRICS_HOST, port + n), Handler)
+            break
+        except OSError as e:
+            if e.errno != errno.EADDRINUSE or n == ports - 1:
+                raise
+    server.daemon_threads = True
+    logger.info("Метрики: http://%s:%d/metrics", *server.server_address[:2])
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,312 @@
+"""Очередь исходящих сообщений Telegram с учётом ограничений частоты.
+
+Обработчик только ставит сообщение в очередь и сразу возвращается; отправкой
+занимаются несколько потоков. Сообщения одного чата уходят строго по порядку
+и не чаще, чем позволяет корзина токенов чата; все чаты вместе — не чаще
+общей корзины. На ответ 429 чат откладывается на retry_after секунд, а
+сообщение остаётся первым в его очереди. Короткие тексты, скопившиеся в
+очереди чата, пока он ждал своей очереди, уходят одним сообщением.
+
+Файлы занимают память, пока не отправлены, поэтому их в очереди одного чата
+не больше chat_documents штук и chat_bytes байт: send_document ждёт, пока
+уйдут предыдущие (Telegram всё равно не примет их быстрее).
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+
+from telebot.apihelper import ApiTelegramException
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Предел длины одного сообщения Telegram
+MAX_MESSAGE = 4096
+# Чаты без очереди и с полной корзиной забываются не чаще, чем раз в столько секунд
+_PRUNE_EVERY = 60.0
+
+
+def document_size(document):
+    """Размер отправляемого файла в байтах (для метрик); 0 — если не узнать, не читая."""
+    getbuffer = getattr(document, "getbuffer", None)
+    return getbuffer().nbytes if getbuffer is not None else 0
+
+
+@metrics.timed("upload")
+def upload_document(bot, chat_id, document, **kwargs):
+    """bot.send_document с учётом отправленных байт в метриках."""
+    result = bot.send_document(chat_id, document, **kwargs)
+    metrics.inc("bot_uploads_total")
+    metrics.inc("bot_uploaded_bytes_total", document_size(document))
+    return result
+
+
+class TokenBucket:
+    """Корзина токенов: rate токенов в секунду, не больше burst подряд."""
+
+    def __init__(self, rate, burst, now=None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.stamp = time.monotonic() if now is None else now
+
+    def _refill(self, now):
+        if now > self.stamp:
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+
+    def delay(self, now):
+        """Через сколько секунд появится токен (0 — уже есть)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def full(self, now):
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+class _Text:
+    __slots__ = ("text", "kwargs")
+
+    def __init__(self, text, kwargs):
+        self.text = text
+        self.kwargs = kwargs
+
+    def send(self, bot, chat_id):
+        bot.send_message(chat_id, self.text, **self.kwargs)
+
+    def merge(self, other):
+        """Объединяет со следующим текстом, если это незаметно для пользователя; иначе None."""
+        if not isinstance(other, _Text) or self.kwargs.get("reply_markup") is not None:
+            return None
+        if {k: v for k, v in self.kwargs.items() if k != "reply_markup"} != \
+                {k: v for k, v in other.kwargs.items() if k != "reply_markup"}:
+            return None
+        text = self.text + "\n\n" + other.text
+        if len(text) > MAX_MESSAGE:
+            return None
+        return _Text(text, other.kwargs)
+
+
+class _Document:
+    __slots__ = ("document", "kwargs", "size")
+
+    def __init__(self, document, kwargs):
+        self.document = document
+        self.kwargs = kwargs
+        self.size = document_size(document)
+
+    def send(self, bot, chat_id):
+        self.document.seek(0)
+        upload_document(bot, chat_id, self.document, **self.kwargs)
+
+    def merge(self, other):
+        return None
+
+
+class _Chat:
+    __slots__ = ("queue", "bucket", "busy", "documents", "bytes")
+
+    def __init__(self, bucket):
+        self.queue = deque()
+        self.bucket = bucket
+        self.busy = False
+        # файлы в очереди и в отправке — для ограничения памяти на чат
+        self.documents = 0
+        self.bytes = 0
+
+
+class Outbox:
+    """Неблокирующая отправка сообщений через bot с ограничением частоты.
+
+    global_rate — сообщений в секунду на все чаты, chat_rate и chat_burst —
+    на один чат; retries — сколько раз повторять сообщение после 429.
+    chat_documents и chat_bytes — сколько файлов и байт может ждать отправки
+    в одном чате (0 — без предела); первый файл принимается любого размера.
+    """
+
+    def __init__(self, bot, senders=4, global_rate=25, chat_rate=1, chat_burst=3, retries=5,
+                 chat_documents=4, chat_bytes=50 << 20):
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.retries = retries
+        self.chat_documents = chat_documents
+        self.chat_bytes = chat_bytes
+        # общий поток — ровно, без всплесков: Telegram считает сообщения за скользящую секунду
+        self.global_bucket = TokenBucket(global_rate, 1)
+        self.sent = 0
+        self.retried = 0
+        self.dropped = 0
+        self._cond = threading.Condition()
+        self._chats = {}
+        self._ready = []  # (когда можно отправить, порядковый номер, chat_id)
+        self._seq = itertools.count()
+        self._queued = 0
+        self._in_flight = 0
+        self._closed = False
+        self._pruned = time.monotonic()
+        self._threads = [threading.Thread(target=self._loop, name=f"outbox-{i}", daemon=True)
+                         for i in range(senders)]
+        for thread in self._threads:
+            thread.start()
+
+    # ---------- ПОСТАНОВКА В ОЧЕРЕДЬ ----------
+    def send_message(self, chat_id, text, **kwargs):
+        self._put(chat_id, _Text(text, kwargs))
+
+    def send_document(self, chat_id, document, **kwargs):
+        """document — файловый объект; читается при отправке (и заново при повторе).
+
+        Если у чата уже ждут отправки chat_documents файлов или chat_bytes байт,
+        ждёт, пока часть из них уйдёт.
+        """
+        self._put(chat_id, _Document(document, kwargs))
+
+    def _put(self, chat_id, item):
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Очередь отправки закрыта")
+                chat = self._chats.get(chat_id)
+                if chat is None:
+                    chat = self._chats[chat_id] = _Chat(TokenBucket(self.chat_rate, self.chat_burst))
+                if not isinstance(item, _Document) or self._fits(chat, item.size):
+                    break
+                self._cond.wait()
+            if isinstance(item, _Document):
+                chat.documents += 1
+                chat.bytes += item.size
+            chat.queue.append([item, 0])
+            self._queued += 1
+            if len(chat.queue) == 1 and not chat.busy:
+                self._schedule(chat_id, chat, time.monotonic())
+            self._cond.notify()
+
+    def _fits(self, chat, size):
+        if not chat.documents:
+            return True
+        return (not self.chat_documents or chat.documents < self.chat_documents) and \
+            (not self.chat_bytes or chat.bytes + size <= self.chat_bytes)
+
+    def _schedule(self, chat_id, chat, now, not_before=0.0):
+        heapq.heappush(self._ready, (max(now + chat.bucket.delay(now), not_before), next(self._seq), chat_id))
+
+    # ---------- ОТПРАВКА ----------
+    def _next(self):
+        """Следующий чат, которому можно отправлять, и его пачка сообщений; None — очередь закрыта."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._ready:
+                    wait = self._ready[0][0] - now
+                    if wait <= 0:
+                        wait = self.global_bucket.delay(now)
+                    if wait <= 0:
+                        _, _, chat_id = heapq.heappop(self._ready)
+                        chat = self._chats[chat_id]
+                        self.global_bucket.take(now)
+                        chat.bucket.take(now)
+                        chat.busy = True
+                        self._in_flight += 1
+                        entry = self._batch(chat)
+                        return chat_id, chat, entry
+                elif self._closed:
+                    return None
+                else:
+                    wait = None
+                if now - self._pruned > _PRUNE_EVERY:
+                    self._prune(now)
+                self._cond.wait(wait)
+
+    def _batch(self, chat):
+        """Снимает с очереди чата первое сообщение вместе с текстами, которые к нему можно приклеить."""
+        entry = chat.queue.popleft()
+        self._queued -= 1
+        while chat.queue and not entry[1]:
+            merged = entry[0].merge(chat.queue[0][0])
+            if merged is None:
+                break
+            chat.queue.popleft()
+            self._queued -= 1
+            entry = [merged, 0]
+        return entry
+
+    def _loop(self):
+        while True:
+            taken = self._next()
+            if taken is None:
+                return
+            chat_id, chat, entry = taken
+            retry_after = None
+            try:
+                entry[0].send(self.bot, chat_id)
+                outcome = "sent"
+            except ApiTelegramException as e:
+                if e.error_code == 429 and entry[1] < self.retries:
+                    retry_after = (e.result_json.get("parameters") or {}).get("retry_after", 1)
+                    outcome = "retried"
+                else:
+                    logger.warning("Сообщение для чата %s не отправлено: %s", chat_id, e.description)
+                    outcome = "dropped"
+            except Exception:
+                logger.exception("Сообщение для чата %s не отправлено", chat_id)
+                outcome = "dropped"
+            self._done(chat_id, chat, entry, outcome, retry_after)
+
+    def _done(self, chat_id, chat, entry, outcome, retry_after):
+        with self._cond:
+            now = time.monotonic()
+            self._in_flight -= 1
+            chat.busy = False
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            if retry_after is not None:
+                entry[1] += 1
+                chat.queue.appendleft(entry)
+                self._queued += 1
+            elif isinstance(entry[0], _Document):
+                chat.documents -= 1
+                chat.bytes -= entry[0].size
+            if chat.queue:
+                self._schedule(chat_id, chat, now, now + (retry_after or 0))
+            self._cond.notify_all()
+
+    def _prune(self, now):
+        self._pruned = now
+        for chat_id in [c for c, chat in self._chats.items()
+                        if not chat.queue and not chat.busy and chat.bucket.full(now)]:
+            del self._chats[chat_id]
+
+    # ---------- СОСТОЯНИЕ ----------
+    def pending(self):
+        """Сколько сообщений ждёт отправки (без отправляемых прямо сейчас)."""
+        with self._cond:
+            return self._queued
+
+    def join(self, timeout=None):
+        """Ждёт, пока очередь опустеет; False — не дождались за timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._in_flight or self._queued:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    def close(self, timeout=None):
+        """Дожидается отправки оставшегося и останавливает потоки."""
+        self.join(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
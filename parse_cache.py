@@ -0,0 +1,165 @@
+"""Кэш результатов разбора на диске: ключ — вид разбора и SHA-256 содержимого файла.
+
+Записи — gzip + JSON в CACHE_DIR, пишутся атомарно; в имени записи — версия
+парсеров (PARSER_VERSION), так что записи прежних версий просто не читаются.
+Повреждённая или недописанная запись считается промахом. Кэш общий для всех
+процессов; если он больше PARSE_CACHE_MAX_MB, давно не читанные записи удаляются.
+"""
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+
+import config
+import metrics
+
+# Меняйте при любом изменении парсеров — старые записи кэша перестанут читаться
+PARSER_VERSION = 3
+
+CACHE_DIR = os.environ.get("PARSE_CACHE_DIR", ".parse_cache")
+
+_CHUNK = 1 << 20
+# Кэш проверяется на превышение предела не чаще, чем раз в столько секунд (в каждом процессе)
+_PRUNE_EVERY = 60.0
+# Недописанные временные файлы (процесс упал при записи) удаляются через столько секунд
+_TMP_TTL = 3600.0
+# Когда предел превышен, записи удаляются, пока кэш не станет меньше этой доли предела
+_PRUNE_TO = 0.8
+
+_pruned = 0.0
+
+
+def file_digest(file_path):
+    """SHA-256 содержимого файла (hex)."""
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _entry_path(kind, digest):
+    return os.path.join(CACHE_DIR, f"{kind}-{digest}-v{PARSER_VERSION}.json.gz")
+
+
+def load(kind, digest):
+    """Возвращает сохранённый результат разбора или None."""
+    path = _entry_path(kind, digest)
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, EOFError, ValueError, zlib.error):
+        # нет записи, она обрезана или повреждена — промах
+        return None
+    # время изменения — время последнего обращения: при очистке первыми уходят давно не нужные;
+    # запись могли удалить при очистке сразу после чтения — прочитанное всё равно верно
+    with contextlib.suppress(OSError):
+        os.utime(path)
+    return data
+
+
+def store(kind, digest, data):
+    """Атомарно записывает результат разбора (gzip + JSON)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, _entry_path(kind, digest))
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    maybe_prune()
+
+
+# ---------- ОЧИСТКА ----------
+def maybe_prune():
+    """prune(), если с прошлой проверки в этом процессе прошло _PRUNE_EVERY секунд."""
+    global _pruned
+    now = time.monotonic()
+    if config.PARSE_CACHE_MAX_MB > 0 and now - _pruned >= _PRUNE_EVERY:
+        _pruned = now
+        prune(config.PARSE_CACHE_MAX_MB << 20)
+
+
+def prune(max_bytes):
+    """Удаляет записи прежних версий парсеров и брошенные временные файлы, а если кэш
+    больше max_bytes — давно не читанные записи, пока он не станет меньше _PRUNE_TO предела.
+
+    Возвращает, сколько файлов удалено. Файлы, удалённые за это время другим процессом, пропускаются.
+    """
+    suffix = f"-v{PARSER_VERSION}.json.gz"
+    now = time.time()
+    entries = []
+    removed = 0
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError:
+        return 0
+    for name in names:
+        path = os.path.join(CACHE_DIR, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        stale = not name.endswith(suffix) and (not name.endswith(".tmp") or now - st.st_mtime > _TMP_TTL)
+        if stale:
+            removed += _remove(path)
+        elif name.endswith(suffix):
+            entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    if total > max_bytes:
+        entries.sort()
+        for _, size, path in entries:
+            if total <= max_bytes * _PRUNE_TO:
+                break
+            removed += _remove(path)
+            total -= size
+    if removed:
+        metrics.inc("bot_parse_cache_pruned_total", removed)
+    return removed
+
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        return 0
+    return 1
+
+
+def cached(kind, file_path, parse, digest=None):
+    """Результат parse(file_path) из кэша по хэшу файла; при промахе — разбирает и сохраняет."""
+    digest = digest or file_digest(file_path)
+    data = load(kind, digest)
+    if data is None:
+        metrics.inc("bot_parses_total", kind=kind)
+        data = parse(file_path)
+        store(kind, digest, data)
+    else:
+        metrics.inc("bot_parse_cache_hits_total", kind=kind)
+    return data
+
+
+def cached_revision(kind, file_path, parse, digest=None, previous=None):
+    """Как cached(), но parse(file_path, state) получает состояние разбора прежней версии файла.
+
+    previous — хэш прежней версии (её состояние лежит рядом с результатом, None — разбор
+    целиком); parse возвращает (результат, состояние), состояние сохраняется для следующей версии.
+    """
+    digest = digest or file_digest(file_path)
+    data = load(kind, digest)
+    if data is not None:
+        metrics.inc("bot_parse_cache_hits_total", kind=kind)
+        return data
+    metrics.inc("bot_parses_total", kind=kind)
+    state = load(f"{kind}_state", previous) if previous and previous != digest else None
+    data, state = parse(file_path, state)
+    store(kind, digest, data)
+    if state is not None:
+        store(f"{kind}_state", digest, state)
+    return data
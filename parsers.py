@@ -0,0 +1,897 @@
+"""Парсеры файлов компетенций и вопросов (без зависимости от бота)."""
+import bisect
+
+import incremental
+import metrics
+import parse_cache
+import patterns
+from incremental import Matches
+from ingest import ParsedDocument, as_document, iter_blocks, load_document
+from question_bank import QuestionBank
+from search_index import CompetencyIndex
+
+# Самый длинный стоп-маркер, который может сработать только из-за обрезки окна справа (\b перед концом)
+_STOP_TAIL = 32
+# Сколько символов после кода просматривает запасное описание
+_FALLBACK_WINDOW = 400
+
+
+
+# ---------- С КЭШЕМ ----------
+def parse_competencies_file(file_path, digest=None, mode="text", previous=None):
+    """Дисциплины, компетенции и направление/профиль — из кэша или разбором файла.
+
+    mode: text — по тексту документа, tables — по строкам таблиц,
+    auto — по таблицам, а если дисциплин в них нет — по тексту; описания кодов,
+    которых нет в таблицах, тоже берутся из текста.
+    previous — хэш прежней версии файла: если он уже разбирался, заново разбираются
+    только изменившиеся абзацы и строки таблиц.
+    """
+    revise = {"text": _revise_text, "tables": _revise_tables, "auto": _revise_auto}[mode]
+    kind = "competencies" if mode == "text" else f"competencies_{mode}"
+    return parse_cache.cached_revision(kind, file_path, revise, digest, previous)
+
+
+def parse_questions_file(file_path, digest=None):
+    """Банк вопросов по разделам; разобранные разделы берутся из кэша, если файл уже встречался."""
+    sections = parse_cache.cached("question_sections", file_path, extract_question_sections, digest)
+    return QuestionBank(sections)
+
+
+def _parse_competencies(file_path):
+    # Один раз читаем файл компетенций и прогоняем по нему все парсеры
+    doc = as_document(file_path)
+    return {
+        "disciplines": extract_disciplines(doc),
+        "competencies": extract_competencies(doc),
+        "program_info": list(extract_program_info(doc)),
+    }
+
+
+# ---------- ДИСЦИПЛИНЫ ----------
+@metrics.timed("extract_disciplines")
+def extract_disciplines(source):
+    full_text = as_document(source).text
+    print("📘 Текст успешно считан. Общая длина:", len(full_text))
+    matches = patterns.DISCIPLINE.findall(full_text)
+    print("🔍 Найдено дисциплин:", len(matches))
+    disciplines = [" ".join(m.split()) for m in matches]
+    return disciplines
+
+
+# ---------- КОМПЕТЕНЦИИ ----------
+class _Markers:
+    """Все совпадения шаблона, найденные одним проходом по тексту.
+
+    first(lo, hi) отвечает так же, как regex.search(text[lo:hi]), но через bisect
+    по заранее отсортированным смещениям, без срезов и повторного сканирования.
+    """
+
+    def __init__(self, text, regex, at_start=None, matches=None):
+        self.text = text
+        self.regex = regex
+        self.at_start = at_start
+        # matches — уже найденные совпадения по всему тексту (incremental.Matches)
+        matches = Matches.scan(regex, text) if matches is None else matches
+        self.starts = matches.starts
+        self.ends = matches.ends
+
+    def first(self, lo, hi):
+        if self.at_start is not None and self.at_start.match(self.text, lo, hi):
+            return lo
+        best = None
+        i = bisect.bisect_left(self.starts, lo)
+        if i < len(self.starts) and self.starts[i] < hi:
+            s = self.starts[i]
+            # совпадение, вылезающее за hi, в срезе может не найтись — перепроверяем
+            if self.ends[i] <= hi or self.regex.match(self.text, s, hi):
+                best = s
+        # совпадения, которые появляются только из-за обрезки окна справа
+        tail = max(lo + 1, hi - _STOP_TAIL)
+        if best is None or tail < best:
+            m = self.regex.search(self.text, tail, hi)
+            if m and (best is None or m.start() < best):
+                best = m.start()
+        return best
+
+
+def _trim_description(desc_raw):
+    # Нормализация: убираем ведущие разделители и вкрапления кодов
+    desc_raw = patterns.LEADING_SEPARATORS.sub("", desc_raw)
+    desc_raw = patterns.COMPETENCY_CODE.sub("", desc_raw).strip()
+
+    # Усечём по первой стоп-подстроке, чтобы убрать вкрапления таблиц/заголовков
+    m = patterns.STOP_SUBSTRING.search(desc_raw)
+    if m:
+        desc_raw = desc_raw[:m.start()].strip()
+
+    # Разбиваем по строкам и убираем строки, которые выглядят как заголовки/номера
+    clean_lines = []
+    for ln in desc_raw.splitlines():
+        ln = ln.strip()
+        if not ln:
+            continue
+        if patterns.HEADER_LINE.match(ln):
+            break
+        clean_lines.append(ln)
+    desc_raw = ' '.join(clean_lines).strip()
+
+    a = patterns.ARTIFACT.search(desc_raw)
+    if a:
+        desc_raw = desc_raw[:a.start()].strip()
+
+    # Убираем завершающие служебные символы и одиночные скобки
+    return patterns.TRAILING_SEPARATORS.sub("", desc_raw).strip()
+
+
+def _fallback_description(cleaned, start, stops):
+    # Фолбек: чуть более длинный фрагмент (до 400 символов) до ближайшего логичного конца
+    end = min(len(cleaned), start + _FALLBACK_WINDOW)
+    # Исходная версия резала кусок стоп-шаблонами по очереди: после обрезки на новом конце
+    # может найтись ещё маркер («ДисциплиныКод и наименование»), поэтому режем, пока режется
+    cut = stops.first(start, end)
+    while cut is not None:
+        end = cut
+        cut = stops.first(start, end)
+    candidate_block = cleaned[start:end]
+    candidate_block = patterns.COMPETENCY_CODE.sub("", candidate_block).strip()
+    m = patterns.STOP_SUBSTRING.search(candidate_block)
+    if m:
+        candidate_block = candidate_block[:m.start()].strip()
+    a = patterns.ARTIFACT.search(candidate_block)
+    if a:
+        candidate_block = candidate_block[:a.start()].strip()
+    return candidate_block
+
+
+@metrics.timed("extract_competencies")
+def extract_competencies(source):
+    full_text = as_document(source).text
+    # Сохраняем переводы строк, но убираем лишние пробелы/табуляции
+    cleaned = full_text.replace('\r', '')
+    cleaned = patterns.SPACES.sub(" ", cleaned).strip()
+
+    matches = list(patterns.COMPETENCY_CODE.finditer(cleaned))
+    # Границы ищем один раз по всему тексту, дальше — только bisect
+    stops = _Markers(cleaned, patterns.STOP_MARKER, patterns.STOP_MARKER_AT_START)
+    blanks = _Markers(cleaned, patterns.BLANK_LINE)
+
+    competencies = {}
+    for i, m in enumerate(matches):
+        next_code_start = matches[i + 1].start() if i + 1 < len(matches) else len(cleaned)
+        entry = _describe(cleaned, m.start(), m.end(), next_code_start, stops, blanks)
+        if entry is not None:
+            competencies[entry[0]] = entry[1]
+
+    print("📘 Найдено компетенций:", len(competencies))
+    return competencies
+
+
+def _describe(cleaned, code_start, start, next_code_start, stops, blanks):
+    """(ключ, «код — описание») для кода cleaned[code_start:start]; None — описания нет.
+
+    Зависит только от cleaned[code_start - 1:max(next_code_start, start + _FALLBACK_WINDOW)]
+    и маркеров в этом куске.
+    """
+    # Нормализуем найденный код: убираем завершающие точки/запятые/скобки
+    code_text = patterns.CODE_TAIL.sub("", cleaned[code_start:start]).strip()
+
+    # Ближайший маркер-стоп или двойной перевод строки (новый блок)
+    end = next_code_start
+    for markers in (stops, blanks):
+        candidate = markers.first(start, next_code_start)
+        if candidate is not None and candidate < end:
+            end = candidate
+
+    # Попробуем остановиться на первом конце предложения в пределах разумного (200 символов)
+    sent = patterns.SENTENCE_END.search(cleaned, start, end)
+    if sent and sent.start() - start < 200:
+        end = sent.end()
+
+    desc_raw = _trim_description(cleaned[start:end].strip())
+
+    # Если описание слишком короткое, возьмём чуть более длинный фрагмент
+    if len(patterns.WHITESPACE.sub("", desc_raw)) < 8:
+        candidate_block = _fallback_description(cleaned, start, stops)
+        if len(patterns.WHITESPACE.sub("", candidate_block)) >= 8:
+            desc_raw = candidate_block
+
+    # Отбрасываем явно мусорные описания (нет букв)
+    if not patterns.HAS_LETTERS.search(desc_raw):
+        return None
+
+    # Обрезаем лишнюю длину
+    if len(desc_raw) > 400:
+        desc_raw = desc_raw[:400].rsplit('.', 1)[0] + "..."
+
+    # Нормализуем ключ (убираем пробелы между префиксом и цифрами)
+    return code_text.replace(" ", ""), f"{code_text} — {desc_raw}"
+
+
+# ---------- ТАБЛИЦЫ ----------
+def _table_descriptions(cells, j, competencies, use_next):
+    """Компетенции из ячейки с кодами: «УК1.1 Описание; УК1.2 Описание ...».
+
+    Описание кода — текст после него до следующего кода. Если после последнего
+    кода текста нет, а use_next — описанием служит следующая ячейка.
+    """
+    matches = list(patterns.COMPETENCY_CODE.finditer(cells[j]))
+    for n, m in enumerate(matches):
+        end = matches[n + 1].start() if n + 1 < len(matches) else len(cells[j])
+        desc = patterns.LEADING_SEPARATORS.sub("", cells[j][m.end():end])
+        desc = patterns.TRAILING_SEPARATORS.sub("", desc).strip()
+        if (not patterns.HAS_LETTERS.search(desc) and use_next and n == len(matches) - 1
+                and j + 1 < len(cells) and not patterns.COMPETENCY_CODE.match(cells[j + 1])):
+            desc = patterns.TRAILING_SEPARATORS.sub("", cells[j + 1]).strip()
+        if not patterns.HAS_LETTERS.search(desc):
+            continue
+        if len(desc) > 400:
+            desc = desc[:400].rsplit('.', 1)[0] + "..."
+        code_text = patterns.CODE_TAIL.sub("", m.group(1)).strip()
+        competencies[code_text.replace(" ", "")] = f"{code_text} — {desc}"
+
+
+def _header_codes(cells):
+    """Столбец → код компетенции для строки, все заполненные ячейки которой — коды."""
+    return {j: cell for j, cell in enumerate(cells) if patterns.COMPETENCY_CODE.fullmatch(cell)}
+
+
+class _TableRows:
+    """Разбор блоков документа по одному (см. _parse_competency_tables).
+
+    Дисциплина приписывается блоку, с которого началась, компетенции — блоку, где
+    найдены. От блока к блоку переходят только незаконченная дисциплина и шапка
+    таблицы, поэтому с абзаца или строки дисциплины разбор можно начать заново.
+    """
+
+    def __init__(self, header_at=-1, header=None):
+        self.current = None  # [столбец кода дисциплины, название, коды, номер блока]
+        self.header_at = header_at  # номер блока с шапкой таблицы; -1 — шапки нет
+        self.header = header or {}  # столбец → код компетенции из шапки
+        self.disciplines = {}  # номер блока → дисциплина
+        self.competencies = {}  # номер блока → {код: описание}
+
+    def finish(self):
+        current = self.current
+        if current and current[2]:
+            self.disciplines[current[3]] = f"{current[1]} ({' '.join(current[2])})"
+        self.current = None
+
+    def feed(self, index, block):
+        """Разбирает блок; True — если это абзац или строка дисциплины (точка перезапуска)."""
+        if isinstance(block, str):
+            self.finish()
+            self.header_at, self.header = -1, {}
+            return True
+        cells = [" ".join(cell.split()) for cell in block]
+        column = next((j for j, cell in enumerate(cells) if patterns.DISCIPLINE_CODE.match(cell)), None)
+        current = self.current
+
+        if column is None and current and current[0] < len(cells) and not cells[current[0]]:
+            start = current[0] + 1
+        elif column is not None:
+            self.finish()
+            name, start = cells[column], column + 1
+            if " " not in name and start < len(cells) and not patterns.COMPETENCY_CODE.match(cells[start]):
+                name, start = f"{name} {cells[start]}", start + 1  # код и название в соседних ячейках
+            current = self.current = [column, name, [], index]
+            head, bracket, tail = name.rpartition("(")
+            if bracket and patterns.COMPETENCY_CODE.search(tail):
+                # коды в скобках прямо в названии, как в текстовом виде матрицы
+                current[1] = head.strip()
+                current[2].extend(patterns.COMPETENCY_CODE.findall(tail))
+        else:
+            self.finish()
+            current = None
+            codes = _header_codes(cells)
+            if len(codes) > 1:
+                self.header_at, self.header = index, codes
+                return False
+            start = 0
+
+        header = self.header
+        for j in range(start, len(cells)):
+            if current:
+                codes = patterns.COMPETENCY_CODE.findall(cells[j])
+                if not codes and cells[j] and j in header:
+                    codes = [header[j]]
+                current[2].extend(codes)
+            if patterns.COMPETENCY_CODE.search(cells[j]):
+                found = self.competencies.setdefault(index, {})
+                _table_descriptions(cells, j, found, use_next=current is None)
+        return column is not None
+
+
+@metrics.timed("extract_competency_tables")
+def _parse_competency_tables(file_path):
+    """Дисциплины, компетенции и направление/профиль одним проходом по строкам таблиц.
+
+    Дисциплина — строка таблицы, ячейка которой начинается с кода «Б...»; её компетенции —
+    коды УК/ОПК/ПК из ячеек правее или отметки в столбцах, в шапке которых стоят коды.
+    Следующие строки, где ячейка дисциплины пуста (объединена), добавляют ей коды.
+    Описание компетенции — текст ячейки после кода или, если его нет, следующая ячейка.
+    """
+    return _tables_revision(list(iter_blocks(file_path)))[0]
+
+
+# ---------- ПОВТОРНЫЙ РАЗБОР ----------
+# Прежняя версия того же файла (parse_cache.cached_revision) оставляет состояние разбора;
+# по нему заново разбирается только окрестность изменившихся абзацев (incremental.py).
+@metrics.timed("reparse_text")
+def _revise_text(file_path, state=None):
+    return _text_revision(load_document(file_path), state)
+
+
+@metrics.timed("reparse_tables")
+def _revise_tables(file_path, state=None):
+    return _tables_revision(list(iter_blocks(file_path)), state)
+
+
+def _revise_auto(file_path, state=None):
+    state = state or {}
+    parsed, tables = _revise_tables(file_path, state.get("tables"))
+    if not parsed["disciplines"]:
+        parsed, text = _revise_text(file_path, state.get("text"))
+        return parsed, {"tables": tables, "text": text}
+    competencies = parsed["competencies"]
+    if all(code in competencies for code in _discipline_codes(parsed["disciplines"])):
+        return parsed, {"tables": tables, "text": state.get("text")}
+    # Матрица в таблице, а описания компетенций — абзацами: недостающие берём из текста
+    by_text, text = _revise_text(file_path, state.get("text"))
+    for code, desc in by_text["competencies"].items():
+        competencies.setdefault(code, desc)
+    return parsed, {"tables": tables, "text": text}
+
+
+def _discipline_codes(disciplines):
+    """Ключи компетенций, на которые ссылаются дисциплины (без пробелов, как в словаре)."""
+    for disc in disciplines:
+        for code in patterns.COMPETENCY_CODE.findall(disc):
+            yield code.replace(" ", "")
+
+
+def _code_cut(text, pos):
+    # Код читает только буквы УКОП, пробелы, цифры и точки
+    return incremental.last_before(patterns.CODE_BARRIER, text, pos) + 1
+
+
+def _discipline_cut(text, pos):
+    return incremental.last_before(patterns.DISCIPLINE_BARRIER, text, pos) + 1
+
+
+def _blank_cut(text, pos):
+    # «\n\s*\n» не проходит через непробельный символ
+    return incremental.last_before(patterns.NON_SPACE, text, pos)
+
+
+def _stop_cut(text, pos):
+    # «\n\s*Б\d» читает ещё символ после непробельного, слова — не дальше _STOP_TAIL символов
+    return min(incremental.last_before(patterns.NON_SPACE, text, pos - 1), pos - _STOP_TAIL)
+
+
+def _line_span(offsets, length, first, end):
+    """Символы строк [first, end) — считая, что после каждой строки, и последней тоже, идёт \n."""
+    def at(n):
+        return offsets[n] if n < len(offsets) else length
+    return at(first), at(end)
+
+
+_EMPTY_TEXT_STATE = {
+    "lines": [], "length": 0, "clean_length": 0, "disciplines": [[], []], "names": [],
+    "codes": [[], []], "entries": [], "stops": [[], []], "blanks": [[], []],
+}
+
+
+def _text_revision(doc, state=None):
+    """То же, что _parse_competencies, и состояние разбора для следующей версии файла.
+
+    state — состояние прежней версии (None — разбор целиком). Совпадения дисциплин,
+    кодов и границ описаний ищутся заново только вокруг изменившихся строк, описания —
+    только у кодов, которые до этих мест дочитывают.
+    """
+    text = doc.text
+    cleaned = patterns.SPACES.sub(" ", text.replace("\r", ""))
+    if cleaned != cleaned.strip():
+        # строки очищенного текста не соответствуют исходным — только целиком
+        return _parse_competencies(doc), None
+    state = state or _EMPTY_TEXT_STATE
+    lines = incremental.line_hashes(doc.paragraphs())
+    first, old_end, new_end = incremental.changed_range(state["lines"], lines)
+
+    # ---- дисциплины ----
+    print("📘 Текст успешно считан. Общая длина:", len(text))
+    lo, hi = _line_span(doc.paragraph_offsets, len(text), first, new_end)
+    disciplines, i, j, count, _, _ = Matches.from_json(state["disciplines"]).rescan(
+        patterns.DISCIPLINE, text, lo, hi, len(text) - state["length"], _discipline_cut)
+    names = state["names"][:i]
+    names += [" ".join(text[s:e].split()) for s, e in
+              zip(disciplines.starts[i:i + count], disciplines.ends[i:i + count])]
+    names += state["names"][j:]
+    print("🔍 Найдено дисциплин:", len(names))
+
+    # ---- компетенции ----
+    lo, hi = _line_span(ParsedDocument(cleaned).paragraph_offsets, len(cleaned), first, new_end)
+    delta = len(cleaned) - state["clean_length"]
+    codes, i, j, count, dirty_lo, dirty_hi = Matches.from_json(state["codes"]).rescan(
+        patterns.COMPETENCY_CODE, cleaned, lo, hi, delta, _code_cut)
+    entries = state["entries"][:i] + [None] * count + state["entries"][j:]
+    found = {}
+    for name, regex, cut in (("stops", patterns.STOP_MARKER, _stop_cut), ("blanks", patterns.BLANK_LINE, _blank_cut)):
+        found[name], _, _, _, low, high = Matches.from_json(state[name]).rescan(regex, cleaned, lo, hi, delta, cut)
+        dirty_lo, dirty_hi = min(dirty_lo, low), max(dirty_hi, high)
+    stops = _Markers(cleaned, patterns.STOP_MARKER, patterns.STOP_MARKER_AT_START, found["stops"])
+    blanks = _Markers(cleaned, patterns.BLANK_LINE, matches=found["blanks"])
+
+    # Описание кода читает cleaned[start - 1:max(next_code_start, end + _FALLBACK_WINDOW)] (см. _describe):
+    # пересчитываем коды, у которых этот кусок задевает [dirty_lo, dirty_hi)
+    starts, ends = codes.starts, codes.ends
+
+    def next_start(n):
+        return starts[n + 1] if n + 1 < len(starts) else len(cleaned)
+
+    n = bisect.bisect_left(starts, dirty_lo)
+    while n > 0 and max(next_start(n - 1), ends[n - 1] + _FALLBACK_WINDOW) + 1 > dirty_lo:
+        n -= 1
+    for n in range(n, bisect.bisect_right(starts, dirty_hi)):
+        entries[n] = _describe(cleaned, starts[n], ends[n], next_start(n), stops, blanks)
+    competencies = dict(entry for entry in entries if entry is not None)
+    print("📘 Найдено компетенций:", len(competencies))
+
+    parsed = {
+        "disciplines": names,
+        "competencies": competencies,
+        "program_info": list(extract_program_info(doc)),
+    }
+    return parsed, {
+        "lines": lines, "length": len(text), "clean_length": len(cleaned),
+        "disciplines": disciplines.to_json(), "names": names,
+        "codes": codes.to_json(), "entries": entries,
+        "stops": found["stops"].to_json(), "blanks": found["blanks"].to_json(),
+    }
+
+
+def _block_key(block):
+    # абзац и строка таблицы из одной ячейки с тем же текстом должны различаться
+    return "\x1e" + block if isinstance(block, str) else "\x1f".join(block)
+
+
+_EMPTY_TABLES_STATE = {"blocks": [], "restart": [], "header_at": [], "disciplines": [], "competencies": []}
+
+
+def _tables_revision(blocks, state=None):
+    """То же, что _parse_competency_tables, по списку блоков, и состояние разбора для следующей версии.
+
+    Разбор начинается заново с последнего абзаца или строки дисциплины перед первым
+    изменившимся блоком и заканчивается на таком же блоке после изменений, если шапка
+    таблицы перед ним та же, что была: дальше всё как в прежней версии.
+    """
+    state = state or _EMPTY_TABLES_STATE
+    hashes = incremental.line_hashes(_block_key(block) for block in blocks)
+    first, old_end, new_end = incremental.changed_range(state["blocks"], hashes)
+    shift = new_end - old_end
+
+    restart = first - 1
+    while restart >= 0 and not state["restart"][restart]:
+        restart -= 1
+    if restart < 0:
+        rows = _TableRows()
+        restart = 0
+    else:
+        header_at = state["header_at"][restart]
+        rows = _TableRows(header_at, _header_codes([" ".join(c.split()) for c in blocks[header_at]])
+                          if header_at >= 0 else None)
+    restarts, header_before = state["restart"][:restart], state["header_at"][:restart]
+
+    def moved(n):
+        # номер блока прежней версии — в новой; None — блок изменился
+        if n < first:
+            return n
+        return n + shift if n >= old_end else None
+
+    tail = len(state["blocks"])
+    for n in range(restart, len(blocks)):
+        old = n - shift
+        if (n >= new_end and state["restart"][old]
+                and moved(state["header_at"][old]) == rows.header_at):
+            tail = old
+            break
+        header_before.append(rows.header_at)
+        restarts.append(rows.feed(n, blocks[n]))
+    rows.finish()
+
+    found = [rows.disciplines.get(n) for n in range(restart, len(restarts))]
+    disciplines = state["disciplines"][:restart] + found + state["disciplines"][tail:]
+    found = [rows.competencies.get(n, {}) for n in range(restart, len(restarts))]
+    by_block = state["competencies"][:restart] + found + state["competencies"][tail:]
+    restarts += state["restart"][tail:]
+    header_before += [moved(n) for n in state["header_at"][tail:]]
+
+    competencies = {}
+    for part in by_block:
+        competencies.update(part)
+    names = [name for name in disciplines if name is not None]
+    print("🔍 Найдено дисциплин в таблицах:", len(names))
+    print("📘 Найдено компетенций в таблицах:", len(competencies))
+    texts = (block if isinstance(block, str) else "\n\n".join(block) for block in blocks)
+    parsed = {
+        "disciplines": names,
+        "competencies": competencies,
+        "program_info": list(extract_program_info(ParsedDocument("\n\n".join(texts)))),
+    }
+    return parsed, {"blocks": hashes, "restart": restarts, "header_at": header_before,
+                    "disciplines": disciplines, "competencies": by_block}
+
+
+# ---------- ВОПРОСЫ ----------
+# Извлекатели разбирают раздел по строкам за один проход и дают те же вопросы,
+# что и прежние регулярные выражения (benchmarks/legacy.py), но без возвратов:
+# на длинных «битых» разделах те работали минутами.
+def _blank(line):
+    return not line or line.isspace()
+
+
+def _next_filled(lines):
+    """filled[i] — первая строка с i, где есть что-то кроме пробелов (len(lines), если таких нет)."""
+    filled = [len(lines)] * (len(lines) + 1)
+    for i in range(len(lines) - 1, -1, -1):
+        filled[i] = filled[i + 1] if _blank(lines[i]) else i
+    return filled
+
+
+def _normalize_options(options):
+    opts = [o.strip() for o in options.splitlines() if o.strip()]
+    return "\n".join(opts[:4])
+
+
+def _find_ev(text):
+    """Вопрос — строка, которая заканчивается на «?», варианты — до 8 строк после него."""
+    lines = text.split("\n")
+    last = len(lines) - 1
+    filled = _next_filled(lines)
+    found = []
+    i = 0
+    while i <= last - 3:
+        question = lines[i].rstrip()
+        if len(question) < 2 or not question.endswith("?"):
+            i += 1
+            continue
+        # пустые строки после вопроса пропускаются, но на варианты должно остаться хотя бы две
+        first = min(filled[i + 1], last - 2)
+        end = min(first + 8, last)
+        found.append((question.strip(), _normalize_options("\n".join(lines[first:end]))))
+        i = end
+    return found
+
+
+def _find_mv(text):
+    return _find_ev(text)
+
+
+def _find_chv(text):
+    """Строка с «(Введите ...)» в конце и ответ «= ...» на следующей непустой строке."""
+    lines = text.split("\n")
+    last = len(lines) - 1
+    filled = _next_filled(lines)
+    found = []
+    i = 0
+    while i < last:
+        question = lines[i].rstrip()
+        prompt = question.find("(Введите", 1)
+        answer_line = filled[i + 1]
+        if (prompt < 0 or not question.endswith(")") or len(question) < prompt + 10
+                or answer_line > last or not lines[answer_line].lstrip().startswith("=")):
+            i += 1
+            continue
+        rest = lines[answer_line].lstrip()[1:]
+        if not _blank(rest):
+            answer, end = rest.lstrip(), answer_line
+        elif filled[answer_line + 1] <= last:
+            end = filled[answer_line + 1]
+            answer = lines[end].lstrip()
+        else:
+            # после «=» только пробелы до конца текста — ответом становится последний из них
+            tail = [rest] + lines[answer_line + 1:]
+            end = max((j for j, chunk in enumerate(tail) if chunk), default=None)
+            if end is None:
+                i += 1
+                continue
+            answer, end = tail[end][-1], answer_line + end
+        found.append((question, answer))
+        i = end + 1
+    return found
+
+
+def _find_matching(text):
+    blocks = patterns.MATCHING_BLOCK.findall(text)
+    return [patterns.MULTI_NEWLINES.sub('\n', b).strip() for b in blocks]
+
+
+def _find_one_gap(text):
+    """Фрагменты строки до «(Введите ...)» включительно; в одной строке их может быть несколько."""
+    found = []
+    for line in text.split("\n"):
+        start = 0
+        while True:
+            prompt = line.find("(Введите", start + 1)
+            end = line.find(")", prompt + 9) if prompt >= 0 else -1
+            if end < 0:
+                break
+            found.append(line[start:end + 1])
+            start = end + 1
+    return found
+
+
+def _gap_template_start(line):
+    """Где начинается шаблон «... [[1]] ... [[2]] ...»: последний [[1]], после которого есть [[2]]."""
+    second = line.rfind("[[2]]")
+    return line.rfind("[[1]]", 0, second) if second >= 0 else -1
+
+
+def _find_two_gap(text):
+    """Вопрос — строка с [[1]] и [[2]] (с последнего [[1]]), варианты — строки до следующего такого вопроса."""
+    lines = text.split("\n")
+    starts = []
+    for i, line in enumerate(lines):
+        start = _gap_template_start(line)
+        if start >= 0:
+            starts.append((i, start))
+    results = []
+    for n, (i, start) in enumerate(starts):
+        line = lines[i]
+        if line.rfind("[[2]]") < start + 6:
+            continue  # между [[1]] и [[2]] нет ни одного символа
+        end = starts[n + 1][0] if n + 1 < len(starts) else len(lines)
+        block = "\n".join([line[start:], *lines[i + 1:end]]).strip()
+        main_part = line[start:].strip()
+        options = _two_gap_options(block)
+        options = "\n" + patterns.MULTI_NEWLINES.sub('\n', options).strip() if options else ""
+        results.append(f"{main_part}\n{options}".strip())
+    return results
+
+
+def _two_gap_options(block):
+    r"""Варианты «1 = ... 2 = ...» из блока вопроса (без пробелов по краям) или None.
+
+    Находит то же, что прежний шаблон
+    1\s*=\s*[^\n]+(?:\n\s*(?!\d=)[^\n]+)*\n\s*2\s*=\s*[^\n]+(?:\n\s*(?!\[\[)[^\n]+)*,
+    но без перебора с возвратами: для каждого перевода строки заранее, одним проходом
+    снизу вверх, известно, с какого перевода строки дальше начнётся «2 = ...».
+    """
+    lines = block.split("\n")
+    last = len(lines) - 1
+    filled = _next_filled(lines)
+
+    def after(i, col):
+        """Первый непробельный символ после (i, col), возможно на следующих строках, или None."""
+        match = patterns.NON_SPACE.search(lines[i], col + 1)
+        if match:
+            return i, match.start()
+        if i == last:
+            return None
+        i = filled[i + 1]
+        return i, len(lines[i]) - len(lines[i].lstrip())
+
+    def second_option(k):
+        """Строка, на которой кончается «2 = ...», начатое после строки k, или None."""
+        pos = filled[k + 1], len(lines[filled[k + 1]]) - len(lines[filled[k + 1]].lstrip())
+        if lines[pos[0]][pos[1]] != "2":
+            return None
+        pos = after(*pos)
+        if pos is None or lines[pos[0]][pos[1]] != "=":
+            return None
+        pos = after(*pos)
+        return None if pos is None else pos[0]
+
+    # reached[k]: после строки k могут идти строки-продолжения первого варианта, затем «2 = ...»;
+    # здесь — строка, после которой начинается «2 = ...» (как выбрал бы шаблон), или None
+    reached = [None] * last
+    blank_reached = None  # то же для нижней непустой строки из одних пробелов перед следующей строкой с текстом
+    for k in range(last - 1, -1, -1):
+        i = filled[k + 1]
+        head = lines[i].lstrip()
+        continues = len(head) < len(lines[i]) or not (head[0].isdecimal() and head[1:2] == "=")
+        if i < last and continues and reached[i] is not None:
+            reached[k] = reached[i]
+        elif blank_reached is not None:
+            reached[k] = blank_reached
+        elif second_option(k) is not None:
+            reached[k] = k
+        if not _blank(lines[k]):
+            blank_reached = None
+        elif lines[k] and blank_reached is None:
+            blank_reached = reached[k]
+
+    def first_option(i, col):
+        """Для «1» в (i, col): строка, после которой начинается «2 = ...», или None."""
+        pos = after(i, col)
+        if pos is None or lines[pos[0]][pos[1]] != "=":
+            return None
+        i, col = pos
+        if patterns.NON_SPACE.search(lines[i], col + 1):
+            return reached[i] if i < last else None
+        if i == last:
+            return None
+        below = filled[i + 1]
+        candidates = [below] if below < last else []
+        candidates += [k for k in range(below - 1, i, -1) if lines[k]]
+        if len(lines[i]) > col + 1:
+            candidates.append(i)
+        return next((reached[k] for k in candidates if reached[k] is not None), None)
+
+    def options_end(k):
+        """Последняя строка совпадения: «2 = ...» и строки после него до строки, начинающейся с «[[»."""
+        while k < last:
+            i = filled[k + 1]
+            head = lines[i].lstrip()
+            if len(head) < len(lines[i]) or not head.startswith("[["):
+                k = i
+                continue
+            blank = [j for j in range(i - 1, k, -1) if lines[j]]
+            if not blank:
+                break
+            k = blank[0]
+        return k
+
+    for i, line in enumerate(lines):
+        col = line.find("1")
+        while col >= 0:
+            start = first_option(i, col)
+            if start is not None:
+                end = options_end(second_option(start))
+                return "\n".join([line[col:], *lines[i + 1:end + 1]])
+            col = line.find("1", col + 1)
+    return None
+
+
+def _find_nested(text):
+    """Вопросы, разделённые строками-номерами (в строке только число)."""
+    lines = text.split("\n")
+    last = len(lines) - 1
+    filled = _next_filled(lines)
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line) + 1)
+
+    # number[i]: с начала строки i через пустые строки доходим до строки-номера — её индекс, иначе None
+    number = [None] * (last + 1)
+    for i in range(last - 1, -1, -1):
+        if lines[i].strip().isdecimal():
+            number[i] = i
+        elif _blank(lines[i]):
+            number[i] = number[i + 1]
+    # вопрос кончается перед переводом строки, за которым идёт номер, или в конце текста
+    stops = [starts[i] - 1 for i in range(1, last + 1) if number[i] is not None]
+    if text.endswith("\n"):
+        stops.append(len(text) - 1)
+    stops.append(len(text))
+
+    blocks = []
+    pos, line = 0, 0
+    while pos < len(text):
+        start = pos
+        k = number[line]
+        if k is not None:
+            # номер пропускается вместе с пустыми строками после него
+            below = min(filled[k + 1], last)
+            if starts[below] < len(text):
+                start = starts[below]
+            elif below - k >= 2:
+                start = starts[below - 1]
+        end = stops[bisect.bisect_left(stops, start + 1)]
+        blocks.append(text[start:end])
+        pos = end
+        line = bisect.bisect_right(starts, pos + 1) - 1
+    return [patterns.MULTI_NEWLINES.sub('\n', b).strip() for b in blocks if b.strip()]
+
+
+QUESTION_EXTRACTORS = {
+    "ЕВ": _find_ev, "МВ": _find_mv, "ЧВ": _find_chv,
+    "Соответствие": _find_matching,
+    "Одно пропущенное слово": _find_one_gap,
+    "Два пропущенных слова": _find_two_gap,
+    "Вложенные вопросы": _find_nested
+}
+
+
+def extract_questions(source):
+    """Все вопросы одним списком (разделы по порядку QUESTION_EXTRACTORS)."""
+    sections = extract_question_sections(source)
+    return [q for found in sections.values() for q in found], None
+
+
+@metrics.timed("extract_questions")
+def extract_question_sections(source):
+    """Вопросы по разделам: {раздел: [текст вопроса, ...]}; пустые разделы пропускаются."""
+    text = as_document(source).text
+    text = patterns.SPACES.sub(' ', text)
+    text = patterns.MULTI_NEWLINES.sub('\n\n', text)
+    categorized = split_sections(text)
+
+    sections = {}
+    for key, func in QUESTION_EXTRACTORS.items():
+        sec = categorized.get(key, "")
+        if not sec.strip():
+            continue
+        questions = sections[key] = []
+        for q in func(sec):
+            if isinstance(q, tuple):
+                q_text = f"{q[0]}\n{q[1]}"
+            else:
+                q_text = str(q)
+            questions.append(q_text.strip())
+
+    return sections
+
+
+def split_sections(text):
+    """Текст разделов банка вопросов: {раздел: строки после заголовка до следующего заголовка}.
+
+    Один проход по заголовкам, тексты разделов — срезы исходной строки.
+    Повторный заголовок заменяет раздел, текст до первого заголовка отбрасывается.
+    """
+    if patterns.OTHER_LINE_BREAK.search(text):
+        # заголовки ищутся построчно по \n — остальные переводы строк приводим к нему, как splitlines()
+        text = "\n".join(text.splitlines()) + "\n"
+    headers = list(patterns.QUESTION_SECTION.finditer(text))
+    sections = {}
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        body = text[header.end() + 1:end]
+        if body and not body.endswith("\n"):
+            body += "\n"
+        sections[header.group(1)] = body
+    return sections
+
+
+def competency_index(competencies):
+    """CompetencyIndex по словарю компетенций; готовый индекс возвращается как есть.
+
+    Для серии запросов по одному словарю индекс строит вызывающий — один раз,
+    до цикла (словарь после этого не должен меняться).
+    """
+    if isinstance(competencies, CompetencyIndex):
+        return competencies
+    return CompetencyIndex(competencies)
+
+
+def find_comp_desc(key, competencies):
+    """Ищет описание компетенции по ключу.
+    Стратегия: точное совпадение -> поиск ключей, начинающихся с key -> поиск по цифровой части -> None
+    """
+    # Разобранные файлы хранят индекс готовым; обычный словарь просматривается,
+    # индекс на один запрос строить дороже
+    if isinstance(competencies, CompetencyIndex):
+        return competencies.lookup(key)
+    if key in competencies:
+        return competencies[key]
+
+    # Более подробный ключ (УК5.3 -> УК5.3.1) или префикс; при равной длине — первый встреченный
+    best = None
+    for k in competencies:
+        if (k.startswith(key) or key.startswith(k)) and (best is None or len(k) > len(best)):
+            best = k
+    if best is not None:
+        return competencies[best]
+
+    # Сопоставление по цифровой части (например, 53 с 531); isdecimal — те же символы, что \d
+    digits = "".join(filter(str.isdecimal, key))
+    if digits:
+        for k, v in competencies.items():
+            if digits in "".join(filter(str.isdecimal, k)):
+                return v
+    return None
+
+
+# ---------- НАПРАВЛЕНИЕ ----------
+def extract_program_info(source):
+    """Извлекает направление и профиль из документа компетенций"""
+    full_text = as_document(source).text
+    direction = ""
+    profile = ""
+
+    match = patterns.PROGRAM_INFO.search(full_text)
+    if match:
+        direction = match.group(1).strip()
+        profile = match.group(2).strip()
+
+    return direction, profile
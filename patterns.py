@@ -0,0 +1,214 @@
+"""Все регулярные выражения парсеров, скомпилированные один раз при импорте.
+
+С переменной окружения REGEX_PROFILE=1 каждый шаблон оборачивается счётчиком:
+число вызовов и суммарное время совпадений записываются при выходе в файл
+REGEX_PROFILE_OUTPUT (по умолчанию regex_profile.txt) или доступны через
+profile_report(). Счётчики процессов-обработчиков (workers.ProcessPool)
+возвращаются родителю вместе с результатом задачи (drain_profile/merge_profile).
+"""
+import atexit
+import logging
+import os
+import re
+import time
+
+PROFILE = os.environ.get("REGEX_PROFILE") == "1"
+PROFILE_OUTPUT = os.environ.get("REGEX_PROFILE_OUTPUT", "regex_profile.txt")
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_stats = {}
+
+
+class _ProfiledPattern:
+    """Обёртка над re.Pattern, которая считает вызовы и время."""
+
+    __slots__ = ("name", "_pattern", "_stat")
+
+    def __init__(self, name, pattern):
+        self.name = name
+        self._pattern = pattern
+        self._stat = _stats.setdefault(name, [0, 0.0])
+
+    def __getattr__(self, attr):
+        return getattr(self._pattern, attr)
+
+    def _call(self, method, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return getattr(self._pattern, method)(*args, **kwargs)
+        finally:
+            self._stat[0] += 1
+            self._stat[1] += time.perf_counter() - t0
+
+    def search(self, *args, **kwargs):
+        return self._call("search", *args, **kwargs)
+
+    def match(self, *args, **kwargs):
+        return self._call("match", *args, **kwargs)
+
+    def fullmatch(self, *args, **kwargs):
+        return self._call("fullmatch", *args, **kwargs)
+
+    def findall(self, *args, **kwargs):
+        return self._call("findall", *args, **kwargs)
+
+    def sub(self, *args, **kwargs):
+        return self._call("sub", *args, **kwargs)
+
+    def subn(self, *args, **kwargs):
+        return self._call("subn", *args, **kwargs)
+
+    def split(self, *args, **kwargs):
+        return self._call("split", *args, **kwargs)
+
+    def finditer(self, *args, **kwargs):
+        # время считаем вместе с перебором: сами совпадения ищутся лениво
+        it = self._call("finditer", *args, **kwargs)
+        while True:
+            t0 = time.perf_counter()
+            m = next(it, None)
+            self._stat[1] += time.perf_counter() - t0
+            if m is None:
+                return
+            yield m
+
+
+def compile(name, pattern, flags=0):
+    """Компилирует шаблон и регистрирует его под уникальным именем."""
+    if name in _registry:
+        raise ValueError(f"Шаблон {name!r} уже зарегистрирован")
+    regex = re.compile(pattern, flags)
+    if PROFILE:
+        regex = _ProfiledPattern(name, regex)
+    _registry[name] = regex
+    return regex
+
+
+def get(name):
+    return _registry[name]
+
+
+def profile_report():
+    """Таблица: шаблон, вызовы, суммарное и среднее время — самые дорогие сверху."""
+    if not _stats:
+        return "Профилирование регулярных выражений выключено (REGEX_PROFILE=1)."
+    lines = [f"{'шаблон':<28} {'вызовы':>10} {'всего, мс':>12} {'среднее, мкс':>14}"]
+    for name, (calls, total) in sorted(_stats.items(), key=lambda kv: kv[1][1], reverse=True):
+        if not calls:
+            continue
+        avg = total / calls * 1e6
+        lines.append(f"{name:<28} {calls:>10} {total * 1e3:>12.2f} {avg:>14.2f}")
+    return "\n".join(lines)
+
+
+def reset_profile():
+    for stat in _stats.values():
+        stat[0], stat[1] = 0, 0.0
+
+
+def drain_profile():
+    """Забирает счётчики шаблонов (в процессе-обработчике — для отправки родителю); None — нечего отдавать."""
+    snapshot = {name: tuple(stat) for name, stat in _stats.items() if stat[0]}
+    reset_profile()
+    return snapshot or None
+
+
+def merge_profile(snapshot):
+    """Добавляет счётчики, полученные из drain_profile() другого процесса."""
+    for name, (calls, total) in (snapshot or {}).items():
+        stat = _stats.setdefault(name, [0, 0.0])
+        stat[0] += calls
+        stat[1] += total
+
+
+def _write_profile():
+    with open(PROFILE_OUTPUT, "w", encoding="utf-8") as f:
+        f.write(profile_report() + "\n")
+    logger.info("Профиль регулярных выражений записан в %s", PROFILE_OUTPUT)
+
+
+if PROFILE:
+    atexit.register(_write_profile)
+
+
+# ---------- ОБЩИЕ ----------
+SPACES = compile("spaces", r"[ \t]+")
+WHITESPACE = compile("whitespace", r"\s+")
+MULTI_NEWLINES = compile("multi_newlines", r"\n{2,}")
+# Коды: УК, ОПК, ПК с одной или несколькими точками в номере (напр. 5.3 или 5.3.1 и т.д.)
+COMPETENCY_CODE = compile("competency_code", r"((?:УК|ОПК|ПК)\s*\d+(?:\.\d+)*)")
+COMPETENCY_BASE = compile("competency_base", r"((?:УК|ОПК|ПК)\s*\d+)")
+NON_DIGITS = compile("non_digits", r"\D")
+
+# ---------- ДИСЦИПЛИНЫ ----------
+# Поддерживаем УК, ОПК и ПК в скобках у дисциплины
+DISCIPLINE = compile(
+    "discipline",
+    r"(Б\d{1,2}[А-ЯA-Za-zа-яёЁ]*\s*\d*\s*[А-ЯA-Za-zа-яёЁ0-9,\-–\s]+?\((?:УК|ОПК|ПК)\s*[\d.\sА-Яа-яA-ZazlёЁ]*\))"
+)
+# Ячейка таблицы с кодом дисциплины: Б1.О.01, Б2О00 и т.п.
+DISCIPLINE_CODE = compile("discipline_code", r"Б\d")
+
+# ---------- КОМПЕТЕНЦИИ ----------
+# Маркеры границ блоков, которые не являются описанием компетенции — одна альтернатива вместо 11 поисков
+_STOP_WORDS = r"Дисциплины|ФГОС|ПС|Б3ГИА|Директор|Заведующий|Преподаватель|Связь со стандартами"
+STOP_MARKER = compile(
+    "stop_marker",
+    r"\n\s*Б\d"          # следующая дисциплина начинается с Б1...
+    r"|\n\s*№\s"         # табличная нумерация/заголовок
+    r"|Код и наименование"
+    r"|\b(?:" + _STOP_WORDS + r")\b"
+)
+# В срезе text[start:end] граница слова в самом начале есть всегда — проверяем её отдельно
+STOP_MARKER_AT_START = compile("stop_marker_at_start", r"(?:" + _STOP_WORDS + r")\b")
+BLANK_LINE = compile("blank_line", r"\n\s*\n")
+SENTENCE_END = compile("sentence_end", r"([\.\!?])\s+")
+LEADING_SEPARATORS = compile("leading_separators", r"^[\s:;\-–—]+")
+TRAILING_SEPARATORS = compile("trailing_separators", r"[\-–—\)\(\[\]:;\.,]+$")
+CODE_TAIL = compile("code_tail", r"[\.,;:\)\]]+$")
+HAS_LETTERS = compile("has_letters", r"[А-Яа-яA-Za-z]")
+# подстроки для усечения описания
+STOP_SUBSTRING = compile("stop_substring", "|".join(map(re.escape, [
+    '\nБ', '\n№', '№ ', 'Код и наименование', 'Дисциплины', 'ФГОС', 'ПС ', 'Б3ГИА',
+    'Директор', 'Заведующий', 'Преподаватель', 'Связь со стандартами', 'ПК-', 'УК-', 'ОПК-'
+])))
+HEADER_LINE = compile(
+    "header_line",
+    r"^(?:Б\d|№\s|Код и наименование|Дисциплины|ФГОС|ПС\b|Б3ГИА|Директор|Заведующий|Преподаватель|Связь со стандартами|ПК-|УК-|ОПК-)"
+)
+# Часто встречающиеся артефакты (закрывающая скобка + следующий блок, эмодзи и т.п.)
+ARTIFACT = compile("artifact", r"\)\s*Б\d|\)\s*Б|\)\s*№|📘|📗|⚠️|№\s*Код|ФГОС|ПС\s*\d|Б3ГИА")
+
+# ---------- ВОПРОСЫ ----------
+MATCHING_BLOCK = compile(
+    "matching_block", r"(Установите соответствие.+?(?=(?:\nУстановите соответствие|$)))", re.DOTALL
+)
+NON_SPACE = compile("non_space", r"\S")
+# Строка-заголовок раздела банка вопросов (те же названия, что question_bank.QUESTION_SECTIONS)
+QUESTION_SECTION = compile(
+    "question_section",
+    r"^[^\S\n]*(ЕВ|МВ|ЧВ|Соответствие|Одно пропущенное слово|Два пропущенных слова|Вложенные вопросы)[^\S\n]*$",
+    re.MULTILINE
+)
+# Символы, которые str.splitlines() тоже считает концом строки
+OTHER_LINE_BREAK = compile("other_line_break", r"[\r\v\f\x1c-\x1e\x85\u2028\u2029]")
+
+# ---------- НАПРАВЛЕНИЕ И ГЕНЕРАЦИЯ ----------
+# Строка вида: "по направлению 09.03.01   Информатика и вычислительная техника, профиль - ЭВМ, комплексы, системы и сети"
+PROGRAM_INFO = compile(
+    "program_info",
+    r"по\s+направлению\s+([\d\.]+\s*[А-Яа-яA-ZazlёЁ\s,]+?)\s*,?\s*профиль\s*[-–—]\s*([А-Яа-яA-ZazlёЁ\s,]+)"
+)
+ENROLLMENT_YEAR = compile("enrollment_year", r"год[^\n]*", re.IGNORECASE)
+DISCIPLINE_NAME = compile("discipline_name", r"(Б\d+[А-ЯA-Zazlа-яёЁ0-9\s,\-–]+)")
+DASH_PREFIX = compile("dash_prefix", r"^\s*[–-]?\s*")
+UNSAFE_FILENAME_CHAR = compile("unsafe_filename_char", r"[^A-Za-zА-Яа-я0-9]")
+
+# ---------- ПОВТОРНЫЙ РАЗБОР ----------
+# Символы, на которых останавливается любая попытка совпадения шаблона (incremental.py):
+# левее такого символа поиск можно не повторять. Меняете COMPETENCY_CODE или DISCIPLINE — поправьте и их.
+CODE_BARRIER = compile("code_barrier", r"[^УКОП\s\d.]")
+# «)» завершает дисциплину, остальные — символы, которых в ней не бывает
+DISCIPLINE_BARRIER = compile("discipline_barrier", r"[^А-Яа-яёЁA-Za-z\d\s,\-–.(]")
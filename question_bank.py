@@ -0,0 +1,134 @@
+"""Банк вопросов: разобранные вопросы по разделам и быстрая выборка.
+
+Банк строится один раз на загруженный файл. Вопросы хранятся компактными
+записями, одинаковые (с точностью до пробелов и регистра) — один раз.
+Выборка k вопросов стоит O(k) и может соблюдать квоты по разделам.
+"""
+import hashlib
+import random
+from array import array
+
+# Разделы банка вопросов в порядке файла
+QUESTION_SECTIONS = (
+    "ЕВ", "МВ", "ЧВ", "Соответствие",
+    "Одно пропущенное слово", "Два пропущенных слова", "Вложенные вопросы"
+)
+
+# Квоты из первой версии бота (database.py): 15 вопросов разных типов
+SELECTION = {
+    "ЕВ": 4, "МВ": 4, "ЧВ": 2,
+    "Соответствие": 1, "Одно пропущенное слово": 2,
+    "Два пропущенных слова": 1, "Вложенные вопросы": 1,
+}
+
+
+def question_hash(text):
+    """Хэш для поиска повторов: без учёта пробелов и регистра."""
+    normalized = " ".join(text.split()).casefold()
+    return int.from_bytes(hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def parse_quotas(spec):
+    """Квоты из строки «ЕВ:4,МВ:4,...»; «selection» — таблица SELECTION; пустая строка — без квот.
+
+    ValueError с ошибочной частью строки — если раздел пуст или неизвестен
+    (не из QUESTION_SECTIONS) или число не целое неотрицательное.
+    """
+    spec = spec.strip()
+    if not spec:
+        return None
+    if spec == "selection":
+        return dict(SELECTION)
+    quotas = {}
+    for item in spec.split(","):
+        section, _, count = item.rpartition(":")
+        section, count = section.strip(), count.strip()
+        if not section or not count.isdecimal():
+            raise ValueError(f"Квота «{item.strip()}»: нужно «раздел:число», число — целое, не меньше 0")
+        if section not in QUESTION_SECTIONS:
+            raise ValueError(f"Квота «{item.strip()}»: неизвестный раздел, есть {', '.join(QUESTION_SECTIONS)}")
+        quotas[section] = int(count)
+    return quotas
+
+
+class Question:
+    __slots__ = ("section", "text", "length", "digest")
+
+    def __init__(self, section, text, digest=None):
+        self.section = section
+        self.text = text
+        self.length = len(text)
+        self.digest = question_hash(text) if digest is None else digest
+
+    def __repr__(self):
+        return f"Question({self.section!r}, {self.text[:30]!r})"
+
+
+class QuestionBank:
+    """Вопросы по разделам. sections — {раздел: [текст, ...]} в порядке разделов файла."""
+
+    def __init__(self, sections):
+        self.questions = []
+        self.by_section = {}
+        seen = set()
+        for section, texts in sections.items():
+            ids = array("I")
+            for text in texts:
+                question = Question(section, text)
+                if question.digest in seen:
+                    continue
+                seen.add(question.digest)
+                ids.append(len(self.questions))
+                self.questions.append(question)
+            self.by_section[section] = ids
+        self.total_length = sum(q.length for q in self.questions)
+
+    @classmethod
+    def from_list(cls, texts):
+        """Банк из плоского списка вопросов (без разделов)."""
+        return cls({None: texts})
+
+    def __len__(self):
+        return len(self.questions)
+
+    def __iter__(self):
+        return iter(self.questions)
+
+    def texts(self):
+        return [q.text for q in self.questions]
+
+    def counts(self):
+        """Сколько вопросов в каждом разделе."""
+        return {section: len(ids) for section, ids in self.by_section.items()}
+
+    def sample(self, k, quotas=None, rng=random):
+        """k разных вопросов (тексты).
+
+        Без квот — равномерно из всего банка, как random.sample по списку.
+        С квотами — сначала из разделов по квотам (в разделе меньше вопросов —
+        берутся все), недостающие до k — из остальных; порядок перемешивается.
+        """
+        n = len(self.questions)
+        k = min(k, n)
+        if not quotas:
+            return [self.questions[i].text for i in rng.sample(range(n), k)]
+
+        chosen = []
+        for section, count in quotas.items():
+            ids = self.by_section.get(section, ())
+            chosen.extend(ids[j] for j in rng.sample(range(len(ids)), min(count, len(ids))))
+        chosen = chosen[:k]
+        if len(chosen) < k:
+            taken = set(chosen)
+            if n <= 4 * k:
+                rest = [i for i in range(n) if i not in taken]
+                chosen.extend(rng.sample(rest, k - len(chosen)))
+            else:
+                # банк намного больше выборки — отбрасываем повторы, в среднем O(k)
+                while len(chosen) < k:
+                    i = rng.randrange(n)
+                    if i not in taken:
+                        taken.add(i)
+                        chosen.append(i)
+        rng.shuffle(chosen)
+        return [self.questions[i].text for i in chosen]
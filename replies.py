@@ -0,0 +1,166 @@
+"""Тексты ответов бота, общие для main.py (потоки) и aiobot.py (asyncio)."""
+import threading
+from collections import OrderedDict
+
+from telebot import types
+
+import patterns
+from parsers import competency_index, find_comp_desc
+from search_index import CompetencyIndex, DisciplineIndex
+from workers import JobCancelled, JobTimeout, QueueFull
+
+# Предел длины одной части длинного ответа
+MAX_PART = 3500
+
+# Индексы для поиска и банки вопросов строятся в каждом процессе; ключ — пользователь и хэш файла
+_INDEX_CACHE_SIZE = 256
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+# ---------- КЛАВИАТУРА ----------
+def main_keyboard():
+    kb = types.ReplyKeyboardMarkup(resize_keyboard=True)
+    kb.row("📘 Загрузить компетенции", "🧩 Загрузить вопросы")
+    kb.row("🗑 Удалить все файлы")
+    kb.row("🧠 Сгенерировать файлы")
+    return kb
+
+
+# ---------- ТЕКСТЫ ----------
+def greeting(first_name):
+    return (
+        f"👋 Привет, {first_name or 'пользователь'}!\n\n"
+        "Я бот для поиска и генерации файлов по компетенциям 📄\n\n"
+        "1️⃣ Загрузите файл с компетенциями (.docx)\n"
+        "2️⃣ Загрузите файл с вопросами (.docx)\n"
+        "3️⃣ Введите часть названия дисциплины (например: *иностр*, *командн*, *информ*)\n"
+        "4️⃣ Нажмите 🧠 *Сгенерировать файлы*\n\n"
+        "Я создам Word-файлы только по найденным дисциплинам 📘"
+    )
+
+
+def competencies_reply(found, competencies):
+    """Описания компетенций по найденным дисциплинам."""
+    competencies = competency_index(competencies)
+    response_lines = []
+    for d in found:
+        response_lines.append(f"📘 *{d}*")
+        # ищем все типы компетенций (УК, ОПК, ПК) — поддержка глубины индексации (напр. 5.3.1)
+        comp_codes = patterns.COMPETENCY_CODE.findall(d)
+        if not comp_codes:
+            response_lines.append("⚠️ Нет компетенций для этой дисциплины.\n")
+            continue
+        for comp in comp_codes:
+            comp_key = comp.replace(" ", "")
+            desc = find_comp_desc(comp_key, competencies)
+            if desc:
+                response_lines.append(f"📗 {desc}")
+            else:
+                response_lines.append(f"⚠️ {comp} — описание не найдено.")
+        response_lines.append("")
+    return "📖 *Компетенции, связанные с найденными дисциплинами:*\n\n" + "\n".join(response_lines)
+
+
+def job_error_text(error):
+    """Почему тяжёлая задача не выполнена — для пользователя."""
+    if isinstance(error, QueueFull):
+        return "⏳ Предыдущая обработка ещё не закончилась, подождите."
+    if isinstance(error, JobTimeout):
+        return "⚠️ Файл обрабатывается слишком долго — обработка остановлена."
+    if isinstance(error, JobCancelled):
+        return "🛑 Обработка отменена."
+    return "⚠️ Не удалось обработать файл. Попробуйте ещё раз."
+
+
+def split_long_message(text):
+    """Части длинного текста не длиннее MAX_PART (безопасно для Telegram)."""
+    # Разбиваем по параграфам, чтобы сохранять логические разделы
+    paragraphs = text.split('\n\n')
+    parts = []
+    cur = ''
+    for p in paragraphs:
+        p = p.strip()
+        if not p:
+            continue
+        candidate = (cur + '\n\n' + p) if cur else p
+        if len(candidate) <= MAX_PART:
+            cur = candidate
+            continue
+        # candidate too big
+        if cur:
+            parts.append(cur)
+            cur = ''
+        # если один параграф сам по себе слишком большой — разбиваем по строкам
+        if len(p) <= MAX_PART:
+            cur = p
+        else:
+            lines = p.split('\n')
+            cur2 = ''
+            for ln in lines:
+                ln = ln.strip()
+                if not ln:
+                    continue
+                cand2 = (cur2 + '\n' + ln) if cur2 else ln
+                if len(cand2) <= MAX_PART:
+                    cur2 = cand2
+                else:
+                    if cur2:
+                        parts.append(cur2)
+                    # если одна строка длиннее MAX_PART — режем её
+                    if len(ln) > MAX_PART:
+                        for i in range(0, len(ln), MAX_PART):
+                            parts.append(ln[i:i+MAX_PART])
+                        cur2 = ''
+                    else:
+                        cur2 = ln
+            if cur2:
+                cur = cur2
+    if cur:
+        parts.append(cur)
+    return parts
+
+
+# ---------- ИНДЕКСЫ ----------
+def store_parsed(data, parsed):
+    """Сохраняет результат разбора в сессию пользователя.
+
+    Хэш разобранного файла запоминается: после загрузки новой версии заново
+    разбираются только изменившиеся абзацы (parse_competencies_file, previous).
+    """
+    data.update(parsed)
+    data["competencies_parsed_digest"] = data.get("competencies_digest")
+    return parsed["disciplines"], parsed["competencies"]
+
+
+def user_indexes(data):
+    """Индексы компетенций и дисциплин пользователя; строятся один раз на процесс и файл."""
+    return cached_index(
+        ("competencies", data.user_id, data.get("competencies_digest")),
+        lambda: (CompetencyIndex(data["competencies"]), DisciplineIndex(data["disciplines"]))
+    )
+
+
+def bank_key(data):
+    """Ключ банка вопросов пользователя в кэше индексов."""
+    return "questions", data.user_id, data.get("questions_digest")
+
+
+def cached(key):
+    """Уже построенный индекс или банк вопросов; None — ещё нет."""
+    with _indexes_lock:
+        return _indexes.get(key)
+
+
+def cached_index(key, build):
+    with _indexes_lock:
+        value = _indexes.get(key)
+        if value is not None:
+            _indexes.move_to_end(key)
+            return value
+    value = build()
+    with _indexes_lock:
+        _indexes[key] = value
+        while len(_indexes) > _INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return value
@@ -0,0 +1,154 @@
+"""Индексы для поиска по распарсенному файлу компетенций."""
+import bisect
+from array import array
+from collections import defaultdict
+from collections.abc import Mapping
+
+import patterns
+
+# Сколько самых коротких списков пересекать; остальное проверяется подстрокой
+_MAX_INTERSECT = 3
+
+
+def _normalize_code(code):
+    return code.replace(" ", "").replace("-", "").upper()
+
+
+class DisciplineIndex:
+    """Индекс дисциплин: строчные названия, n-граммы для подстрок и коды компетенций.
+
+    search() возвращает то же, что [d for d in disciplines if query in d.lower()],
+    но проверяет подстрокой только кандидатов из пересечения списков n-грамм.
+    """
+
+    def __init__(self, disciplines):
+        self.disciplines = list(disciplines)
+        self.lowered = [d.lower() for d in self.disciplines]
+
+        grams = defaultdict(list)
+        codes = defaultdict(list)
+        for i, name in enumerate(self.lowered):
+            own = {name[j:j + 2] for j in range(len(name) - 1)}
+            own.update(name[j:j + 3] for j in range(len(name) - 2))
+            for g in own:
+                grams[g].append(i)
+            for code in {_normalize_code(c) for c in patterns.COMPETENCY_CODE.findall(self.disciplines[i])}:
+                codes[code].append(i)
+        self._grams = {g: array("I", ids) for g, ids in grams.items()}
+        self._codes = {c: array("I", ids) for c, ids in codes.items()}
+        self._sorted_codes = sorted(self._codes)
+
+    def __len__(self):
+        return len(self.disciplines)
+
+    def search(self, query):
+        """Дисциплины, в названии которых встречается query (без учёта регистра)."""
+        q = query.lower()
+        if len(q) < 2:
+            return [d for d, low in zip(self.disciplines, self.lowered) if q in low]
+        if len(q) == 2:
+            # список биграммы и есть точный ответ
+            return [self.disciplines[i] for i in self._grams.get(q, ())]
+
+        postings = []
+        for g in {q[j:j + 3] for j in range(len(q) - 2)}:
+            ids = self._grams.get(g)
+            if ids is None:
+                return []
+            postings.append(ids)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for ids in postings[1:_MAX_INTERSECT]:
+            candidates.intersection_update(ids)
+            if not candidates:
+                return []
+        lowered = self.lowered
+        return [self.disciplines[i] for i in sorted(candidates) if q in lowered[i]]
+
+    def by_code(self, code):
+        """Дисциплины с компетенцией code или её индикаторами (УК5 -> УК5.1, УК5.3.1 ...)."""
+        key = _normalize_code(code)
+        if not patterns.COMPETENCY_CODE.fullmatch(key):
+            return []
+        ids = set(self._codes.get(key, ()))
+        child = key + "."
+        pos = bisect.bisect_left(self._sorted_codes, child)
+        while pos < len(self._sorted_codes) and self._sorted_codes[pos].startswith(child):
+            ids.update(self._codes[self._sorted_codes[pos]])
+            pos += 1
+        return [self.disciplines[i] for i in sorted(ids)]
+
+
+class _TrieNode:
+    __slots__ = ("children", "best", "rank")
+
+    def __init__(self):
+        self.children = {}
+        self.best = None   # ранг самого длинного ключа в поддереве
+        self.rank = None   # ранг ключа, который заканчивается в этом узле
+
+
+class CompetencyIndex(Mapping):
+    """Словарь компетенций (только для чтения) с быстрым find_comp_desc.
+
+    Префиксное дерево ключей отвечает на «самый специфичный ключ» за O(len(key)),
+    а заранее посчитанные цифровые подстроки — на поиск по цифрам за O(1).
+    """
+
+    def __init__(self, competencies):
+        self._data = dict(competencies)
+        self._keys = list(self._data)
+        self._root = _TrieNode()
+        self._digits = {}
+
+        for rank, key in enumerate(self._keys):
+            node = self._root
+            self._offer(node, rank)
+            for ch in key:
+                node = node.children.get(ch) or node.children.setdefault(ch, _TrieNode())
+                self._offer(node, rank)
+            node.rank = rank
+
+            digits = patterns.NON_DIGITS.sub("", key)
+            for i in range(len(digits)):
+                for j in range(i + 1, len(digits) + 1):
+                    self._digits.setdefault(digits[i:j], rank)
+
+    def _offer(self, node, rank):
+        # при равной длине побеждает ключ, встретившийся раньше (как max() по словарю)
+        if node.best is None or len(self._keys[rank]) > len(self._keys[node.best]):
+            node.best = rank
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def lookup(self, key):
+        """Точное совпадение -> самый длинный ключ-продолжение или ключ-префикс -> по цифрам -> None."""
+        if key in self._data:
+            return self._data[key]
+
+        node = self._root
+        prefix = node.rank
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                break
+            if node.rank is not None:
+                prefix = node.rank
+        else:
+            # есть ключи, начинающиеся с key (например, УК5.3 -> УК5.3.1) — они длиннее любого префикса
+            if node.best is not None:
+                return self._data[self._keys[node.best]]
+        if prefix is not None:
+            return self._data[self._keys[prefix]]
+
+        digits = patterns.NON_DIGITS.sub("", key)
+        if digits and digits in self._digits:
+            return self._data[self._keys[self._digits[digits]]]
+        return None
@@ -0,0 +1,345 @@
+"""Состояние пользователей: режим, хэши загруженных файлов и результаты разбора.
+
+Хранилища взаимозаменяемы (см. open_store):
+  memory — в памяти процесса, не больше max_users сессий, устаревают через ttl;
+  sqlite — файл SQLite, общий для всех процессов gunicorn, переживает перезапуск;
+  shelve — файл dbm, переживает перезапуск, но только для одного процесса.
+
+Результаты разбора (ARTIFACTS) хранятся отдельно от мелких полей, сжатыми,
+и читаются только при первом обращении. Значения должны сериализоваться в JSON;
+индексы для поиска каждый процесс строит сам.
+"""
+import abc
+import atexit
+import contextlib
+import json
+import os
+import shelve
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировки между процессами недоступны
+    fcntl = None
+
+# Крупные результаты разбора: хранятся сжатыми и загружаются лениво
+ARTIFACTS = ("disciplines", "competencies", "program_info")
+
+
+def _encode(value):
+    return zlib.compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _decode(blob):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class Session(MutableMapping):
+    """Данные одного пользователя; каждое изменение сразу записывается в хранилище."""
+
+    def __init__(self, store, user_id, record=None):
+        record = record or {}
+        self._store = store
+        self.user_id = user_id
+        self._fields = dict(record.get("fields", ()))
+        self._stored = set(record.get("artifacts", ()))
+        self._loaded = {}
+
+    # ---------- ЧТЕНИЕ ----------
+    def __getitem__(self, key):
+        if key not in ARTIFACTS:
+            return self._fields[key]
+        if key not in self._stored:
+            raise KeyError(key)
+        if key not in self._loaded:
+            blob = self._store._read_artifact(self.user_id, key)
+            if blob is None:
+                # хранилище успело вытеснить данные — считаем, что их нет
+                self._stored.discard(key)
+                raise KeyError(key)
+            self._loaded[key] = _decode(blob)
+        return self._loaded[key]
+
+    def __contains__(self, key):
+        return key in self._stored if key in ARTIFACTS else key in self._fields
+
+    def __iter__(self):
+        yield from self._fields
+        yield from (key for key in ARTIFACTS if key in self._stored)
+
+    def __len__(self):
+        return len(self._fields) + len(self._stored)
+
+    # ---------- ИЗМЕНЕНИЕ ----------
+    def __setitem__(self, key, value):
+        self._set(key, value)
+        self._save()
+
+    def __delitem__(self, key):
+        if not self._remove(key):
+            raise KeyError(key)
+        self._save()
+
+    def update(self, other=(), **kwargs):
+        """Записывает несколько значений, сохраняя сессию один раз."""
+        for key, value in dict(other, **kwargs).items():
+            self._set(key, value)
+        self._save()
+
+    def discard(self, *keys):
+        """Удаляет несколько ключей одной записью."""
+        if sum(self._remove(key) for key in keys):
+            self._save()
+
+    def _set(self, key, value):
+        if key in ARTIFACTS:
+            self._store._write_artifact(self.user_id, key, _encode(value))
+            self._stored.add(key)
+            self._loaded[key] = value
+        else:
+            self._fields[key] = value
+
+    def _remove(self, key):
+        if key in ARTIFACTS:
+            if key not in self._stored:
+                return False
+            self._stored.discard(key)
+            self._loaded.pop(key, None)
+            self._store._delete_artifact(self.user_id, key)
+            return True
+        if key not in self._fields:
+            return False
+        del self._fields[key]
+        return True
+
+    def _save(self):
+        self._store._write(self.user_id, {"fields": self._fields, "artifacts": sorted(self._stored)})
+
+
+class SessionStore(abc.ABC):
+    """Общая часть хранилищ; наследники реализуют чтение и запись записей и артефактов."""
+
+    lock_dir = None
+    # Файлов блокировок — постоянное число, а не по одному на пользователя: иначе каталог
+    # только растёт. Пользователи с одним номером изредка ждут друг друга.
+    lock_stripes = 1024
+
+    def get(self, user_id):
+        return Session(self, user_id, self._read(user_id))
+
+    @abc.abstractmethod
+    def delete(self, user_id):
+        """Удаляет сессию пользователя вместе с артефактами."""
+
+    @contextlib.contextmanager
+    def lock(self, user_id):
+        """Не даёт двум процессам одновременно обрабатывать обновления одного пользователя."""
+        if fcntl is None or self.lock_dir is None:
+            yield
+            return
+        os.makedirs(self.lock_dir, exist_ok=True)
+        stripe = zlib.crc32(str(user_id).encode()) % self.lock_stripes
+        with open(os.path.join(self.lock_dir, f"{stripe:04d}.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @abc.abstractmethod
+    def _read(self, user_id):
+        """Запись сессии {"fields": ..., "artifacts": [...]} или None."""
+
+    @abc.abstractmethod
+    def _write(self, user_id, record):
+        """Сохраняет запись сессии."""
+
+    @abc.abstractmethod
+    def _read_artifact(self, user_id, name):
+        """Сжатый артефакт (bytes) или None."""
+
+    @abc.abstractmethod
+    def _write_artifact(self, user_id, name, blob):
+        """Сохраняет сжатый артефакт."""
+
+    @abc.abstractmethod
+    def _delete_artifact(self, user_id, name):
+        """Удаляет артефакт; отсутствующий — не ошибка."""
+
+
+class MemorySessions(SessionStore):
+    """Сессии в памяти процесса: не больше max_users, давно не тронутые (ttl, с) удаляются."""
+
+    def __init__(self, max_users=10000, ttl=86400):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> [истекает, запись, {имя: сжатые данные}]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def delete(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def _entry(self, user_id, create=False):
+        now = time.monotonic()
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] <= now:
+            del self._entries[user_id]
+            entry = None
+        if entry is None:
+            if not create:
+                return None
+            entry = self._entries[user_id] = [0, {}, {}]
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(user_id)
+        entry[0] = now + self.ttl
+        return entry
+
+    def _read(self, user_id):
+        with self._lock:
+            entry = self._entry(user_id)
+            return entry[1] if entry is not None else None
+
+    def _write(self, user_id, record):
+        record = {"fields": dict(record["fields"]), "artifacts": list(record["artifacts"])}
+        with self._lock:
+            self._entry(user_id, create=True)[1] = record
+
+    def _read_artifact(self, user_id, name):
+        with self._lock:
+            entry = self._entry(user_id)
+            return entry[2].get(name) if entry is not None else None
+
+    def _write_artifact(self, user_id, name, blob):
+        with self._lock:
+            self._entry(user_id, create=True)[2][name] = blob
+
+    def _delete_artifact(self, user_id, name):
+        with self._lock:
+            entry = self._entry(user_id)
+            if entry is not None:
+                entry[2].pop(name, None)
+
+
+class SqliteSessions(SessionStore):
+    """Сессии в одном файле SQLite (журнал WAL, соединение на поток)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_dir = path + ".locks"
+        self._local = threading.local()
+        # соединение только на время создания таблиц: после fork его нельзя использовать
+        db = sqlite3.connect(path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS users (user_id INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+            db.execute("CREATE TABLE IF NOT EXISTS artifacts ("
+                       "user_id INTEGER, name TEXT, data BLOB NOT NULL, PRIMARY KEY (user_id, name))")
+            db.commit()
+        finally:
+            db.close()
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=30)
+            # с журналом WAL этого достаточно, чтобы не терять данные при падении процесса
+            db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _execute(self, sql, params):
+        db = self._db()
+        with db:
+            db.execute(sql, params)
+
+    def delete(self, user_id):
+        db = self._db()
+        with db:
+            db.execute("DELETE FROM artifacts WHERE user_id = ?", (user_id,))
+            db.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+
+    def _read(self, user_id):
+        row = self._db().execute("SELECT data FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write(self, user_id, record):
+        self._execute("INSERT OR REPLACE INTO users (user_id, data) VALUES (?, ?)",
+                      (user_id, json.dumps(record, ensure_ascii=False)))
+
+    def _read_artifact(self, user_id, name):
+        row = self._db().execute("SELECT data FROM artifacts WHERE user_id = ? AND name = ?",
+                                 (user_id, name)).fetchone()
+        return row[0] if row else None
+
+    def _write_artifact(self, user_id, name, blob):
+        self._execute("INSERT OR REPLACE INTO artifacts (user_id, name, data) VALUES (?, ?, ?)",
+                      (user_id, name, blob))
+
+    def _delete_artifact(self, user_id, name):
+        self._execute("DELETE FROM artifacts WHERE user_id = ? AND name = ?", (user_id, name))
+
+
+class ShelveSessions(SessionStore):
+    """Сессии в файле dbm через shelve. dbm не рассчитан на несколько процессов сразу.
+
+    Оглавление dbm.dumb (если другого dbm нет) записывается при закрытии,
+    поэтому хранилище закрывается при выходе из процесса.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_dir = path + ".locks"
+        self._lock = threading.Lock()
+        self._shelf = shelve.open(path)
+        atexit.register(self.close)
+
+    def close(self):
+        with self._lock:
+            self._shelf.close()
+
+    def delete(self, user_id):
+        with self._lock:
+            record = self._shelf.pop(str(user_id), None)
+            for name in (record or {}).get("artifacts", ()):
+                self._shelf.pop(f"{user_id}:{name}", None)
+
+    def _read(self, user_id):
+        with self._lock:
+            return self._shelf.get(str(user_id))
+
+    def _write(self, user_id, record):
+        with self._lock:
+            self._shelf[str(user_id)] = record
+
+    def _read_artifact(self, user_id, name):
+        with self._lock:
+            return self._shelf.get(f"{user_id}:{name}")
+
+    def _write_artifact(self, user_id, name, blob):
+        with self._lock:
+            self._shelf[f"{user_id}:{name}"] = blob
+
+    def _delete_artifact(self, user_id, name):
+        with self._lock:
+            self._shelf.pop(f"{user_id}:{name}", None)
+
+
+def open_store(kind, path=None, max_users=10000, ttl=86400):
+    """Хранилище по имени: memory, sqlite или shelve."""
+    if kind == "memory":
+        return MemorySessions(max_users, ttl)
+    if kind == "sqlite":
+        return SqliteSessions(path)
+    if kind == "shelve":
+        return ShelveSessions(path)
+    raise ValueError(f"Неизвестное хранилище сессий: {kind}")
@@ -0,0 +1,70 @@
+"""Режим вебхука: WSGI-приложение для gunicorn.
+
+Запуск (состояние пользователей общее — в SQLite, см. config.SESSION_DB):
+    WEB_CONCURRENCY=4 gunicorn -b 0.0.0.0:8080 webhook:app
+Число процессов задаётся через WEB_CONCURRENCY, а не -w: по нему каждый процесс
+берёт себе свою долю JOB_WORKERS, иначе каждый запустит пул на все ядра машины.
+С METRICS_PORT каждый процесс отдаёт свои /metrics на своём порту
+(METRICS_PORT … METRICS_PORT + WEB_CONCURRENCY - 1): сервер метрик запускает
+хук post_fork из gunicorn.conf.py, который gunicorn читает из текущего каталога.
+Регистрация адреса у Telegram (WEBHOOK_URL — публичный адрес сервера):
+    python webhook.py
+
+Ответ Telegram отдаётся сразу после постановки обновления в очередь,
+обработчики из main.py выполняются в рабочих потоках процесса. Поэтому
+доставка — не больше одного раза: обновление, которое процесс принял, но не
+успел обработать (перезапуск, падение), Telegram повторно не пришлёт.
+"""
+import hmac
+import json
+import logging
+
+from telebot import types
+
+import config
+from main import bot
+
+logger = logging.getLogger(__name__)
+
+# Обновления от Telegram небольшие; всё крупнее — не от него
+MAX_BODY = 1 << 20
+
+
+def _respond(start_response, status, body=b""):
+    start_response(status, [("Content-Type", "text/plain"), ("Content-Length", str(len(body)))])
+    return [body]
+
+
+def app(environ, start_response):
+    if environ.get("PATH_INFO") != config.WEBHOOK_PATH:
+        return _respond(start_response, "404 Not Found")
+    if environ.get("REQUEST_METHOD") != "POST":
+        return _respond(start_response, "405 Method Not Allowed")
+    secret = environ.get("HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN", "")
+    if config.WEBHOOK_SECRET and not hmac.compare_digest(secret, config.WEBHOOK_SECRET):
+        return _respond(start_response, "403 Forbidden")
+
+    try:
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        length = 0
+    if length <= 0 or length > MAX_BODY:
+        return _respond(start_response, "400 Bad Request")
+    try:
+        update = types.Update.de_json(json.loads(environ["wsgi.input"].read(length)))
+    except (ValueError, KeyError, TypeError):
+        logger.warning("Некорректное обновление от Telegram")
+        return _respond(start_response, "400 Bad Request")
+
+    # 200 — Telegram больше не пришлёт это обновление, даже если обработка ещё не началась
+    bot.process_new_updates([update])
+    return _respond(start_response, "200 OK")
+
+
+if __name__ == "__main__":
+    if not config.WEBHOOK_URL:
+        raise SystemExit("Укажите публичный адрес сервера в WEBHOOK_URL")
+    bot.remove_webhook()
+    bot.set_webhook(url=config.WEBHOOK_URL.rstrip("/") + config.WEBHOOK_PATH,
+                    secret_token=config.WEBHOOK_SECRET or None)
+    print(f"🤖 Вебхук зарегистрирован: {config.WEBHOOK_URL.rstrip('/')}{config.WEBHOOK_PATH}")
@@ -0,0 +1,326 @@
+"""Пул процессов для тяжёлых задач: разбор .docx и генерация файлов.
+
+Регулярные выражения и python-docx держат GIL, поэтому потоков мало — задачи
+уходят в отдельные процессы. Функция и аргументы должны сериализоваться
+pickle (путь к файлу на входе, разобранные структуры или пути файлов на выходе).
+Каждый процесс можно убить отдельно: так работают таймаут и отмена задачи,
+не задевая задачи других пользователей.
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future
+
+import metrics
+import patterns
+
+logger = logging.getLogger(__name__)
+
+# Модули, которые форк-сервер загружает заранее, чтобы новые процессы стартовали быстро
+PRELOAD = ["parsers", "generator"]
+
+# Как часто выполняющаяся задача проверяет, не отменили ли её
+_POLL_INTERVAL = 0.1
+
+
+class JobError(Exception):
+    """Задача не выполнена."""
+
+
+class JobTimeout(JobError):
+    """Задача не уложилась в отведённое время и была остановлена."""
+
+
+class JobCancelled(JobError):
+    """Задача отменена."""
+
+
+class QueueFull(JobError):
+    """У пользователя уже слишком много задач в очереди."""
+
+
+def _worker_loop(conn):
+    while True:
+        try:
+            fn, args = conn.recv()
+        except EOFError:
+            return
+        try:
+            reply = ("ok", fn(*args))
+        except BaseException as e:
+            reply = ("error", e)
+        # метрики и счётчики шаблонов задачи уходят родителю вместе с результатом
+        collected = _collect()
+        try:
+            conn.send(reply + (collected,))
+        except Exception as e:
+            # результат или исключение не сериализуется
+            conn.send(("error", JobError(f"{type(e).__name__}: {e}"), collected))
+
+
+def _collect():
+    collected = metrics.drain(), patterns.drain_profile()
+    return collected if any(collected) else None
+
+
+def _merge(collected):
+    if collected:
+        metrics.merge(collected[0])
+        patterns.merge_profile(collected[1])
+
+
+def _result(future):
+    try:
+        return future.result()
+    except CancelledError:
+        raise JobCancelled("Задача отменена") from None
+
+
+async def _aresult(future):
+    try:
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        if future.cancelled():
+            raise JobCancelled("Задача отменена") from None
+        raise
+
+
+async def _aiter(iterable):
+    if hasattr(iterable, "__aiter__"):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item
+
+
+class _Job:
+    __slots__ = ("user_id", "fn", "args", "timeout", "future", "cancel_requested", "submitted")
+
+    def __init__(self, user_id, fn, args, timeout):
+        self.user_id = user_id
+        self.fn = fn
+        self.args = args
+        self.timeout = timeout
+        self.future = Future()
+        self.cancel_requested = False
+        self.submitted = time.monotonic()
+
+
+class _Worker:
+    """Один постоянный процесс и канал к нему."""
+
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_loop, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ProcessPool:
+    """Ограниченный пул процессов с очередью задач, таймаутами и отменой.
+
+    На каждого пользователя — не больше max_queued_per_user задач (в очереди и
+    в работе), поэтому один огромный файл не отнимает пул у всех остальных.
+    """
+
+    def __init__(self, max_workers, max_queued_per_user=2, timeout=600, start_method=None):
+        self.max_workers = max_workers
+        self.max_queued_per_user = max_queued_per_user
+        self.timeout = timeout
+        if start_method is None:
+            methods = multiprocessing.get_all_start_methods()
+            start_method = "forkserver" if "forkserver" in methods else "spawn"
+        self._ctx = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            self._ctx.set_forkserver_preload(PRELOAD)
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._jobs = {}
+        self._per_user = {}
+        self._runners = []
+        self._closed = False
+
+    # ---------- ПУБЛИЧНОЕ ----------
+    def submit(self, user_id, fn, *args, timeout=None):
+        """Ставит fn(*args) в очередь; возвращает concurrent.futures.Future."""
+        return self._submit(_Job(user_id, fn, args, timeout or self.timeout), self.max_queued_per_user)
+
+    def run(self, user_id, fn, *args, timeout=None):
+        """Выполняет задачу и ждёт результата; ошибки задачи пробрасываются."""
+        return _result(self.submit(user_id, fn, *args, timeout=timeout))
+
+    def imap(self, user_id, fn, args_iter, in_flight=None, timeout=None):
+        """Выполняет fn(*args) для каждого набора аргументов, отдавая результаты по порядку.
+
+        В пуле одновременно не больше in_flight задач этого вызова: следующая
+        ставится, когда забирают готовый результат. Если перебор прерван, ещё
+        не забранные задачи отменяются.
+        """
+        in_flight = in_flight or self.max_workers
+        pending = deque()
+        try:
+            for args in args_iter:
+                job = _Job(user_id, fn, tuple(args), timeout or self.timeout)
+                # очередь этого вызова ограничена in_flight, общий предел на пользователя не применяется
+                pending.append(self._submit(job, None))
+                if len(pending) >= in_flight:
+                    yield _result(pending.popleft())
+            while pending:
+                yield _result(pending.popleft())
+        finally:
+            for future in pending:
+                self.cancel(future)
+
+    async def arun(self, user_id, fn, *args, timeout=None):
+        """Как run, но для asyncio: результат ожидается, не занимая поток."""
+        return await _aresult(self.submit(user_id, fn, *args, timeout=timeout))
+
+    async def amap(self, user_id, fn, args_iter, in_flight=None, timeout=None):
+        """Как imap, но для asyncio: асинхронный генератор результатов по порядку.
+
+        args_iter может быть и асинхронным итератором — тогда аргументы
+        готовятся, не занимая цикл событий.
+        """
+        in_flight = in_flight or self.max_workers
+        pending = deque()
+        try:
+            async for args in _aiter(args_iter):
+                job = _Job(user_id, fn, tuple(args), timeout or self.timeout)
+                pending.append(self._submit(job, None))
+                if len(pending) >= in_flight:
+                    yield await _aresult(pending.popleft())
+            while pending:
+                yield await _aresult(pending.popleft())
+        finally:
+            for future in pending:
+                self.cancel(future)
+
+    def cancel(self, future):
+        """Отменяет задачу: ещё не начатую — снимает с очереди, выполняющуюся — убивает процесс."""
+        if future.cancel():
+            return True
+        with self._cond:
+            job = self._jobs.get(future)
+            if job is None or future.done():
+                return False
+            job.cancel_requested = True
+        return True
+
+    def cancel_user(self, user_id):
+        with self._cond:
+            futures = [f for f, job in self._jobs.items() if job.user_id == user_id]
+        return sum(self.cancel(f) for f in futures)
+
+    def queued(self):
+        """Задач в очереди (ещё не начатых)."""
+        with self._cond:
+            return len(self._queue)
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            pending = list(self._queue)
+            self._queue.clear()
+            self._cond.notify_all()
+        for job in pending:
+            job.future.cancel()
+        for runner in self._runners:
+            runner.join()
+
+    # ---------- ВНУТРЕННЕЕ ----------
+    def _submit(self, job, limit):
+        user_id = job.user_id
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Пул остановлен")
+            if limit is not None and self._per_user.get(user_id, 0) >= limit:
+                raise QueueFull(f"У пользователя {user_id} уже {limit} задач(и)")
+            self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+            self._jobs[job.future] = job
+            self._queue.append(job)
+            if len(self._runners) < self.max_workers and len(self._runners) < len(self._jobs):
+                runner = threading.Thread(target=self._run, name=f"job-runner-{len(self._runners)}", daemon=True)
+                self._runners.append(runner)
+                runner.start()
+            self._cond.notify()
+        job.future.add_done_callback(self._forget)
+        return job.future
+
+    def _forget(self, future):
+        with self._cond:
+            job = self._jobs.pop(future, None)
+            if job is None:
+                return
+            left = self._per_user.get(job.user_id, 1) - 1
+            if left:
+                self._per_user[job.user_id] = left
+            else:
+                self._per_user.pop(job.user_id, None)
+
+    def _next_job(self):
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            return self._queue.popleft() if self._queue else None
+
+    def _run(self):
+        worker = None
+        while True:
+            job = self._next_job()
+            if job is None:
+                break
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            broken = True
+            try:
+                if worker is None:
+                    worker = _Worker(self._ctx)
+                outcome = self._execute(worker, job)
+                broken = False
+            except (EOFError, OSError) as e:
+                outcome = ("error", JobError(f"Процесс-обработчик упал: {e}"), None)
+            except Exception as e:
+                # процесс не запустился или задача не сериализуется — поток не должен умереть с ней
+                outcome = ("error", JobError(f"Задача не передана процессу: {type(e).__name__}: {e}"), None)
+            if broken and worker is not None:
+                # в канале могло остаться недописанное сообщение — процесс заменяется
+                worker.kill()
+                worker = None
+            if outcome is None:
+                # таймаут или отмена — процесс с недоделанной задачей больше не годится
+                worker.kill()
+                worker = None
+                continue
+            status, value, collected = outcome
+            _merge(collected)
+            metrics.observe("bot_job_seconds", time.monotonic() - job.submitted, fn=job.fn.__name__)
+            if status == "ok":
+                job.future.set_result(value)
+            else:
+                job.future.set_exception(value)
+        if worker is not None:
+            worker.kill()
+
+    def _execute(self, worker, job):
+        worker.conn.send((job.fn, job.args))
+        deadline = time.monotonic() + job.timeout
+        while True:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                logger.warning("Задача %s пользователя %s превысила %s с", job.fn.__name__, job.user_id, job.timeout)
+                job.future.set_exception(JobTimeout(f"Задача не уложилась в {job.timeout} с"))
+                return None
+            if job.cancel_requested:
+                job.future.set_exception(JobCancelled("Задача отменена"))
+                return None
+            if worker.conn.poll(min(left, _POLL_INTERVAL)):
+                return worker.conn.recv()